@@ -0,0 +1,116 @@
+"""Бенчмарк рассылки (utils/broadcast.py) на локальной заглушке Bot API.
+
+Заполняет список пользователей (в памяти, без PostgreSQL), запускает
+рассылку через Broadcaster и Bot из bot.create_bot(), на середине
+останавливает ее и продолжает с контрольной точки. Каждый --blocked-every-й
+пользователь "заблокировал бота" - заглушка отвечает ему 403.
+
+Печатает сообщения в секунду, сколько пользователей получили сообщение,
+сколько отправок повторились после возобновления и сколько пользователей
+исключено из рассылок.
+
+Темп по умолчанию ограничен только --rate (SEND_GLOBAL_RATE); с
+--telegram-limits остается как в проде (30 сообщений в секунду).
+
+Запуск из корня проекта:
+    python benchmarks/bench_broadcast.py --users 20000 --latency 50 --rate 1000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+
+from aiohttp import ClientSession
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_e2e import fake_stats, free_port  # noqa: E402
+from fake_telegram import serve_forever  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20000, help="число получателей")
+    parser.add_argument("--latency", type=float, default=50, help="задержка ответа заглушки API, мс")
+    parser.add_argument("--rate", type=int, default=1000, help="общий лимит отправки, сообщений/с")
+    parser.add_argument("--blocked-every", type=int, default=20, help="каждый N-й пользователь заблокировал бота")
+    parser.add_argument("--pause-at", type=float, default=0.5, help="доля рассылки, после которой пауза (0 - без)")
+    parser.add_argument("--telegram-limits", action="store_true", help="не поднимать лимиты отправки")
+    return parser.parse_args()
+
+
+async def chat_stats(base_url: str) -> dict:
+    async with ClientSession() as http:
+        async with http.get(f"{base_url}/stats/chats") as response:
+            return await response.json()
+
+
+async def run(args: argparse.Namespace, base_url: str) -> None:
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+
+    import bot as bot_module
+    from utils.broadcast import Broadcaster
+    from utils.users import UserRegistry
+
+    await fake_stats(base_url, reset=True)
+    session = AiohttpSession(api=TelegramAPIServer.from_base(base_url))
+    bot = bot_module.create_bot(session=session)
+
+    registry = UserRegistry()
+    for user_id in range(10_000, 10_000 + args.users):
+        registry.touch(user_id)
+    broadcaster = Broadcaster(registry)
+    admin_id = 1  # итог рассылки уходит этому "админу"
+
+    started = time.perf_counter()
+    state = await broadcaster.begin(bot, admin_id, text="📣 Новые тарифы!")
+    if args.pause_at:
+        while state.sent + state.deactivated < args.users * args.pause_at and broadcaster.running:
+            await asyncio.sleep(0.01)
+        await broadcaster.stop()
+        print(f"Пауза: {state.summary()}, контрольная точка user_id {state.last_user_id}")
+        state = await broadcaster.resume(bot)
+    await broadcaster.wait()
+    elapsed = time.perf_counter() - started
+
+    await session.close()
+    chats = await chat_stats(base_url)
+    # Итог каждого запуска рассылки уходит админу - это не часть рассылки
+    runs = 2 if args.pause_at else 1
+    delivered = chats["chats"] - 1
+    repeated = chats["repeated"] - (runs - 1)
+    expected = args.users - (args.users // args.blocked_every if args.blocked_every else 0)
+
+    print(f"Итог: {state.summary()}")
+    print(f"Время: {elapsed:.2f} с, {(state.sent + state.deactivated + repeated) / elapsed:.0f} запросов/с")
+    print(f"Получили сообщение: {delivered} из {expected}, повторных отправок: {repeated}")
+    print(f"Осталось активных пользователей: {await registry.count_active()} из {args.users}")
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.telegram_limits:
+        os.environ.setdefault("SEND_GLOBAL_RATE", str(args.rate))
+        os.environ.setdefault("SEND_GLOBAL_BURST", str(args.rate))
+
+    print(f"Рассылка: {args.users} пользователей, задержка API {args.latency:g} мс, "
+          f"лимиты Telegram: {'да' if args.telegram_limits else f'нет ({args.rate}/с)'}")
+    port = free_port()
+    server = multiprocessing.Process(
+        target=serve_forever, args=(port, args.latency / 1000, args.blocked_every), daemon=True
+    )
+    server.start()
+    try:
+        asyncio.run(run(args, f"http://127.0.0.1:{port}"))
+    finally:
+        server.terminate()
+        server.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Микробенчмарк выбора обработчика callback'а.
+
+Сравнивает прежнюю цепочку роутеров с фильтрами F.data.startswith(...) /
+F.data == ... (в порядке include_router из bot.py) с CallbackRouter -
+таблицей префиксов и разбором CallbackData. Обработчики пустые, поэтому
+мерится только диспетчеризация dp.propagate_event("callback_query").
+
+Вторая таблица - рост числа маршрутов: в цепочке фильтров время растет
+с позицией обработчика, в таблице - только с длиной callback data.
+
+Запуск из корня проекта:
+    python benchmarks/bench_callback_routes.py
+"""
+import asyncio
+import sys
+import time
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from aiogram import Bot, Dispatcher, F, Router  # noqa: E402
+from aiogram.filters.callback_data import CallbackData  # noqa: E402
+from aiogram.types import CallbackQuery  # noqa: E402
+
+from keyboards import callbacks  # noqa: E402
+from utils.callback_routes import CallbackRouter  # noqa: E402
+
+# Сколько секунд гонять каждый замер (пачками по BATCH вызовов)
+MEASURE_SECONDS = 1.0
+BATCH = 20
+SIZES = [10, 100, 1000]
+
+# Роутеры и фильтры callback'ов до таблицы маршрутов, в порядке подключения
+OLD_CHAIN = [
+    ("admin", []),
+    ("directions", [
+        F.data.startswith("dir_"), F.data == "directions", F.data.startswith("designer_"),
+        F.data.startswith("manager_"), F.data.startswith("curator_details_"), F.data.startswith("tasks_details_"),
+    ]),
+    ("courses", [F.data.startswith("courses_"), F.data.startswith("buy_"), F.data == "earning_training"]),
+    ("earning_ways", []),
+    ("settings", [
+        F.data == "settings", F.data == "set_exp", F.data == "set_notify",
+        F.data == "set_interests", F.data.startswith("set_int_"),
+    ]),
+    ("common", [F.data == "main_menu"]),
+    ("start", []),
+]
+
+# (старые data, новые data)
+CASES = [
+    ("dir_online_specialist", callbacks.DirectionCallback(dir_id="online_specialist").pack()),
+    ("tasks_details_task_execution", callbacks.TasksDetailsCallback(dir_id="task_execution").pack()),
+    ("buy_online_specialist", callbacks.TariffsCallback(dir_id="online_specialist").pack()),
+    ("set_int_online_specialist", callbacks.InterestToggleCallback(dir_id="online_specialist").pack()),
+    ("main_menu", callbacks.MainMenuCallback().pack()),
+]
+
+
+async def noop(callback: CallbackQuery) -> None:
+    pass
+
+
+def old_dispatcher() -> Dispatcher:
+    dp = Dispatcher()
+    for name, filters in OLD_CHAIN:
+        router = Router(name=name)
+        for item in filters:
+            router.callback_query.register(noop, item)
+        dp.include_router(router)
+    return dp
+
+
+def new_dispatcher() -> Dispatcher:
+    dp = Dispatcher()
+    router = CallbackRouter()
+    for cls in vars(callbacks).values():
+        if isinstance(cls, type) and issubclass(cls, CallbackData) and cls is not CallbackData:
+            router.callback_query.register(noop, cls.filter())
+    dp.include_router(router)
+    return dp
+
+
+def synthetic_class(index: int) -> type:
+    return types.new_class(
+        f"Route{index}", (CallbackData,), {"prefix": f"r{index}"},
+        lambda ns: ns.update({"__annotations__": {"value": str}}),
+    )
+
+
+def synthetic_dispatchers(size: int):
+    old, new = Dispatcher(), Dispatcher()
+    old_router, new_router = Router(), CallbackRouter()
+    for index in range(size):
+        old_router.callback_query.register(noop, F.data.startswith(f"r{index}_"))
+        new_router.callback_query.register(noop, synthetic_class(index).filter())
+    old.include_router(old_router)
+    new.include_router(new_router)
+    return old, new
+
+
+def query(data: str) -> CallbackQuery:
+    return CallbackQuery.model_validate({
+        "id": "1", "chat_instance": "1", "data": data,
+        "from": {"id": 1, "is_bot": False, "first_name": "bench"},
+    })
+
+
+async def measure(dp: Dispatcher, bot: Bot, data: str) -> float:
+    """Микросекунд на один callback."""
+    event = query(data)
+    result = await dp.propagate_event("callback_query", event, bot=bot)
+    assert result is None, f"{data!r} не дошел до обработчика"
+    calls = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < MEASURE_SECONDS:
+        for _ in range(BATCH):
+            await dp.propagate_event("callback_query", event, bot=bot)
+        calls += BATCH
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+async def main() -> None:
+    bot = Bot("1:bench")
+    old, new = old_dispatcher(), new_dispatcher()
+
+    print(f"{'callback':>30} | {'filters, µs':>11} | {'table, µs':>9} | {'legacy, µs':>10} | speedup")
+    print('-' * 82)
+    for old_data, new_data in CASES:
+        chain = await measure(old, bot, old_data)
+        table = await measure(new, bot, new_data)
+        legacy = await measure(new, bot, old_data)
+        print(f"{old_data:>30} | {chain:>11.2f} | {table:>9.2f} | {legacy:>10.2f} | {chain / table:>6.1f}x")
+
+    print()
+    print(f"{'routes':>7} | {'filters, last route, µs':>24} | {'table, µs':>9} | speedup")
+    print('-' * 58)
+    for size in SIZES:
+        old, new = synthetic_dispatchers(size)
+        last = size - 1
+        chain = await measure(old, bot, f"r{last}_value")
+        table = await measure(new, bot, f"r{last}:value")
+        print(f"{size:>7} | {chain:>24.2f} | {table:>9.2f} | {chain / table:>6.1f}x")
+
+    await bot.session.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
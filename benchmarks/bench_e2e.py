@@ -0,0 +1,254 @@
+"""Сквозной бенчмарк пропускной способности бота на локальной заглушке Bot API.
+
+Поднимает benchmarks/fake_telegram.py в отдельном процессе, направляет на него Bot из
+bot.create_bot() и подает в полный диспетчер bot.create_dispatcher()
+(все роутеры, AntiSpamMiddleware, throttling, метрики) синтетическую смесь
+апдейтов: /start, кнопки меню и callback'и направления/курсов/тарифов от
+нескольких пользователей с заданной частотой.
+
+Печатает апдейты в секунду, p50/p99 сквозной задержки (от подачи апдейта
+до завершения обработчика со всеми запросами к API) и число вызовов API
+на апдейт.
+
+Лимиты исходящих запросов Telegram (30 сообщений в секунду) по умолчанию
+подняты, чтобы мерить сам бот; --telegram-limits оставляет их как в проде.
+
+Запуск из корня проекта:
+    python benchmarks/bench_e2e.py --rate 300 --users 500 --duration 10 --latency 20
+"""
+import argparse
+import asyncio
+import importlib
+import itertools
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+from aiohttp import ClientConnectionError, ClientSession
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_telegram import serve_forever  # noqa: E402
+from keyboards.callbacks import CoursesCallback, DirectionCallback, TariffsCallback  # noqa: E402
+
+# Доля каждого вида апдейтов в смеси
+MIX = (
+    ("start", 10),
+    ("menu", 30),
+    ("dir", 30),
+    ("courses", 20),
+    ("buy", 10),
+)
+MENU_TEXTS = (
+    "💼 Направления для заработка",
+    "💰 Способы заработка",
+    "⚙️ Настройки",
+    "ℹ️ О боте",
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=int, default=200, help="апдейтов в секунду")
+    parser.add_argument("--users", type=int, default=500, help="число пользователей")
+    parser.add_argument("--duration", type=float, default=10, help="длительность подачи, с")
+    parser.add_argument("--latency", type=float, default=0, help="задержка ответа заглушки API, мс")
+    parser.add_argument("--telegram-limits", action="store_true", help="не поднимать лимиты отправки")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+
+class UpdateFactory:
+    """Собирает сырые апдейты Telegram для синтетических пользователей."""
+
+    def __init__(self, users: int, direction_ids, seed: int):
+        self.users = users
+        self.direction_ids = list(direction_ids)
+        self.random = random.Random(seed)
+        self.update_ids = itertools.count(1)
+        self.message_ids = itertools.count(1)
+        kinds, weights = zip(*MIX)
+        self.kinds = kinds
+        self.weights = weights
+        # Есть ли у пользователя на экране фото: callback приходит от последнего экрана,
+        # а от этого зависит, можно ли отредактировать сообщение или нужно отправить новое
+        self.photo_on_screen = {}
+
+    def _user(self) -> dict:
+        user_id = 10_000 + self.random.randrange(self.users)
+        return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"}
+
+    def _message(self, user: dict, text: str) -> dict:
+        return {
+            "message_id": next(self.message_ids),
+            "date": int(time.time()),
+            "chat": {"id": user["id"], "type": "private"},
+            "from": user,
+            "text": text,
+        }
+
+    def make(self, kind: str = "") -> dict:
+        kind = kind or self.random.choices(self.kinds, self.weights)[0]
+        user = self._user()
+        update = {"update_id": next(self.update_ids)}
+        if kind == "start":
+            update["message"] = self._message(user, "/start")
+            update["message"]["entities"] = [{"type": "bot_command", "offset": 0, "length": 6}]
+        elif kind == "menu":
+            update["message"] = self._message(user, self.random.choice(MENU_TEXTS))
+        else:
+            direction_id = self.random.choice(self.direction_ids)
+            data = {
+                "dir": DirectionCallback(dir_id=direction_id),
+                "courses": CoursesCallback(dir_id=direction_id),
+                "buy": TariffsCallback(dir_id=direction_id),
+            }[kind].pack()
+            screen = self._message({**user, "is_bot": True}, "экран")
+            if self.photo_on_screen.get(user["id"]):
+                del screen["text"]
+                screen["photo"] = [{"file_id": "bench", "file_unique_id": "bench", "width": 1280, "height": 720}]
+                screen["caption"] = "экран"
+            update["callback_query"] = {
+                "id": str(update["update_id"]),
+                "from": user,
+                "chat_instance": str(user["id"]),
+                "data": data,
+                "message": screen,
+            }
+        # /start, направление и тарифы показываются с картинкой, меню - текстом,
+        # курсы открываются поверх того, что уже на экране
+        if kind in ("start", "dir", "buy"):
+            self.photo_on_screen[user["id"]] = True
+        elif kind == "menu":
+            self.photo_on_screen[user["id"]] = False
+        return update
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def fake_stats(base_url: str, reset: bool = False) -> Counter:
+    """Счетчики вызовов заглушки (ждет, пока она поднимется)."""
+    async with ClientSession() as http:
+        for _ in range(100):
+            try:
+                if reset:
+                    await http.post(f"{base_url}/stats/reset")
+                async with http.get(f"{base_url}/stats") as response:
+                    return Counter(await response.json())
+            except ClientConnectionError:
+                await asyncio.sleep(0.05)
+    raise RuntimeError(f"Заглушка Bot API не отвечает на {base_url}")
+
+
+async def run(args: argparse.Namespace, base_url: str) -> None:
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiogram.types import Update
+
+    import bot as bot_module
+    from utils.data_loader import catalog
+
+    await fake_stats(base_url)
+    session = AiohttpSession(api=TelegramAPIServer.from_base(base_url))
+    bot = bot_module.create_bot(session=session)
+    dp = bot_module.create_dispatcher()
+    await dp.emit_startup(bot=bot, dispatcher=dp)
+
+    factory = UpdateFactory(args.users, catalog.snapshot.by_id, args.seed)
+
+    # Прогрев: pydantic достраивает модели методов API при первом вызове,
+    # а картинки загружаются один раз - это не должно попасть в замер
+    for _ in range(len(factory.direction_ids) * 3):
+        for kind, _weight in MIX:
+            await dp.feed_update(bot, Update.model_validate(factory.make(kind), context={"bot": bot}))
+    await fake_stats(base_url, reset=True)
+    factory.update_ids = itertools.count(1)
+    latencies = []
+    errors = 0
+
+    async def process(update: Update) -> None:
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            await dp.feed_update(bot, update)
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - started)
+
+    tasks = set()
+    tick = 0.01
+    per_tick = args.rate * tick
+    carry = 0.0
+    started = time.perf_counter()
+    deadline = started + args.duration
+    next_tick = started
+    while time.perf_counter() < deadline:
+        carry += per_tick
+        while carry >= 1:
+            carry -= 1
+            task = asyncio.create_task(process(Update.model_validate(factory.make(), context={"bot": bot})))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        next_tick += tick
+        await asyncio.sleep(max(0.0, next_tick - time.perf_counter()))
+    sent = next(factory.update_ids) - 1
+    if tasks:
+        await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    await dp.emit_shutdown(bot=bot, dispatcher=dp)
+    await dp.storage.close()
+    await session.close()
+    calls = await fake_stats(base_url)
+
+    latencies.sort()
+    ms = [value * 1000 for value in latencies]
+    print(f"Апдейтов: {sent} за {elapsed:.2f} с, ошибок: {errors}")
+    print(f"Пропускная способность: {len(latencies) / elapsed:.1f} апдейтов/с (подано {args.rate}/с)")
+    print(f"Задержка: p50 {statistics.median(ms):.1f} мс, p99 {ms[int(len(ms) * 0.99)]:.1f} мс, "
+          f"max {ms[-1]:.1f} мс")
+    print(f"Вызовов API на апдейт: {sum(calls.values()) / max(sent, 1):.2f}")
+    for method, count in calls.most_common():
+        print(f"  {method:>22}: {count}")
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.telegram_limits:
+        for name in ("SEND_GLOBAL_RATE", "SEND_GLOBAL_BURST", "SEND_CHAT_RATE", "SEND_CHAT_BURST"):
+            os.environ.setdefault(name, "100000")
+    # Каталог читается один раз, без фонового опроса файла
+    os.environ.setdefault("CATALOG_POLL_INTERVAL", "0")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # file_id от заглушки не должны попасть в настоящий data/media_cache.json
+        # (utils экспортирует объект media_cache, поэтому берем сам модуль)
+        media_cache_module = importlib.import_module("utils.media_cache")
+        media_cache_module.media_cache = media_cache_module.MediaCache(Path(tmp) / "media_cache.json")
+
+        print(f"Нагрузка: {args.rate} апдейтов/с, {args.users} пользователей, {args.duration:g} с, "
+              f"задержка API {args.latency:g} мс, лимиты Telegram: {'да' if args.telegram_limits else 'нет'}")
+        port = free_port()
+        server = multiprocessing.Process(target=serve_forever, args=(port, args.latency / 1000), daemon=True)
+        server.start()
+        try:
+            asyncio.run(run(args, f"http://127.0.0.1:{port}"))
+        finally:
+            server.terminate()
+            server.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Бенчмарк задержки event loop при логировании под нагрузкой.
+
+Имитирует поток входящих сообщений: на каждое пишется INFO-запись как в
+AntiSpamMiddleware и запись aiogram.event о времени обработки. Параллельно
+задача-метроном спит по 1 мс и измеряет, насколько позже она просыпается.
+Сравниваются синхронный FileHandler (как было) и очередь с фоновым потоком
+из utils/logging_setup.py.
+
+На быстром диске (page cache) синхронная запись почти бесплатна, поэтому
+третий аргумент добавляет задержку на каждый flush файла - так выглядит
+запись на загруженный диск или сетевой том, где и блокируется event loop.
+
+Запуск из корня проекта:
+    python benchmarks/bench_logging.py [сообщений_в_секунду] [секунд] [задержка_диска_мс]
+"""
+import asyncio
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from logging.handlers import QueueListener
+from pathlib import Path
+from queue import Queue
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.logging_setup import TEXT_FORMAT, LazyQueueHandler, SamplingFilter  # noqa: E402
+
+
+async def metronome(stop: asyncio.Event, lags: list) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append((time.perf_counter() - start - 0.001) * 1000)
+
+
+async def message_load(rate: int, duration: float) -> None:
+    spam_logger = logging.getLogger('bot')
+    event_logger = logging.getLogger('aiogram.event')
+    batch = max(1, rate // 100)
+    end = time.perf_counter() + duration
+    update_id = 0
+    while time.perf_counter() < end:
+        for _ in range(batch):
+            update_id += 1
+            spam_logger.info("Сообщение от %s (@%s): %.100s...", update_id, "user", "💼 Направления для заработка")
+            event_logger.info("Update id=%s is handled. Duration %d ms by bot id=%d", update_id, 3, 1)
+        await asyncio.sleep(0.01)
+
+
+async def run(rate: int, duration: float) -> list:
+    lags: list = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(metronome(stop, lags))
+    await message_load(rate, duration)
+    stop.set()
+    await ticker
+    return lags
+
+
+class SlowFileHandler(logging.FileHandler):
+    """FileHandler с искусственной задержкой диска на каждый flush."""
+
+    def __init__(self, path: Path, latency: float):
+        super().__init__(path, encoding='utf-8')
+        self.latency = latency
+
+    def flush(self) -> None:
+        super().flush()
+        if self.latency:
+            time.sleep(self.latency)
+
+
+def configure(mode: str, path: Path, latency: float):
+    root = logging.getLogger()
+    root.handlers = []
+    root.setLevel(logging.INFO)
+    file_handler = SlowFileHandler(path, latency)
+    file_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    if mode == 'sync':
+        root.addHandler(file_handler)
+        return None
+
+    log_queue: Queue = Queue(maxsize=100000)
+    queue_handler = LazyQueueHandler(log_queue)
+    if mode == 'queue+sampling':
+        queue_handler.addFilter(SamplingFilter({'aiogram.event': 0.1}))
+    root.addHandler(queue_handler)
+    listener = QueueListener(log_queue, file_handler)
+    listener.start()
+    return listener
+
+
+def main() -> None:
+    rate = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+    latency = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.0
+
+    print(f"Нагрузка: {rate} сообщений/с, {duration:g} с, задержка диска {latency * 1000:g} мс")
+    print(f"{'режим':>16} | {'p50, мс':>8} | {'p99, мс':>8} | {'max, мс':>8}")
+    print('-' * 50)
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ('sync', 'queue', 'queue+sampling'):
+            listener = configure(mode, Path(tmp) / f'{mode}.log', latency)
+            lags = asyncio.run(run(rate, duration))
+            if listener:
+                listener.stop()
+            lags.sort()
+            p99 = lags[int(len(lags) * 0.99)]
+            print(f"{mode:>16} | {statistics.median(lags):>8.3f} | {p99:>8.3f} | {lags[-1]:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
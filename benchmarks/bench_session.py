@@ -0,0 +1,115 @@
+"""Бенчмарк HTTP-сессии к Bot API (utils/session.py) на локальной заглушке.
+
+Сравнивает сессию aiogram по умолчанию (AiohttpSession) с настроенной
+TunedAiohttpSession: пачка одновременных sendMessage, пауза --idle секунд
+(дольше 15 с - keep-alive aiohttp по умолчанию) и вторая такая же пачка.
+Планировщик отправки не подключается - меряется только HTTP-слой.
+
+Печатает запросы в секунду, p50/p99 времени запроса по каждой пачке и
+сколько TCP-соединений заглушка увидела за весь прогон.
+
+Запуск из корня проекта:
+    python benchmarks/bench_session.py --requests 3000 --concurrency 150 --latency 20 --idle 20
+"""
+import argparse
+import asyncio
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+from aiohttp import ClientSession
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_e2e import fake_stats, free_port  # noqa: E402
+from fake_telegram import serve_forever  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=3000, help="запросов в каждой пачке")
+    parser.add_argument("--concurrency", type=int, default=150, help="одновременных запросов")
+    parser.add_argument("--latency", type=float, default=20, help="задержка ответа заглушки API, мс")
+    parser.add_argument("--idle", type=float, default=20, help="пауза между пачками, с")
+    parser.add_argument("--pool", type=int, default=None, help="HTTP_POOL_SIZE настроенной сессии")
+    return parser.parse_args()
+
+
+async def connection_stats(base_url: str) -> dict:
+    async with ClientSession() as http:
+        async with http.get(f"{base_url}/stats/connections") as response:
+            return await response.json()
+
+
+def percentile(values: List[float], share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+async def burst(bot, count: int, concurrency: int) -> Tuple[float, List[float]]:
+    """count запросов не более чем по concurrency одновременно: (секунды, времена запросов)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    timings: List[float] = []
+
+    async def send(chat_id: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await bot.send_message(chat_id, "ping")
+            timings.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(10_000 + i) for i in range(count)))
+    return time.perf_counter() - started, timings
+
+
+async def run_variant(name: str, session, args: argparse.Namespace, base_url: str) -> None:
+    from aiogram import Bot
+
+    from config import TOKEN
+
+    await fake_stats(base_url, reset=True)
+    bot = Bot(token=TOKEN, session=session)
+    try:
+        for index in (1, 2):
+            if index == 2:
+                await asyncio.sleep(args.idle)
+            elapsed, timings = await burst(bot, args.requests, args.concurrency)
+            print(f"  {name}, пачка {index}: {args.requests / elapsed:7.0f} запросов/с, "
+                  f"p50 {percentile(timings, 0.5) * 1000:6.1f} мс, p99 {percentile(timings, 0.99) * 1000:6.1f} мс")
+    finally:
+        await session.close()
+    stats = await connection_stats(base_url)
+    print(f"  {name}: {stats['connections']} TCP-соединений на {stats['requests']} запросов")
+
+
+async def run(args: argparse.Namespace, base_url: str) -> None:
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+
+    from utils.session import TunedAiohttpSession
+
+    api = TelegramAPIServer.from_base(base_url)
+    await run_variant("aiogram по умолчанию", AiohttpSession(api=api), args, base_url)
+    tuned = TunedAiohttpSession(api=api) if args.pool is None else TunedAiohttpSession(api=api, pool_size=args.pool)
+    await run_variant("настроенная сессия ", tuned, args, base_url)
+
+
+def main() -> None:
+    args = parse_args()
+    print(f"Сессия Bot API: {args.requests} запросов x 2, {args.concurrency} одновременно, "
+          f"задержка API {args.latency:g} мс, пауза {args.idle:g} с")
+    port = free_port()
+    server = multiprocessing.Process(target=serve_forever, args=(port, args.latency / 1000), daemon=True)
+    server.start()
+    try:
+        asyncio.run(run(args, f"http://127.0.0.1:{port}"))
+    finally:
+        server.terminate()
+        server.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Микробенчмарк антиспама: стоимость проверки одного сообщения.
+
+Сравнивает старую проверку (``keyword.lower() in text.lower()`` для каждого
+слова) с SpamMatcher при росте списка стоп-слов. Перед замером проверяет,
+что обычные русские сообщения не срабатывают на стандартный список, а
+замаскированные стоп-слова находятся.
+
+Запуск из корня проекта:
+    python benchmarks/bench_spam_filter.py
+"""
+import random
+import string
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.spam_filter import SpamMatcher  # noqa: E402
+
+# Стандартный список стоп-слов (data/spam_keywords.txt)
+DEFAULT_KEYWORDS = [
+    'casino', 'bonus', 'jetacas', 'welcome1k', 'deposit', 'promo code', 'online casino',
+    'bet', 'gambling', 'poker', '$1000', 'claim', 'withdraw', 'payout', 'betting', 'jackpot',
+]
+
+# Обычные сообщения: кириллица похожа на латиницу ("вет" -> "bet"), но это не спам
+RUSSIAN_MESSAGES = [
+    "вет. врач хочу стать",
+    "Вет клиника рядом",
+    "ВЕТ",
+    "Привет! Хочу стать ветеринаром, есть такие курсы?",
+    "Какой бонус за отзыв?",
+    "Мне нужен менеджер маркетплейсов",
+]
+
+# Стоп-слова, замаскированные кириллицей и невидимыми символами
+DISGUISED_SPAM = [
+    "bеt now",            # кириллическая е
+    "сasino online",      # кириллическая с
+    "c\u200basino",       # пробел нулевой ширины
+    "WЕLCOME1K bonus",
+]
+
+SIZES = [16, 100, 1000, 5000]
+REPEAT = 2000
+
+MESSAGES = [
+    "💼 Направления для заработка",
+    "Привет! Подскажи, пожалуйста, с чего начать обучение на копирайтера? "
+    "Я раньше работала в офисе, опыта во фрилансе нет совсем.",
+    "Hello! I would like to ask about the chatbot course and the price with chat support. " * 3,
+]
+
+
+def make_keywords(count: int) -> list:
+    rnd = random.Random(count)
+    base = ['casino', 'bonus', 'deposit', 'promo code', 'bet', 'jackpot']
+    while len(base) < count:
+        base.append(''.join(rnd.choices(string.ascii_lowercase, k=rnd.randint(4, 10))))
+    return base[:count]
+
+
+def naive_check(keywords: list, text: str) -> bool:
+    return any(keyword.lower() in text.lower() for keyword in keywords)
+
+
+def check_matches() -> None:
+    matcher = SpamMatcher(DEFAULT_KEYWORDS)
+    for text in RUSSIAN_MESSAGES:
+        keyword = matcher.search(text)
+        assert keyword is None, f"ложное срабатывание на {text!r}: {keyword!r}"
+    for text in DISGUISED_SPAM:
+        assert matcher.search(text), f"не найдено стоп-слово в {text!r}"
+    print(f"Проверка: {len(RUSSIAN_MESSAGES)} обычных сообщений чистые, {len(DISGUISED_SPAM)} замаскированных найдены\n")
+
+
+def main() -> None:
+    check_matches()
+    print(f"{'keywords':>9} | {'naive, µs/msg':>14} | {'matcher, µs/msg':>16} | speedup")
+    print('-' * 58)
+    for size in SIZES:
+        keywords = make_keywords(size)
+        matcher = SpamMatcher(keywords)
+
+        naive = timeit.timeit(
+            lambda: [naive_check(keywords, m) for m in MESSAGES], number=REPEAT
+        ) / (REPEAT * len(MESSAGES)) * 1e6
+        fast = timeit.timeit(
+            lambda: [matcher.search(m) for m in MESSAGES], number=REPEAT
+        ) / (REPEAT * len(MESSAGES)) * 1e6
+
+        print(f"{size:>9} | {naive:>14.2f} | {fast:>16.2f} | {naive / fast:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""Локальная заглушка Bot API (api.telegram.org) для бенчмарков.
+
+Принимает запросы вида /bot<token>/<method>, отвечает правдоподобными
+объектами (Message для send*/edit*, True для остального) и считает вызовы
+по методам. Можно добавить искусственную задержку ответа, а каждый
+blocked_every-й чат отвечает 403, как пользователь, заблокировавший бота.
+
+Счетчики вызовов доступны по GET /stats, число чатов, получивших сообщения
+(и повторных отправок в тот же чат), - по GET /stats/chats, число TCP-соединений,
+по которым приходили запросы, - по GET /stats/connections. Используется из
+bench_e2e.py, bench_broadcast.py и bench_session.py (в отдельном процессе, чтобы не делить CPU
+с ботом), можно запустить и сам:
+    python benchmarks/fake_telegram.py [порт] [задержка_мс] [blocked_every]
+"""
+import asyncio
+import itertools
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "Freelance Bench Bot", "username": "bench_bot"}
+
+
+class FakeTelegram:
+    """aiohttp приложение, изображающее Bot API."""
+
+    def __init__(self, latency: float = 0.0, blocked_every: int = 0):
+        self.latency = latency
+        self.blocked_every = blocked_every
+        self.calls: Counter = Counter()
+        self.chats: Counter = Counter()
+        # Запросы по адресу клиента (host, port) - один адрес на TCP-соединение
+        self.connections: Counter = Counter()
+        self._message_ids = itertools.count(1000)
+        self._file_ids = itertools.count(1)
+        self._runner: Optional[web.AppRunner] = None
+        self.app = web.Application(client_max_size=20 * 1024 * 1024)
+        self.app.router.add_post("/bot{token}/{method}", self.handle)
+        self.app.router.add_get("/stats", self.stats)
+        self.app.router.add_get("/stats/chats", self.chat_stats)
+        self.app.router.add_get("/stats/connections", self.connection_stats)
+        self.app.router.add_post("/stats/reset", self.reset)
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def _message(self, chat_id: Any, fields: Dict[str, Any], method: str) -> Dict[str, Any]:
+        message = {
+            "message_id": int(fields.get("message_id") or next(self._message_ids)),
+            "date": int(time.time()),
+            "chat": {"id": int(chat_id or 0), "type": "private"},
+            "from": BOT_USER,
+        }
+        if method in ("sendPhoto", "editMessageMedia", "editMessageCaption"):
+            file_id = f"fake-photo-{next(self._file_ids)}"
+            message["photo"] = [{"file_id": file_id, "file_unique_id": file_id, "width": 1280, "height": 720}]
+            message["caption"] = fields.get("caption", "")
+        else:
+            message["text"] = fields.get("text", "")
+        return message
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        self.connections[request.transport.get_extra_info("peername")] += 1
+        fields = dict(await request.post())
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if method == "getMe":
+            result: Any = BOT_USER
+        elif method.startswith(("send", "edit", "copy", "forward")):
+            chat_id = int(fields.get("chat_id") or 0)
+            if self.blocked_every and chat_id % self.blocked_every == 0:
+                return web.json_response(
+                    {"ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user"},
+                    status=403,
+                )
+            self.chats[chat_id] += 1
+            result = self._message(chat_id, fields, method)
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.calls))
+
+    async def chat_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "chats": len(self.chats),
+            "repeated": sum(count - 1 for count in self.chats.values()),
+        })
+
+    async def connection_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "connections": len(self.connections),
+            "requests": sum(self.connections.values()),
+        })
+
+    async def reset(self, request: web.Request) -> web.Response:
+        self.calls.clear()
+        self.chats.clear()
+        self.connections.clear()
+        return web.json_response({"ok": True})
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Запустить сервер, вернуть базовый URL (порт 0 - любой свободный)."""
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host=host, port=port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def close(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+
+
+async def serve(port: int, latency: float, blocked_every: int = 0, quiet: bool = False) -> None:
+    fake = FakeTelegram(latency, blocked_every)
+    url = await fake.start(port=port)
+    if not quiet:
+        print(f"Заглушка Bot API слушает {url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fake.close()
+
+
+def serve_forever(port: int, latency: float, blocked_every: int = 0) -> None:
+    """Точка входа для multiprocessing.Process."""
+    asyncio.run(serve(port, latency, blocked_every, quiet=True))
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8081
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.0
+    blocked_every = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    asyncio.run(serve(port, latency, blocked_every))
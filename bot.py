@@ -1,43 +1,62 @@
 import asyncio
 import logging
 from pathlib import Path
-from typing import Any, Awaitable, Callable, Dict
+from typing import Any, Awaitable, Callable, Dict, Optional
 
 from aiogram import BaseMiddleware, Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
 from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import Message, TelegramObject, Update
 
-from config import TOKEN
-from handlers import common, courses, directions, earning_ways, start
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('logs/bot.log', encoding='utf-8')
-    ]
+from config import BOT_MODE, METRICS_ENABLED, SPAM_BAN_HOURS, TOKEN, WORKERS
+from handlers import admin, common, directions, earning_ways, settings, start
+from middlewares import (
+    CallbackDedupMiddleware,
+    MetricsMiddleware,
+    ThrottlingMiddleware,
+    api_metrics,
+    create_throttle_storage,
+    update_scheduler,
 )
-logger = logging.getLogger(__name__)
+from server import lifecycle, run_polling, run_webhook, run_workers, start_metrics_server
+from utils.analytics import analytics
+from utils.blocklist import Blocklist, blocklist
+from utils.broadcast import broadcaster
+from utils.callback_routes import callback_router
+from utils.data_loader import catalog
+from utils.image_manifest import image_manifest
+from utils.db import close_pool
+from utils.logging_setup import setup_logging
+from utils.metrics import SPAM_BLOCKS
+from utils.profiler import ProfilerMiddleware, profiler
+from utils.profiles import profiles
+from utils.redis_pool import close_redis
+from utils.screens import screen_cache
+from utils.send_scheduler import send_scheduler
+from utils.session import create_session
+from utils.spam_filter import KeywordFileMatcher, SpamMatcher
+from utils.storage import create_events_isolation, create_storage
+from utils.users import users
 
-# Включаем WARNING логи для всех модулей
-logging.getLogger('utils.image_handler').setLevel(logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 class AntiSpamMiddleware(BaseMiddleware):
     """Middleware для защиты от спама и логирования."""
 
-    def __init__(self):
+    # Используются, если файла data/spam_keywords.txt нет
+    DEFAULT_SPAM_KEYWORDS = [
+        'casino', 'bonus', 'jetacas', 'welcome1k',
+        'deposit', 'promo code', 'online casino',
+        'bet', 'gambling', 'poker', '$1000', 'claim',
+        'withdraw', 'payout', 'betting', 'jackpot'
+    ]
+
+    def __init__(self, matcher: Optional[SpamMatcher] = None, blocked_users: Optional[Blocklist] = None):
         super().__init__()
-        self.spam_keywords = [
-            'casino', 'bonus', 'jetacas', 'welcome1k',
-            'deposit', 'promo code', 'online casino',
-            'bet', 'gambling', 'poker', '$1000', 'claim',
-            'withdraw', 'payout', 'betting', 'jackpot'
-        ]
-        self.blocked_users = set()
+        self.matcher = matcher or KeywordFileMatcher(fallback=self.DEFAULT_SPAM_KEYWORDS)
+        self.blocked_users = blocked_users or blocklist
 
     async def __call__(
         self,
@@ -45,67 +64,162 @@ class AntiSpamMiddleware(BaseMiddleware):
         event: TelegramObject,
         data: Dict[str, Any]
     ) -> Any:
-        if isinstance(event, Update) and event.message:
-            user_id = event.message.from_user.id
-            username = event.message.from_user.username
-            text = event.message.text or ""
+        # Middleware вешается на dp.message, но поддерживаем и целый Update
+        message = event.message if isinstance(event, Update) else event
+        if isinstance(message, Message) and message.from_user:
+            user_id = message.from_user.id
+            username = message.from_user.username
+            text = message.text or message.caption or ""
 
             # Логируем все сообщения
-            logger.info(f"Сообщение от {user_id} (@{username}): {text[:100]}...")
+            logger.info("Сообщение от %s (@%s): %.100s...", user_id, username, text)
 
             # Проверяем на спам
-            if any(keyword.lower() in text.lower() for keyword in self.spam_keywords):
-                logger.warning(f"🚨 СПАМ обнаружен от пользователя {user_id} (@{username}): {text}")
-                self.blocked_users.add(user_id)
+            keyword = self.matcher.search(text)
+            if keyword:
+                logger.warning(f"🚨 СПАМ обнаружен от пользователя {user_id} (@{username}) [{keyword}]: {text}")
+                self.blocked_users.block(user_id, reason=keyword, ttl=SPAM_BAN_HOURS * 3600 or None)
+                SPAM_BLOCKS.inc(keyword)
 
                 try:
-                    await event.message.reply("❌ Спам обнаружен. Пользователь заблокирован.")
+                    await message.reply("❌ Спам обнаружен. Пользователь заблокирован.")
                 except Exception as e:
                     logger.error(f"Ошибка при блокировке спама: {e}")
                 return
 
             # Проверяем заблокированных пользователей
-            if user_id in self.blocked_users:
-                logger.warning(f"🚫 Заблокированный пользователь {user_id} пытается писать")
+            if await self.blocked_users.is_blocked(user_id):
+                logger.warning("🚫 Заблокированный пользователь %s пытается писать", user_id)
+                SPAM_BLOCKS.inc("blocked_user")
                 return
 
         return await handler(event, data)
 
 
-async def main():
-    """Главная функция запуска бота."""
-    bot = Bot(token=TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-    storage = MemoryStorage()
-    dp = Dispatcher(storage=storage)
+def create_bot(session: Optional[BaseSession] = None) -> Bot:
+    """Создать экземпляр бота (session - например, с другим адресом Bot API для бенчмарков)."""
+    session = session or create_session()
+    bot = Bot(token=TOKEN, session=session, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    # Все исходящие запросы проходят через лимиты Telegram
+    bot.session.middleware(send_scheduler)
+    # Замер времени запросов к API - внутри планировщика, без ожидания в очереди
+    bot.session.middleware(api_metrics)
+    return bot
+
+
+def create_dispatcher() -> Dispatcher:
+    """Создать диспетчер со всеми middleware и роутерами."""
+    storage = create_storage()
+    dp = Dispatcher(storage=storage, events_isolation=create_events_isolation(storage))
+
+    # Счетчик апдейтов для /profile <N> upd (пока профайлер выключен - почти бесплатно)
+    dp.update.outer_middleware(ProfilerMiddleware(profiler))
+
+    # Повторные нажатия кнопки отбрасываются, устаревшие отменяются. Раньше FSM (dp.fsm):
+    # с Redis FSM держит блокировку чата, и новое нажатие не могло бы отменить старое
+    dp.update.outer_middleware.unregister(dp.fsm)
+    dp.update.outer_middleware(CallbackDedupMiddleware())
+    # Апдейты одного чата - по очереди, разных чатов - параллельно (после отмены устаревших нажатий)
+    dp.update.outer_middleware(update_scheduler)
+    dp.update.outer_middleware(dp.fsm)
 
     # Добавляем антиспам middleware
     dp.message.middleware(AntiSpamMiddleware())
 
-    # Подключаем роутеры из разных модулей - ВАЖЕН ПОРЯДОК!
+    # Ограничиваем частоту запросов от одного пользователя
+    throttling = ThrottlingMiddleware(create_throttle_storage())
+    dp.message.middleware(throttling)
+    dp.callback_query.middleware(throttling)
+
+    # Время работы обработчиков - последним, чтобы замерять только сам обработчик
+    metrics = MetricsMiddleware()
+    dp.message.middleware(metrics)
+    dp.callback_query.middleware(metrics)
+
+    # Все экраны каталога собираются один раз при старте,
+    # дальше каталог сам следит за data/directions.json и пересобирает их
+    dp.startup.register(screen_cache.rebuild)
+    # Картинки сканируются и пережимаются один раз при старте
+    dp.startup.register(image_manifest.load)
+    dp.startup.register(catalog.start)
+    dp.shutdown.register(catalog.close)
+
+    # Блоклист загружается из БД при старте и сбрасывается в БД при остановке
+    dp.startup.register(blocklist.start)
+    dp.shutdown.register(blocklist.close)
+
+    # События воронки копятся в памяти и пишутся в БД пачками
+    dp.startup.register(analytics.start)
+    dp.shutdown.register(analytics.close)
+
+    # Получатели рассылок; идущая рассылка при остановке ставится на паузу
+    # (сначала рассылка, чтобы отписавшиеся успели попасть в users)
+    dp.startup.register(users.start)
+    dp.startup.register(broadcaster.start)
+    dp.shutdown.register(broadcaster.close)
+    dp.shutdown.register(users.close)
+
+    # Профили для экрана настроек: кэш в памяти, изменения пишутся в БД пачками
+    dp.startup.register(profiles.start)
+    dp.shutdown.register(profiles.close)
+
+    # Все callback'и - одна таблица префиксов (модули handlers регистрируют в нее
+    # обработчики при импорте), порядок подключения для них не важен
+    dp.include_router(callback_router)
+
+    # Подключаем роутеры сообщений из разных модулей - ВАЖЕН ПОРЯДОК!
+    dp.include_router(admin.router)
     dp.include_router(directions.router)
-    dp.include_router(courses.router)
     dp.include_router(earning_ways.router)
+    dp.include_router(settings.router)
     dp.include_router(common.router)
     dp.include_router(start.router)  # catch-all в самом конце!
 
+    return dp
+
+
+async def main():
+    """Главная функция запуска бота."""
+    bot = create_bot()
+    dp = create_dispatcher()
+
     # Создаем необходимые директории
     Path("data").mkdir(exist_ok=True)
-    Path("logs").mkdir(exist_ok=True)
     Path("images/main").mkdir(parents=True, exist_ok=True)
     Path("images/directions").mkdir(parents=True, exist_ok=True)
     Path("images/courses").mkdir(parents=True, exist_ok=True)
 
-    logger.info("Бот запускается...")
+    logger.info(f"Бот запускается в режиме {BOT_MODE}" + (f", обработчиков: {WORKERS}" if WORKERS else "") + "...")
     logger.info(f"Токен бота: {TOKEN[:10]}...{TOKEN[-10:]}")  # Логируем часть токена для проверки
 
+    # SIGTERM/SIGINT: прекратить прием апдейтов, дообработать принятые, сбросить буферы
+    lifecycle.install_signal_handlers()
+    metrics_runner = None
     try:
-        await dp.start_polling(bot)
+        if WORKERS > 0:
+            # Этот процесс только принимает апдейты, обрабатывают их WORKERS процессов
+            await run_workers(bot, dp)
+        elif BOT_MODE == "webhook":
+            await run_webhook(bot, dp)
+        else:
+            # В режиме polling метрики отдает отдельный сервер на SERVER_PORT
+            if METRICS_ENABLED:
+                metrics_runner = await start_metrics_server()
+            await run_polling(bot, dp)
     except Exception as e:
         logger.error(f"Ошибка при запуске бота: {e}")
         raise
+    finally:
+        if metrics_runner:
+            await metrics_runner.cleanup()
+        await dp.storage.close()
+        await bot.session.close()
+        await close_redis()
+        await close_pool()
 
 
 if __name__ == "__main__":
+    setup_logging()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -1,4 +1,6 @@
+import hashlib
 import os
+import socket
 from dotenv import load_dotenv
 
 # Загружаем переменные окружения
@@ -9,16 +11,155 @@ TOKEN = os.getenv("BOT_TOKEN", "7889941062:AAF90-F0PY5xQWb-CZBndU7JIVr53ArBj7U")
 
 # Настройки базы данных (для будущего использования)
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///bot.db")
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+
+# Блоклист антиспама: размер кэша в памяти, период записи в БД (секунды)
+# и срок автоматической блокировки за спам в часах (0 - навсегда)
+BLOCKLIST_CACHE_SIZE = int(os.getenv("BLOCKLIST_CACHE_SIZE", "100000"))
+BLOCKLIST_FLUSH_INTERVAL = float(os.getenv("BLOCKLIST_FLUSH_INTERVAL", "2"))
+SPAM_BAN_HOURS = int(os.getenv("SPAM_BAN_HOURS", "0"))
+
+# Bot API: BOT_API_URL пустой - api.telegram.org, иначе адрес своего сервера
+# telegram-bot-api (например, http://localhost:8081). BOT_API_LOCAL - сервер
+# запущен с --local: картинки передаются ему путем к файлу, а не загрузкой
+BOT_API_URL = os.getenv("BOT_API_URL", "")
+BOT_API_LOCAL = os.getenv("BOT_API_LOCAL", "False").lower() in ("true", "1", "yes")
+
+# HTTP-сессия к Bot API: размер пула соединений, сколько секунд держать
+# простаивающее keep-alive соединение, время жизни кэша DNS, таймауты
+# на установку соединения и на весь запрос (секунды)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "100"))
+HTTP_KEEPALIVE = float(os.getenv("HTTP_KEEPALIVE", "60"))
+HTTP_DNS_TTL = int(os.getenv("HTTP_DNS_TTL", "600"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "60"))
+
+# Настройки Redis (общий пул соединений)
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_KEY_PREFIX = os.getenv("REDIS_KEY_PREFIX", "freelance_bot")
+
+# Хранилище FSM: memory или redis; TTL в секундах (0 - без ограничения)
+FSM_STORAGE = os.getenv("FSM_STORAGE", "memory").lower()
+FSM_STATE_TTL = int(os.getenv("FSM_STATE_TTL", str(7 * 24 * 3600)))
+FSM_DATA_TTL = int(os.getenv("FSM_DATA_TTL", str(24 * 3600)))
+
+# Аналитика воронки (только с PostgreSQL): размер буфера событий в памяти,
+# период записи в БД (секунды) и размер пакета, при котором запись идет раньше
+ANALYTICS_BUFFER_SIZE = int(os.getenv("ANALYTICS_BUFFER_SIZE", "50000"))
+ANALYTICS_FLUSH_INTERVAL = float(os.getenv("ANALYTICS_FLUSH_INTERVAL", "5"))
+ANALYTICS_BATCH_SIZE = int(os.getenv("ANALYTICS_BATCH_SIZE", "1000"))
+
+# Пользователи для рассылок: период записи изменений в БД (секунды)
+USERS_FLUSH_INTERVAL = float(os.getenv("USERS_FLUSH_INTERVAL", "5"))
+
+# Профили пользователей (экран настроек): сколько держать в кэше в памяти и
+# период записи изменений в БД (секунды) - переключения за это время дают одну запись
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+PROFILE_FLUSH_INTERVAL = float(os.getenv("PROFILE_FLUSH_INTERVAL", "1"))
+
+# Рассылки: сколько получателей читать из БД за раз (после каждой страницы
+# сохраняется контрольная точка) и сколько сообщений держать в полете
+BROADCAST_BATCH_SIZE = int(os.getenv("BROADCAST_BATCH_SIZE", "500"))
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "30"))
+
+# Ограничение частоты запросов (token bucket на пользователя и обработчик):
+# скорость пополнения в токенах/сек, размер ведра, хранилище memory или redis
+THROTTLE_RATE = float(os.getenv("THROTTLE_RATE", "1"))
+THROTTLE_BURST = int(os.getenv("THROTTLE_BURST", "5"))
+THROTTLE_STORAGE = os.getenv("THROTTLE_STORAGE", "memory").lower()
+THROTTLE_MAX_KEYS = int(os.getenv("THROTTLE_MAX_KEYS", "100000"))
+THROTTLE_NOTICE_COOLDOWN = float(os.getenv("THROTTLE_NOTICE_COOLDOWN", "10"))
+
+# Повторные нажатия одной и той же кнопки сообщения: пока обработчик работает и
+# CALLBACK_DEDUP_WINDOW секунд после - отбрасываются. CALLBACK_MAX_KEYS - сколько
+# сообщений с кнопками помнить
+CALLBACK_DEDUP_WINDOW = float(os.getenv("CALLBACK_DEDUP_WINDOW", "1"))
+CALLBACK_MAX_KEYS = int(os.getenv("CALLBACK_MAX_KEYS", "10000"))
+
+# Исходящие запросы к Telegram: общий лимит и лимит на чат (сообщений в секунду,
+# 0 - без ограничения), сколько раз повторять запрос после flood control или ошибки
+# сети. Отправка сообщений после таймаута не повторяется, чтобы не продублировать их
+SEND_GLOBAL_RATE = float(os.getenv("SEND_GLOBAL_RATE", "30"))
+SEND_GLOBAL_BURST = int(os.getenv("SEND_GLOBAL_BURST", "30"))
+SEND_CHAT_RATE = float(os.getenv("SEND_CHAT_RATE", "1"))
+SEND_CHAT_BURST = int(os.getenv("SEND_CHAT_BURST", "3"))
+SEND_MAX_RETRIES = int(os.getenv("SEND_MAX_RETRIES", "3"))
+
+# Как часто проверять изменения data/directions.json (секунды, 0 - не следить)
+CATALOG_POLL_INTERVAL = float(os.getenv("CATALOG_POLL_INTERVAL", "5"))
+
+# Картинки: при старте слишком большие (больше IMAGE_MAX_BYTES или длиннее
+# IMAGE_MAX_SIDE пикселей по большей стороне) пережимаются в IMAGE_VARIANTS_DIR.
+# 1280 - максимальный размер, до которого Telegram все равно уменьшает фото
+IMAGE_MAX_SIDE = int(os.getenv("IMAGE_MAX_SIDE", "1280"))
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(300 * 1024)))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))
+IMAGE_VARIANTS_DIR = os.getenv("IMAGE_VARIANTS_DIR", "data/image_variants")
 
 # Настройки веб-хука (для продакшена)
 WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "https://your-domain.com")
 WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
 WEBHOOK_PATH = f"/webhook/{TOKEN.split(':')[0]}"
+WEBHOOK_URL = f"{WEBHOOK_HOST.rstrip('/')}{WEBHOOK_PATH}"
+# Секрет, который Telegram присылает в заголовке X-Telegram-Bot-Api-Secret-Token
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", hashlib.sha256(TOKEN.encode()).hexdigest()[:32])
+# Сколько соединений Telegram открывает к вебхуку (max_connections, не больше 100)
+# и сколько необработанных апдейтов может накопиться, дальше - 503
+WEBHOOK_MAX_IN_FLIGHT = int(os.getenv("WEBHOOK_MAX_IN_FLIGHT", "50"))
+WEBHOOK_MAX_PENDING = int(os.getenv("WEBHOOK_MAX_PENDING", "1000"))
+
+# Обработка апдейтов (polling и webhook): апдейты одного чата - строго по очереди,
+# разных чатов - параллельно, но не больше UPDATE_CONCURRENCY одновременно
+UPDATE_CONCURRENCY = int(os.getenv("UPDATE_CONCURRENCY", str(WEBHOOK_MAX_IN_FLIGHT)))
+
+# Режим получения апдейтов: polling или webhook
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+
+# Остановка (SIGTERM): сколько секунд дообрабатывать принятые апдейты, прежде чем
+# отменить оставшиеся и сбросить буферы в БД. Должно быть меньше TimeoutStopSec
+# в freelance-bot.service и stop_grace_period в docker-compose.yml
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "25"))
+# Последний обработанный update_id (режим polling): после перезапуска продолжаем с него
+UPDATE_OFFSET_FILE = os.getenv("UPDATE_OFFSET_FILE", "data/update_offset.json")
+UPDATE_OFFSET_FLUSH_INTERVAL = float(os.getenv("UPDATE_OFFSET_FLUSH_INTERVAL", "1"))
+# Режим webhook: новый экземпляр слушает тот же порт, пока старый дорабатывает (SO_REUSEPORT)
+WEBHOOK_REUSE_PORT = os.getenv(
+    "WEBHOOK_REUSE_PORT", str(hasattr(socket, "SO_REUSEPORT"))
+).lower() in ("true", "1", "yes")
+
+# Многопроцессный режим: WORKERS > 0 - один процесс принимает апдейты и раздает их
+# WORKERS процессам-обработчикам по chat_id. Очередь на процесс ограничена
+# WORKER_QUEUE_SIZE; процесс, не обновлявший heartbeat WORKER_HEARTBEAT_TIMEOUT
+# секунд, перезапускается
+WORKERS = int(os.getenv("WORKERS", "0"))
+WORKER_QUEUE_SIZE = int(os.getenv("WORKER_QUEUE_SIZE", "1000"))
+WORKER_HEARTBEAT_INTERVAL = float(os.getenv("WORKER_HEARTBEAT_INTERVAL", "2"))
+WORKER_HEARTBEAT_TIMEOUT = float(os.getenv("WORKER_HEARTBEAT_TIMEOUT", "30"))
+# Рассылать блокировки антиспама другим процессам через Redis (по умолчанию - при WORKERS > 0)
+BLOCKLIST_SYNC = os.getenv("BLOCKLIST_SYNC", str(WORKERS > 0)).lower() in ("true", "1", "yes")
 
 # Настройки сервера
 SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
 SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
 
+# Метрики Prometheus: отдаются на SERVER_PORT по пути METRICS_PATH
+# (в режиме webhook - тем же сервером, что принимает апдейты)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() in ("true", "1", "yes")
+METRICS_PATH = os.getenv("METRICS_PATH", "/metrics")
+
+# Логирование: уровень, формат (text или json), ротация по размеру (size) или
+# раз в сутки (time), доля INFO-записей для шумных логгеров ("логгер=доля,...")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FILE = os.getenv("LOG_FILE", "logs/bot.log")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_ROTATION = os.getenv("LOG_ROTATION", "size").lower()
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "aiogram.event=0.1")
+
 # Админы бота
 ADMIN_IDS = list(map(int, os.getenv("ADMIN_IDS", "").split(","))) if os.getenv("ADMIN_IDS") else []
 
@@ -1,9 +1,11 @@
-from . import common, courses, directions, earning_ways, start
+from . import admin, common, courses, directions, earning_ways, settings, start
 
 __all__ = [
+    'admin',
     'start',
     'directions',
     'courses',
     'earning_ways',
+    'settings',
     'common',
 ]
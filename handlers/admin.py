@@ -0,0 +1,266 @@
+import asyncio
+import html
+import logging
+import math
+import time
+from typing import Awaitable, Optional, Set
+
+from aiogram import F, Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import BufferedInputFile, Message
+
+from config import ADMIN_IDS
+from middlewares.update_scheduler import update_scheduler
+from utils.analytics import analytics
+from utils.blocklist import blocklist
+from utils.broadcast import CANCELLED, PAUSED, broadcaster
+from utils.db import is_postgres_configured
+from utils.profiler import MAX_PROFILE_SECONDS, memory_diff, profiler
+from utils.send_scheduler import send_scheduler
+from utils.users import users
+
+logger = logging.getLogger(__name__)
+
+router = Router()
+# Все команды этого роутера доступны только админам из ADMIN_IDS
+router.message.filter(F.from_user.id.in_(ADMIN_IDS))
+
+# Отчеты /profile и /memdiff собираются в фоне: обработчик не держит слот
+# update_scheduler и следующие апдейты чата админа все время замера
+_report_tasks: Set[asyncio.Task] = set()
+_memdiff_task: Optional[asyncio.Task] = None
+
+
+def _log_report_error(task: asyncio.Task) -> None:
+    _report_tasks.discard(task)
+    if not task.cancelled() and task.exception():
+        logger.error(f"Ошибка при сборе отчета: {task.exception()}")
+
+
+def run_report(report: Awaitable[None]) -> asyncio.Task:
+    """Запустить сбор отчета в фоне, не дожидаясь его в обработчике."""
+    task = asyncio.create_task(report)
+    _report_tasks.add(task)
+    task.add_done_callback(_log_report_error)
+    return task
+
+
+def parse_user_id(command: CommandObject) -> int:
+    """Достать ID пользователя из аргументов команды."""
+    args = (command.args or "").split()
+    if not args or not args[0].lstrip('-').isdigit():
+        raise ValueError
+    return int(args[0])
+
+
+@router.message(Command("ban"))
+async def cmd_ban(message: Message, command: CommandObject):
+    """Заблокировать пользователя: /ban <user_id> [часы]."""
+    try:
+        user_id = parse_user_id(command)
+        args = command.args.split()
+        hours = float(args[1]) if len(args) > 1 else 0
+        if not math.isfinite(hours) or hours < 0:
+            raise ValueError
+    except ValueError:
+        await message.answer("Использование: /ban <user_id> [часы]")
+        return
+
+    blocklist.block(user_id, reason=f"admin {message.from_user.id}", ttl=hours * 3600 or None)
+    period = f"на {hours:g} ч." if hours else "навсегда"
+    await message.answer(f"🚫 Пользователь <code>{user_id}</code> заблокирован {period}")
+
+
+@router.message(Command("unban"))
+async def cmd_unban(message: Message, command: CommandObject):
+    """Разблокировать пользователя: /unban <user_id>."""
+    try:
+        user_id = parse_user_id(command)
+    except ValueError:
+        await message.answer("Использование: /unban <user_id>")
+        return
+
+    if blocklist.unblock(user_id):
+        await message.answer(f"✅ Пользователь <code>{user_id}</code> разблокирован")
+    else:
+        await message.answer(f"ℹ️ Пользователь <code>{user_id}</code> не был заблокирован")
+
+
+@router.message(Command("blocked"))
+async def cmd_blocked(message: Message):
+    """Показать количество активных блокировок."""
+    await message.answer(f"🚫 Активных блокировок в кэше: {blocklist.blocked_count()}")
+
+
+@router.message(Command("queues"))
+async def cmd_queues(message: Message):
+    """Показать состояние очередей входящих апдейтов и исходящих запросов."""
+    updates = update_scheduler.stats()
+    text = "📥 <b>Очереди апдейтов</b>\n\n"
+    text += f"• Обрабатывается: {updates['running']} из {update_scheduler.max_concurrency}\n"
+    text += f"• Ждут очереди: {updates['waiting']}\n"
+    text += f"• Чатов с апдейтами: {updates['chats']}, самая длинная очередь: {updates['longest']}\n\n"
+    stats = send_scheduler.stats()
+    text += "📤 <b>Очереди отправки</b>\n\n"
+    text += f"• Общая очередь: {stats['global_queue']}\n"
+    text += f"• Чатов в ожидании: {stats['chat_queues']} (всего запросов: {stats['chat_queue_total']})\n"
+    text += f"• Самая длинная очередь чата: {stats['chat_queue_max']}\n"
+    text += f"• Flood control: {stats['retry_after']}, повторов: {stats['retries']}"
+    await message.answer(text)
+
+
+@router.message(Command("profile"))
+async def cmd_profile(message: Message, command: CommandObject):
+    """Сэмплирующий профайлер: /profile [секунды] или /profile <N> upd (N апдейтов)."""
+    args = (command.args or "").split()
+    try:
+        value = float(args[0]) if args else 10
+        by_updates = len(args) > 1 and args[1].lower() in ("upd", "updates", "апд")
+        if value <= 0:
+            raise ValueError
+    except ValueError:
+        await message.answer("Использование: /profile [секунды] или /profile <N> upd")
+        return
+
+    try:
+        if by_updates:
+            profiler.start(updates=int(value))
+        else:
+            profiler.start(seconds=value)
+    except RuntimeError:
+        await message.answer("⏳ Профайлер уже запущен")
+        return
+
+    target = f"{int(value)} апдейтов (не дольше {MAX_PROFILE_SECONDS} с)" if by_updates else f"{value:g} с"
+    await message.answer(f"🔬 Профилирование запущено: {target}")
+    run_report(send_profile(message))
+
+
+async def send_profile(message: Message):
+    """Дождаться конца профилирования и отправить отчет."""
+    result = await profiler.wait()
+
+    text = "🔬 <b>Профиль</b>\n\n"
+    text += f"• Длительность: {result.duration:.1f} с, сэмплов: {result.samples}, апдейтов: {result.updates}\n\n"
+    for title, share in result.summary():
+        text += f"{html.escape(title)}: {share:.1%}\n"
+    await message.answer(text)
+    if result.samples:
+        await message.answer_document(
+            BufferedInputFile(result.collapsed().encode(), filename=f"profile-{int(time.time())}.folded"),
+            caption="Стеки для flamegraph.pl / speedscope.app",
+        )
+
+
+@router.message(Command("memdiff"))
+async def cmd_memdiff(message: Message, command: CommandObject):
+    """Разница снимков tracemalloc: /memdiff [секунды]."""
+    try:
+        seconds = float(command.args) if command.args else 30
+    except ValueError:
+        await message.answer("Использование: /memdiff [секунды]")
+        return
+
+    global _memdiff_task
+    if _memdiff_task and not _memdiff_task.done():
+        await message.answer("⏳ Замер памяти уже идет")
+        return
+
+    await message.answer(f"🧠 Снимаю память, сравнение через {seconds:g} с...")
+    _memdiff_task = run_report(send_memdiff(message, seconds))
+
+
+async def send_memdiff(message: Message, seconds: float):
+    """Снять два снимка памяти с паузой seconds и отправить разницу."""
+    lines = await memory_diff(seconds)
+
+    text = "🧠 <b>Рост памяти</b>\n\n" + "\n".join(html.escape(line) for line in lines[:11])
+    await message.answer(text)
+    await message.answer_document(
+        BufferedInputFile("\n".join(lines).encode(), filename=f"memdiff-{int(time.time())}.txt"),
+    )
+
+
+@router.message(Command("funnel"))
+async def cmd_funnel(message: Message, command: CommandObject):
+    """Воронка направления -> курсы -> тарифы: /funnel [дней]."""
+    if not is_postgres_configured():
+        await message.answer("ℹ️ Аналитика работает только с PostgreSQL (DATABASE_URL)")
+        return
+    try:
+        days = int(command.args) if command.args else 7
+    except ValueError:
+        await message.answer("Использование: /funnel [дней]")
+        return
+
+    total, by_target = await analytics.funnel(days)
+    viewed = total["viewed"] or 1
+    text = f"📊 <b>Воронка за {days} дн.</b>\n\n"
+    text += f"• Смотрели направления: {total['viewed']}\n"
+    text += f"• Открыли курсы: {total['courses']} ({total['courses'] / viewed:.0%})\n"
+    text += f"• Дошли до тарифов: {total['tariffs']} ({total['tariffs'] / viewed:.0%})\n"
+    text += f"• Всего видели тарифы: {total['tariffs_total']}\n\n"
+    for row in by_target:
+        text += (f"<code>{html.escape(row['target'])}</code>: "
+                 f"{row['viewed']} → {row['courses']} → {row['tariffs']}\n")
+    if analytics.dropped:
+        text += f"\n⚠️ Отброшено событий (переполнение буфера): {analytics.dropped}"
+    await message.answer(text)
+
+
+@router.message(Command("broadcast"))
+async def cmd_broadcast(message: Message, command: CommandObject):
+    """Рассылка всем пользователям: /broadcast <текст> или ответом на сообщение, которое нужно разослать."""
+    source = message.reply_to_message
+    if not command.args and source is None:
+        await message.answer("Использование: /broadcast <текст> или ответ /broadcast на сообщение для рассылки")
+        return
+
+    try:
+        if source is not None:
+            state = await broadcaster.begin(
+                message.bot, message.from_user.id, from_chat_id=source.chat.id, message_id=source.message_id
+            )
+        else:
+            state = await broadcaster.begin(message.bot, message.from_user.id, text=command.args)
+    except RuntimeError:
+        await message.answer("⏳ Рассылка уже идет: /broadcast_status")
+        return
+    await message.answer(f"📣 Рассылка #{state.id} запущена, получателей: {await users.count_active()}")
+
+
+@router.message(Command("broadcast_status"))
+async def cmd_broadcast_status(message: Message):
+    """Прогресс текущей или последней рассылки."""
+    state = broadcaster.current
+    if state is None:
+        await message.answer("ℹ️ Рассылок еще не было")
+        return
+    await message.answer(f"📣 Рассылка {state.summary()}, дошли до user_id {state.last_user_id}")
+
+
+@router.message(Command("broadcast_stop", "broadcast_cancel"))
+async def cmd_broadcast_stop(message: Message, command: CommandObject):
+    """Приостановить рассылку (/broadcast_stop) или отменить ее совсем (/broadcast_cancel)."""
+    status = CANCELLED if command.command == "broadcast_cancel" else PAUSED
+    was_running = broadcaster.running
+    state = await broadcaster.stop(status)
+    if state is None:
+        await message.answer("ℹ️ Сейчас рассылка не идет")
+    elif not was_running:
+        # Итог идущей рассылки бот пришлет сам
+        await message.answer(f"📣 Рассылка {state.summary()}")
+
+
+@router.message(Command("broadcast_resume"))
+async def cmd_broadcast_resume(message: Message):
+    """Продолжить прерванную рассылку с сохраненной контрольной точки."""
+    try:
+        state = await broadcaster.resume(message.bot)
+    except RuntimeError:
+        await message.answer("⏳ Рассылка уже идет: /broadcast_status")
+        return
+    if state is None:
+        await message.answer("ℹ️ Незавершенных рассылок нет")
+        return
+    await message.answer(f"📣 Рассылка #{state.id} продолжена после user_id {state.last_user_id}")
@@ -2,24 +2,14 @@ from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 
-from keyboards import get_main_menu
+from keyboards.callbacks import MainMenuCallback, PageCallback
+from utils.callback_routes import callback_router
+from utils.navigation import navigate
+from utils.screens import screen_cache
 
 router = Router()
 
 
-@router.message(F.text == "⚙️ Настройки")
-async def show_settings(message: Message):
-    """Показать настройки бота."""
-    await message.answer(
-        "⚙️ <b>Настройки</b>\n\n"
-        "🎯 Выбор интересующих направлений\n"
-        "📊 Уровень опыта\n"
-        "🔔 Уведомления\n"
-        "👤 Профиль\n\n"
-        "⚠️ <i>Функционал настроек будет добавлен в следующих версиях</i>"
-    )
-
-
 @router.message(F.text == "ℹ️ О боте")
 async def show_about(message: Message):
     """Показать информацию о боте."""
@@ -37,14 +27,22 @@ async def show_about(message: Message):
     await message.answer(text)
 
 
-@router.callback_query(F.data == "main_menu")
+@callback_router.callback_query(MainMenuCallback.filter())
 async def back_to_main_menu(callback: CallbackQuery, state: FSMContext):
     """Вернуться в главное меню."""
     await state.clear()
-    await callback.message.delete()
-    await callback.message.answer(
-        "🏠 <b>Главное меню</b>\n\n"
-        "Выбери интересующий раздел:",
-        reply_markup=get_main_menu()
-    )
+    # Reply-клавиатура главного меню уже на экране, достаточно заменить сообщение
+    await navigate(callback, screen_cache.get("main_menu"))
+    await callback.answer()
+
+
+@callback_router.callback_query(PageCallback.filter())
+async def turn_page(callback: CallbackQuery, callback_data: PageCallback):
+    """Показать другую страницу длинного экрана (страницы уже готовы в screen_cache)."""
+    screen = screen_cache.get(callback_data.screen)
+    if not screen:
+        await callback.answer("Экран устарел, открой раздел заново")
+        return
+
+    await navigate(callback, screen.page(callback_data.page, callback_data.caption), keep_photo=True)
     await callback.answer()
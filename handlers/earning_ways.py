@@ -2,8 +2,8 @@ from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 
-from keyboards import get_earning_ways_keyboard
 from states import UserStates
+from utils.screens import screen_cache
 
 router = Router()
 
@@ -12,7 +12,5 @@ router = Router()
 async def show_earning_ways(message: Message, state: FSMContext):
     """Показать способы заработка."""
     await state.set_state(UserStates.viewing_earning_ways)
-    text = "💰 <b>Способы заработка</b>\n\n"
-    text += "Выбери, что тебя интересует:"
-
-    await message.answer(text, reply_markup=get_earning_ways_keyboard())
+    screen = screen_cache.get("earning_ways")
+    await message.answer(screen.text, reply_markup=screen.reply_markup)
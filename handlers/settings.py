@@ -0,0 +1,114 @@
+import asyncio
+import html
+
+from aiogram import F, Router
+from aiogram.fsm.context import FSMContext
+from aiogram.types import CallbackQuery, Message
+
+from keyboards import get_interests_keyboard, get_settings_keyboard
+from keyboards.callbacks import (
+    ExperienceCallback,
+    InterestsCallback,
+    InterestToggleCallback,
+    NotificationsCallback,
+    SettingsCallback,
+)
+from states import UserStates
+from utils.callback_routes import callback_router
+from utils.data_loader import catalog
+from utils.profiles import EXPERIENCE_LEVELS, Profile, profiles
+
+router = Router()
+
+EXPERIENCE_ORDER = tuple(EXPERIENCE_LEVELS)
+
+
+def settings_screen(profile: Profile):
+    """Текст и клавиатура экрана настроек для профиля."""
+    snapshot = catalog.snapshot
+    interests = [
+        f"{snapshot.by_id[dir_id]['emoji']} {snapshot.by_id[dir_id]['title']}"
+        for dir_id in profile.interests if dir_id in snapshot.by_id
+    ]
+    name = html.escape(profile.first_name or "—")
+    if profile.username:
+        name += f" (@{html.escape(profile.username)})"
+    experience = EXPERIENCE_LEVELS.get(profile.experience, EXPERIENCE_LEVELS[""])
+
+    text = "⚙️ <b>Настройки</b>\n\n"
+    text += f"👤 <b>Профиль:</b> {name}\n"
+    text += f"🎯 <b>Интересы:</b> {html.escape(', '.join(interests)) if interests else 'не выбраны'}\n"
+    text += f"📊 <b>Опыт:</b> {experience}\n"
+    text += f"🔔 <b>Уведомления:</b> {'включены' if profile.notifications else 'выключены'}\n\n"
+    text += "<i>Нажимай на кнопки ниже, чтобы изменить настройки</i>"
+    return text, get_settings_keyboard(experience, profile.notifications)
+
+
+@router.message(F.text == "⚙️ Настройки")
+async def show_settings(message: Message, state: FSMContext):
+    """Показать настройки и профиль пользователя."""
+    await state.set_state(UserStates.settings)
+    profile = await profiles.get(message.from_user.id)
+    text, keyboard = settings_screen(profile)
+    await message.answer(text, reply_markup=keyboard)
+
+
+@callback_router.callback_query(SettingsCallback.filter())
+async def back_to_settings(callback: CallbackQuery, state: FSMContext):
+    """Вернуться к экрану настроек."""
+    await state.set_state(UserStates.settings)
+    profile = await profiles.get(callback.from_user.id)
+    text, keyboard = settings_screen(profile)
+    await callback.message.edit_text(text, reply_markup=keyboard)
+    await callback.answer()
+
+
+# Переключатели: повторное нажатие - новое изменение, CallbackDedupMiddleware его не отбрасывает
+@callback_router.callback_query(ExperienceCallback.filter(), flags={"dedup": False})
+async def switch_experience(callback: CallbackQuery):
+    """Переключить уровень опыта на следующий."""
+    profile = await profiles.get(callback.from_user.id)
+    index = EXPERIENCE_ORDER.index(profile.experience) if profile.experience in EXPERIENCE_ORDER else 0
+    # Изменение доводим до конца, даже если обработчик отменит более новое нажатие
+    profile = await asyncio.shield(profiles.update(
+        callback.from_user.id, experience=EXPERIENCE_ORDER[(index + 1) % len(EXPERIENCE_ORDER)]
+    ))
+    text, keyboard = settings_screen(profile)
+    await callback.message.edit_text(text, reply_markup=keyboard)
+    await callback.answer()
+
+
+@callback_router.callback_query(NotificationsCallback.filter(), flags={"dedup": False})
+async def switch_notifications(callback: CallbackQuery):
+    """Включить или выключить уведомления (рассылки)."""
+    profile = await profiles.get(callback.from_user.id)
+    profile = await asyncio.shield(profiles.update(callback.from_user.id, notifications=not profile.notifications))
+    text, keyboard = settings_screen(profile)
+    await callback.message.edit_text(text, reply_markup=keyboard)
+    await callback.answer("🔔 Уведомления включены" if profile.notifications else "🔕 Уведомления выключены")
+
+
+@callback_router.callback_query(InterestsCallback.filter())
+async def show_interests(callback: CallbackQuery):
+    """Экран выбора интересующих направлений."""
+    profile = await profiles.get(callback.from_user.id)
+    await callback.message.edit_text(
+        "🎯 <b>Интересующие направления</b>\n\nОтметь направления, которые тебе интересны:",
+        reply_markup=get_interests_keyboard(catalog.snapshot.directions, profile.interests)
+    )
+    await callback.answer()
+
+
+@callback_router.callback_query(InterestToggleCallback.filter(), flags={"dedup": False})
+async def toggle_interest(callback: CallbackQuery, callback_data: InterestToggleCallback):
+    """Отметить направление интересным или снять отметку."""
+    dir_id = callback_data.dir_id
+    if dir_id not in catalog.snapshot.by_id:
+        await callback.answer("Направление не найдено")
+        return
+
+    profile = await asyncio.shield(profiles.toggle_interest(callback.from_user.id, dir_id))
+    await callback.message.edit_reply_markup(
+        reply_markup=get_interests_keyboard(catalog.snapshot.directions, profile.interests)
+    )
+    await callback.answer()
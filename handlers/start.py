@@ -5,6 +5,10 @@ from aiogram.types import Message
 
 from keyboards import get_main_menu
 from utils.image_handler import get_start_image
+from utils.media_cache import forget_photo, remember_photo
+from utils.metrics import HANDLER_EXCEPTIONS, IMAGE_FALLBACKS
+from utils.profiles import profiles
+from utils.users import users
 
 router = Router()
 
@@ -13,25 +17,34 @@ router = Router()
 async def cmd_start(message: Message, state: FSMContext):
     """Обработчик команды /start с картинкой."""
     await state.clear()
+    # Все, кто нажимал /start, получают рассылки
+    users.touch(message.from_user.id)
+    profiles.touch(message.from_user.id, message.from_user.username, message.from_user.first_name)
 
     text = ("🎯 <b>Добро пожаловать в мир фриланса!</b>\n\n"
             "Я помогу тебе найти способы заработка в интернете и на фрилансе! "
             "Выбери интересующий раздел из меню ниже 👇")
 
+    photo = None
     try:
-        # Пытаемся отправить с картинкой
+        # Пытаемся отправить с картинкой (из кэша file_id, если она уже загружалась)
         photo = get_start_image()
         if photo:
-            await message.answer_photo(
+            sent = await message.answer_photo(
                 photo=photo,
                 caption=text,
                 reply_markup=get_main_menu()
             )
+            remember_photo(photo, sent)
         else:
             # Если картинки нет - отправляем обычным текстом
+            IMAGE_FALLBACKS.inc("start", "missing")
             await message.answer(text, reply_markup=get_main_menu())
     except Exception as e:
         # При любой ошибке - отправляем текстом
+        HANDLER_EXCEPTIONS.inc("start", type(e).__name__)
+        IMAGE_FALLBACKS.inc("start", "error")
+        forget_photo(photo)
         await message.answer(text, reply_markup=get_main_menu())
 
 
@@ -4,7 +4,10 @@ from .inline import (
     get_direction_detail_keyboard,
     get_directions_keyboard,
     get_earning_ways_keyboard,
+    get_interests_keyboard,
+    get_settings_keyboard,
     get_tariffs_keyboard,
+    with_page_buttons,
 )
 from .reply import get_main_menu
 
@@ -16,4 +19,7 @@ __all__ = [
     'get_tariffs_keyboard',
     'get_back_to_direction_keyboard',
     'get_back_to_courses_keyboard',
+    'get_settings_keyboard',
+    'get_interests_keyboard',
+    'with_page_buttons',
 ]
@@ -0,0 +1,82 @@
+"""Callback data inline-кнопок.
+
+Префиксы короткие: callback data ограничены 64 байтами, и чем они короче,
+тем быстрее разбор. legacy - callback data старого формата, которые еще
+остались на кнопках в уже отправленных сообщениях: "<префикс>_" - префикс
+со значением первого поля после него, без "_" в конце - точное значение.
+"""
+from typing import ClassVar, Tuple
+
+from aiogram.filters.callback_data import CallbackData
+
+
+class MainMenuCallback(CallbackData, prefix="m"):
+    legacy: ClassVar[Tuple[str, ...]] = ("main_menu",)
+
+
+class DirectionsCallback(CallbackData, prefix="dl"):
+    legacy: ClassVar[Tuple[str, ...]] = ("directions",)
+
+
+class DirectionCallback(CallbackData, prefix="d"):
+    legacy: ClassVar[Tuple[str, ...]] = ("dir_",)
+    dir_id: str
+
+
+class CoursesCallback(CallbackData, prefix="c"):
+    legacy: ClassVar[Tuple[str, ...]] = ("courses_",)
+    dir_id: str
+
+
+class TariffsCallback(CallbackData, prefix="b"):
+    legacy: ClassVar[Tuple[str, ...]] = ("buy_",)
+    dir_id: str
+
+
+class TrainingCallback(CallbackData, prefix="tr"):
+    legacy: ClassVar[Tuple[str, ...]] = ("earning_training",)
+
+
+class DesignerCallback(CallbackData, prefix="dz"):
+    legacy: ClassVar[Tuple[str, ...]] = ("designer_",)
+
+
+class ManagerCallback(CallbackData, prefix="mg"):
+    legacy: ClassVar[Tuple[str, ...]] = ("manager_",)
+
+
+class CuratorDetailsCallback(CallbackData, prefix="cu"):
+    legacy: ClassVar[Tuple[str, ...]] = ("curator_details_",)
+
+
+class TasksDetailsCallback(CallbackData, prefix="t"):
+    legacy: ClassVar[Tuple[str, ...]] = ("tasks_details_",)
+    dir_id: str
+
+
+class SettingsCallback(CallbackData, prefix="s"):
+    legacy: ClassVar[Tuple[str, ...]] = ("settings",)
+
+
+class ExperienceCallback(CallbackData, prefix="se"):
+    legacy: ClassVar[Tuple[str, ...]] = ("set_exp",)
+
+
+class NotificationsCallback(CallbackData, prefix="sn"):
+    legacy: ClassVar[Tuple[str, ...]] = ("set_notify",)
+
+
+class InterestsCallback(CallbackData, prefix="si"):
+    legacy: ClassVar[Tuple[str, ...]] = ("set_interests",)
+
+
+class InterestToggleCallback(CallbackData, prefix="i"):
+    legacy: ClassVar[Tuple[str, ...]] = ("set_int_",)
+    dir_id: str
+
+
+class PageCallback(CallbackData, prefix="p", sep="|"):
+    # id экрана в screen_cache содержит ":", поэтому другой разделитель
+    caption: bool
+    page: int
+    screen: str
@@ -1,4 +1,4 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
@@ -10,6 +10,25 @@ from constants import (
     TARIFFS,
 )
 
+from .callbacks import (
+    CoursesCallback,
+    CuratorDetailsCallback,
+    DesignerCallback,
+    DirectionCallback,
+    DirectionsCallback,
+    ExperienceCallback,
+    InterestsCallback,
+    InterestToggleCallback,
+    MainMenuCallback,
+    ManagerCallback,
+    NotificationsCallback,
+    PageCallback,
+    SettingsCallback,
+    TariffsCallback,
+    TasksDetailsCallback,
+    TrainingCallback,
+)
+
 
 def get_directions_keyboard(directions: List[Dict[str, Any]]) -> InlineKeyboardMarkup:
     """Клавиатура с направлениями для заработка."""
@@ -17,9 +36,9 @@ def get_directions_keyboard(directions: List[Dict[str, Any]]) -> InlineKeyboardM
     for direction in directions:
         buttons.append([InlineKeyboardButton(
             text=f"{direction['emoji']} {direction['title']}",
-            callback_data=f"dir_{direction['id']}"
+            callback_data=DirectionCallback(dir_id=direction['id']).pack()
         )])
-    buttons.append([InlineKeyboardButton(text="🏠 В главное меню", callback_data="main_menu")])
+    buttons.append([InlineKeyboardButton(text="🏠 В главное меню", callback_data=MainMenuCallback().pack())])
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
@@ -29,20 +48,20 @@ def get_direction_detail_keyboard(dir_id: str) -> InlineKeyboardMarkup:
 
     # Специальные кнопки для разных направлений
     if dir_id == "online_specialist":
-        buttons.append([InlineKeyboardButton(text="📚 Посмотреть курсы", callback_data=f"courses_{dir_id}")])
+        buttons.append([InlineKeyboardButton(text="📚 Посмотреть курсы", callback_data=CoursesCallback(dir_id=dir_id).pack())])
     elif dir_id == "marketplace_work":
-        buttons.append([InlineKeyboardButton(text="🎨 Дизайнер инфографики", callback_data=f"designer_{dir_id}")])
-        buttons.append([InlineKeyboardButton(text="👨‍💼 Менеджер маркетплейсов", callback_data=f"manager_{dir_id}")])
+        buttons.append([InlineKeyboardButton(text="🎨 Дизайнер инфографики", callback_data=DesignerCallback().pack())])
+        buttons.append([InlineKeyboardButton(text="👨‍💼 Менеджер маркетплейсов", callback_data=ManagerCallback().pack())])
     elif dir_id == "curator_online_school":
-        buttons.append([InlineKeyboardButton(text="📚 Подробнее о работе", callback_data=f"curator_details_{dir_id}")])
+        buttons.append([InlineKeyboardButton(text="📚 Подробнее о работе", callback_data=CuratorDetailsCallback().pack())])
     elif dir_id == "task_execution":
-        buttons.append([InlineKeyboardButton(text="📋 Виды заданий", callback_data=f"tasks_details_{dir_id}")])
+        buttons.append([InlineKeyboardButton(text="📋 Виды заданий", callback_data=TasksDetailsCallback(dir_id=dir_id).pack())])
 
     # Общие кнопки для всех направлений - ВАЖНО: добавляем ссылку на консультацию!
-    buttons.append([InlineKeyboardButton(text=BUTTON_BUY_COURSE, callback_data=f"buy_{dir_id}")])
+    buttons.append([InlineKeyboardButton(text=BUTTON_BUY_COURSE, callback_data=TariffsCallback(dir_id=dir_id).pack())])
     buttons.append([InlineKeyboardButton(text=BUTTON_GET_DETAILS, url=CONSULTATION_URL)])
-    buttons.append([InlineKeyboardButton(text="↩️ Назад к направлениям", callback_data="directions")])
-    buttons.append([InlineKeyboardButton(text="🏠 В главное меню", callback_data="main_menu")])
+    buttons.append([InlineKeyboardButton(text="↩️ Назад к направлениям", callback_data=DirectionsCallback().pack())])
+    buttons.append([InlineKeyboardButton(text="🏠 В главное меню", callback_data=MainMenuCallback().pack())])
 
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
@@ -50,9 +69,9 @@ def get_direction_detail_keyboard(dir_id: str) -> InlineKeyboardMarkup:
 def get_earning_ways_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура способов заработка."""
     buttons = [
-        [InlineKeyboardButton(text="📚 Обучение новой онлайн профессии", callback_data="earning_training")],
-        [InlineKeyboardButton(text="💼 Направления для заработка", callback_data="directions")],
-        [InlineKeyboardButton(text="🏠 В главное меню", callback_data="main_menu")]
+        [InlineKeyboardButton(text="📚 Обучение новой онлайн профессии", callback_data=TrainingCallback().pack())],
+        [InlineKeyboardButton(text="💼 Направления для заработка", callback_data=DirectionsCallback().pack())],
+        [InlineKeyboardButton(text="🏠 В главное меню", callback_data=MainMenuCallback().pack())]
     ]
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
@@ -69,17 +88,17 @@ def get_tariffs_keyboard() -> InlineKeyboardMarkup:
     # ВАЖНО: Добавляем кнопки рассрочки и консультации
     buttons.append([InlineKeyboardButton(text=BUTTON_BUY_INSTALLMENT, url=CONSULTATION_URL)])
     buttons.append([InlineKeyboardButton(text=BUTTON_GET_DETAILS, url=CONSULTATION_URL)])
-    buttons.append([InlineKeyboardButton(text="🏠 В главное меню", callback_data="main_menu")])
+    buttons.append([InlineKeyboardButton(text="🏠 В главное меню", callback_data=MainMenuCallback().pack())])
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
 def get_back_to_direction_keyboard(dir_id: str) -> InlineKeyboardMarkup:
     """Клавиатура возврата к направлению."""
     buttons = [
-        [InlineKeyboardButton(text=BUTTON_BUY_COURSE, callback_data=f"buy_{dir_id}")],
+        [InlineKeyboardButton(text=BUTTON_BUY_COURSE, callback_data=TariffsCallback(dir_id=dir_id).pack())],
         [InlineKeyboardButton(text=BUTTON_GET_DETAILS, url=CONSULTATION_URL)],
-        [InlineKeyboardButton(text="↩️ Назад", callback_data=f"dir_{dir_id}")],
-        [InlineKeyboardButton(text="🏠 В главное меню", callback_data="main_menu")]
+        [InlineKeyboardButton(text="↩️ Назад", callback_data=DirectionCallback(dir_id=dir_id).pack())],
+        [InlineKeyboardButton(text="🏠 В главное меню", callback_data=MainMenuCallback().pack())]
     ]
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
@@ -87,9 +106,59 @@ def get_back_to_direction_keyboard(dir_id: str) -> InlineKeyboardMarkup:
 def get_back_to_courses_keyboard(dir_id: str) -> InlineKeyboardMarkup:
     """Клавиатура возврата к курсам."""
     buttons = [
-        [InlineKeyboardButton(text=BUTTON_BUY_COURSE, callback_data=f"buy_{dir_id}")],
+        [InlineKeyboardButton(text=BUTTON_BUY_COURSE, callback_data=TariffsCallback(dir_id=dir_id).pack())],
         [InlineKeyboardButton(text=BUTTON_GET_DETAILS, url=CONSULTATION_URL)],
-        [InlineKeyboardButton(text="↩️ Назад к направлению", callback_data=f"dir_{dir_id}")],
-        [InlineKeyboardButton(text="🏠 В главное меню", callback_data="main_menu")]
+        [InlineKeyboardButton(text="↩️ Назад к направлению", callback_data=DirectionCallback(dir_id=dir_id).pack())],
+        [InlineKeyboardButton(text="🏠 В главное меню", callback_data=MainMenuCallback().pack())]
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def get_settings_keyboard(experience: str, notifications: bool) -> InlineKeyboardMarkup:
+    """Клавиатура экрана настроек (experience - подпись уровня опыта)."""
+    buttons = [
+        [InlineKeyboardButton(text="🎯 Интересующие направления", callback_data=InterestsCallback().pack())],
+        [InlineKeyboardButton(text=f"📊 Опыт: {experience}", callback_data=ExperienceCallback().pack())],
+        [InlineKeyboardButton(
+            text=f"🔔 Уведомления: {'вкл' if notifications else 'выкл'}",
+            callback_data=NotificationsCallback().pack()
+        )],
+        [InlineKeyboardButton(text="🏠 В главное меню", callback_data=MainMenuCallback().pack())]
     ]
     return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def get_interests_keyboard(directions: List[Dict[str, Any]], selected) -> InlineKeyboardMarkup:
+    """Клавиатура выбора интересующих направлений (selected - id выбранных)."""
+    buttons = []
+    for direction in directions:
+        mark = "✅" if direction['id'] in selected else "▫️"
+        buttons.append([InlineKeyboardButton(
+            text=f"{mark} {direction['emoji']} {direction['title']}",
+            callback_data=InterestToggleCallback(dir_id=direction['id']).pack()
+        )])
+    buttons.append([InlineKeyboardButton(text="↩️ Назад к настройкам", callback_data=SettingsCallback().pack())])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def with_page_buttons(
+    markup: Optional[InlineKeyboardMarkup],
+    screen_id: str,
+    page: int,
+    pages: int,
+    caption: bool
+) -> InlineKeyboardMarkup:
+    """Клавиатура экрана с рядом листания страниц над ней."""
+    row = []
+    if page > 0:
+        row.append(InlineKeyboardButton(
+            text="◀️", callback_data=PageCallback(caption=caption, page=page - 1, screen=screen_id).pack()
+        ))
+    row.append(InlineKeyboardButton(
+        text=f"{page + 1}/{pages}", callback_data=PageCallback(caption=caption, page=page, screen=screen_id).pack()
+    ))
+    if page < pages - 1:
+        row.append(InlineKeyboardButton(
+            text="▶️", callback_data=PageCallback(caption=caption, page=page + 1, screen=screen_id).pack()
+        ))
+    return InlineKeyboardMarkup(inline_keyboard=[row, *(markup.inline_keyboard if markup else [])])
@@ -0,0 +1,22 @@
+from .callbacks import CallbackDedupMiddleware
+from .metrics import ApiMetricsMiddleware, MetricsMiddleware, api_metrics
+from .throttling import (
+    MemoryThrottleStorage,
+    RedisThrottleStorage,
+    ThrottlingMiddleware,
+    create_throttle_storage,
+)
+from .update_scheduler import UpdateSchedulerMiddleware, update_scheduler
+
+__all__ = [
+    'CallbackDedupMiddleware',
+    'UpdateSchedulerMiddleware',
+    'update_scheduler',
+    'ThrottlingMiddleware',
+    'MemoryThrottleStorage',
+    'RedisThrottleStorage',
+    'create_throttle_storage',
+    'MetricsMiddleware',
+    'ApiMetricsMiddleware',
+    'api_metrics',
+]
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import suppress
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery, TelegramObject, Update
+
+from config import CALLBACK_DEDUP_WINDOW, CALLBACK_MAX_KEYS
+from utils.callback_routes import CallbackRouteObserver, callback_router
+from utils.metrics import Counter, registry
+
+logger = logging.getLogger(__name__)
+
+CALLBACKS_COALESCED = registry.register(Counter(
+    "bot_callbacks_coalesced_total",
+    "Нажатия кнопок: отброшенные повторы (duplicate) и отмененные более новым нажатием (superseded)",
+    ("result",),
+))
+
+
+@dataclass
+class _Tap:
+    """Последнее принятое нажатие на кнопку сообщения."""
+
+    data: Optional[str]
+    task: asyncio.Task
+    # До какого времени (monotonic) такое же нажатие считается повтором; 0 - обработчик еще работает
+    expires: float = 0.0
+
+
+class CallbackDedupMiddleware(BaseMiddleware):
+    """Повторные и устаревшие нажатия inline-кнопок одного сообщения.
+
+    Ключ - (чат, сообщение с кнопками). Нажатие с теми же callback data,
+    пока предыдущее обрабатывается или в течение window секунд после,
+    отбрасывается. Нажатие другой кнопки того же сообщения отменяет еще
+    работающий обработчик предыдущего: показывать его экран уже незачем.
+    На отброшенные и отмененные callback бот все равно отвечает, чтобы у
+    клиента не крутились часики.
+
+    Обработчики с флагом dedup=False (переключатели: каждое нажатие меняет
+    состояние) middleware пропускает без проверок и не запоминает.
+
+    Вешается на dp.update раньше FSM middleware (dp.fsm): иначе с Redis
+    новое нажатие ждало бы блокировку чата, которую держит старое.
+    """
+
+    def __init__(
+        self,
+        window: float = CALLBACK_DEDUP_WINDOW,
+        max_keys: int = CALLBACK_MAX_KEYS,
+        routes: CallbackRouteObserver = callback_router.callback_query
+    ):
+        super().__init__()
+        self.window = window
+        self.max_keys = max_keys
+        self.routes = routes
+        self._taps: "OrderedDict[Tuple[int, int], _Tap]" = OrderedDict()
+
+    @staticmethod
+    async def _answer(callback: CallbackQuery) -> None:
+        with suppress(TelegramBadRequest):  # запрос устарел или уже отвечен
+            await callback.answer()
+
+    def _exempt(self, data: Optional[str]) -> bool:
+        # Middleware стоит на апдейте, до выбора обработчика: флаги берем из таблицы маршрутов
+        route = self.routes.route(data or "")
+        return route is not None and not route.handler.flags.get("dedup", True)
+
+    def _prune(self, now: float) -> None:
+        """Забыть нажатия, у которых прошло окно повтора (самые старые - в начале)."""
+        while self._taps:
+            key, tap = next(iter(self._taps.items()))
+            expired = tap.task.done() and tap.expires <= now
+            if not expired and len(self._taps) <= self.max_keys:
+                break
+            del self._taps[key]
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        callback = event.callback_query
+        if callback is None or callback.message is None or self._exempt(callback.data):
+            return await handler(event, data)
+
+        now = time.monotonic()
+        key = (callback.message.chat.id, callback.message.message_id)
+        previous = self._taps.get(key)
+        if previous is not None:
+            running = not previous.task.done()
+            if previous.data == callback.data and (running or previous.expires > now):
+                CALLBACKS_COALESCED.inc("duplicate")
+                await self._answer(callback)
+                return None
+            if running:
+                CALLBACKS_COALESCED.inc("superseded")
+                previous.task.cancel()
+
+        # Обработчик - отдельной задачей: отменяется только он, а не обработка апдейта целиком
+        task = asyncio.ensure_future(handler(event, data))
+        tap = _Tap(callback.data, task)
+        self._taps[key] = tap
+        self._taps.move_to_end(key)
+        self._prune(now)
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if not task.cancelled() or asyncio.current_task().cancelling():
+                raise
+            # Отменен более новым нажатием
+            logger.debug("Callback %s отменен более новым нажатием", callback.data)
+            await self._answer(callback)
+            return None
+        finally:
+            tap.expires = time.monotonic() + self.window
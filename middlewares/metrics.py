@@ -0,0 +1,81 @@
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.filters.callback_data import CallbackData
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import CallbackQuery, TelegramObject
+
+from utils.metrics import API_ERRORS, API_LATENCY, HANDLER_EXCEPTIONS, HANDLER_LATENCY
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+
+def handler_labels(event: TelegramObject, data: Dict[str, Any]) -> tuple:
+    """(роутер, обработчик, префикс callback) для выбранного aiogram обработчика."""
+    handler_object = data.get("handler")
+    callback = getattr(handler_object, "callback", None)
+    # handlers.directions -> directions
+    router = getattr(callback, "__module__", "unknown").rsplit(".", 1)[-1]
+    name = getattr(callback, "__name__", "handler")
+    if isinstance(event, CallbackQuery):
+        # Префикс класса callback data, разобранного таблицей маршрутов
+        callback_data = data.get("callback_data")
+        prefix = callback_data.__prefix__ if isinstance(callback_data, CallbackData) else "unknown"
+    else:
+        prefix = "message"
+    return router, name, prefix
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """Замеряет время работы каждого обработчика и считает необработанные исключения.
+
+    Вешается как inner middleware, поэтому видит уже выбранный обработчик
+    и не считает апдейты, которые никто не обработал.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        labels = handler_labels(event, data)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            HANDLER_EXCEPTIONS.inc(labels[0], type(e).__name__)
+            raise
+        finally:
+            HANDLER_LATENCY.observe(time.perf_counter() - started, *labels)
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """Замеряет время каждого запроса к Bot API по методам.
+
+    Регистрируется после send_scheduler, поэтому время ожидания в очереди
+    лимитов не учитывается, а каждый повтор запроса замеряется отдельно.
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        api_method = method.__api_method__
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            API_ERRORS.inc(api_method, type(e).__name__)
+            raise
+        finally:
+            API_LATENCY.observe(time.perf_counter() - started, api_method)
+
+
+api_metrics = ApiMetricsMiddleware()
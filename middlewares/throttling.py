@@ -0,0 +1,158 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import CallbackQuery, Message, TelegramObject
+from redis.asyncio import Redis
+
+from config import (
+    REDIS_KEY_PREFIX,
+    THROTTLE_BURST,
+    THROTTLE_MAX_KEYS,
+    THROTTLE_NOTICE_COOLDOWN,
+    THROTTLE_RATE,
+    THROTTLE_STORAGE,
+)
+from utils.redis_pool import get_redis
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_NOTICE = "⏳ Слишком часто! Подожди немного и попробуй снова."
+
+
+class MemoryThrottleStorage:
+    """Token bucket в памяти процесса с вытеснением давно неактивных ключей."""
+
+    def __init__(self, max_keys: int = THROTTLE_MAX_KEYS):
+        self.max_keys = max_keys
+        # key -> (токены, время последнего пересчета)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        # key -> время, до которого повторное предупреждение не отправляется
+        self._notices: "OrderedDict[str, float]" = OrderedDict()
+
+    @staticmethod
+    def _touch(store: OrderedDict, key: str, value: Any, max_keys: int) -> None:
+        store[key] = value
+        store.move_to_end(key)
+        if len(store) > max_keys:
+            store.popitem(last=False)
+
+    async def consume(self, key: str, rate: float, burst: int) -> bool:
+        """Списать токен. False - лимит исчерпан."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - updated) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._touch(self._buckets, key, (tokens, now), self.max_keys)
+        return allowed
+
+    async def should_notify(self, key: str, cooldown: float) -> bool:
+        """Разрешить одно предупреждение о лимите за cooldown секунд."""
+        now = time.monotonic()
+        if self._notices.get(key, 0) > now:
+            return False
+        self._touch(self._notices, key, now + cooldown, self.max_keys)
+        return True
+
+
+class RedisThrottleStorage:
+    """Token bucket в Redis - общие лимиты для нескольких процессов бота."""
+
+    # Атомарный пересчет ведра: KEYS[1] - ключ, ARGV - rate, burst, now (мс)
+    CONSUME_SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or burst
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + (now - ts) / 1000 * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+    return allowed
+    """
+
+    def __init__(self, redis: Optional[Redis] = None, prefix: str = f"{REDIS_KEY_PREFIX}:throttle"):
+        self.redis = redis or get_redis()
+        self.prefix = prefix
+        self._consume = self.redis.register_script(self.CONSUME_SCRIPT)
+
+    async def consume(self, key: str, rate: float, burst: int) -> bool:
+        now_ms = int(time.time() * 1000)
+        allowed = await self._consume(keys=[f"{self.prefix}:{key}"], args=[rate, burst, now_ms])
+        return bool(allowed)
+
+    async def should_notify(self, key: str, cooldown: float) -> bool:
+        return bool(await self.redis.set(
+            f"{self.prefix}:notice:{key}", 1, px=int(cooldown * 1000), nx=True
+        ))
+
+
+def create_throttle_storage():
+    """Хранилище лимитов по настройке THROTTLE_STORAGE."""
+    if THROTTLE_STORAGE == "redis":
+        return RedisThrottleStorage()
+    return MemoryThrottleStorage()
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Ограничение частоты запросов на пользователя и обработчик (token bucket).
+
+    Лимит по умолчанию задается THROTTLE_RATE / THROTTLE_BURST, для отдельного
+    обработчика - флагом ``flags={"rate_limit": {"rate": 0.5, "burst": 3}}``.
+    При превышении лимита апдейт отбрасывается; пользователь получает одно
+    предупреждение за THROTTLE_NOTICE_COOLDOWN секунд, остальные - молча.
+    """
+
+    def __init__(
+        self,
+        storage=None,
+        rate: float = THROTTLE_RATE,
+        burst: int = THROTTLE_BURST,
+        notice_cooldown: float = THROTTLE_NOTICE_COOLDOWN
+    ):
+        super().__init__()
+        self.storage = storage or MemoryThrottleStorage()
+        self.rate = rate
+        self.burst = burst
+        self.notice_cooldown = notice_cooldown
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        limit = get_flag(data, "rate_limit", default={})
+        if not user or limit is False:
+            return await handler(event, data)
+
+        handler_object = data.get("handler")
+        handler_name = getattr(handler_object.callback, "__name__", "handler") if handler_object else "handler"
+        key = f"{user.id}:{handler_name}"
+
+        allowed = await self.storage.consume(
+            key, limit.get("rate", self.rate), limit.get("burst", self.burst)
+        )
+        if allowed:
+            return await handler(event, data)
+
+        logger.warning("⏳ Пользователь %s превысил лимит для %s", user.id, handler_name)
+        notify = await self.storage.should_notify(str(user.id), self.notice_cooldown)
+        if isinstance(event, CallbackQuery):
+            # На callback нужно ответить всегда, иначе у клиента крутятся часики
+            await event.answer(THROTTLE_NOTICE if notify else None)
+        elif isinstance(event, Message) and notify:
+            await event.answer(THROTTLE_NOTICE)
+        return None
@@ -0,0 +1,105 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from config import UPDATE_CONCURRENCY
+from utils.metrics import Histogram, registry
+
+UPDATE_QUEUE_WAIT = registry.register(Histogram(
+    "bot_update_queue_wait_seconds", "Ожидание апдейта в очереди своего чата и общего лимита",
+))
+
+
+class UpdateSchedulerMiddleware(BaseMiddleware):
+    """Апдейты одного чата - строго по очереди, разных чатов - параллельно.
+
+    У каждого чата с необработанными апдейтами есть очередь "талонов";
+    апдейт ждет, пока обработаются все более ранние апдейты его чата, и
+    только потом занимает одно из max_concurrency мест общего лимита -
+    чат с медленным обработчиком не держит места других чатов. Пустая
+    очередь сразу удаляется, поэтому память тратится только на чаты, у
+    которых что-то обрабатывается сейчас.
+
+    Вешается на dp.update после CallbackDedupMiddleware (новое нажатие
+    должно отменить старое, а не ждать его в очереди) и до FSM. Работает
+    одинаково при polling, webhook и в процессах-обработчиках.
+    """
+
+    def __init__(self, max_concurrency: int = UPDATE_CONCURRENCY):
+        super().__init__()
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._chats: Dict[int, Deque[asyncio.Future]] = {}
+        self._running = 0
+
+    @staticmethod
+    def _chat_key(data: Dict[str, Any]) -> Optional[int]:
+        chat = data.get("event_chat")
+        if chat is not None:
+            return chat.id
+        user = data.get("event_from_user")
+        return user.id if user is not None else None
+
+    def stats(self) -> Dict[str, int]:
+        """Снимок очередей для /queues и метрик."""
+        return {
+            "chats": len(self._chats),
+            "waiting": max(0, sum(len(queue) for queue in self._chats.values()) - self._running),
+            "longest": max((len(queue) for queue in self._chats.values()), default=0),
+            "running": self._running,
+        }
+
+    def _leave(self, key: int, queue: Deque[asyncio.Future], turn: asyncio.Future) -> None:
+        was_first = queue[0] is turn
+        queue.remove(turn)
+        if not queue:
+            del self._chats[key]
+        elif was_first and not queue[0].done():
+            queue[0].set_result(None)
+
+    async def _run(self, handler, event: TelegramObject, data: Dict[str, Any], queued_at: float) -> Any:
+        async with self._semaphore:
+            UPDATE_QUEUE_WAIT.observe(time.perf_counter() - queued_at)
+            self._running += 1
+            try:
+                return await handler(event, data)
+            finally:
+                self._running -= 1
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        queued_at = time.perf_counter()
+        key = self._chat_key(data)
+        if key is None:
+            return await self._run(handler, event, data, queued_at)
+
+        queue = self._chats.get(key)
+        if queue is None:
+            queue = self._chats[key] = deque()
+        turn = asyncio.get_running_loop().create_future()
+        queue.append(turn)
+        if len(queue) == 1:
+            turn.set_result(None)
+        try:
+            await turn
+            return await self._run(handler, event, data, queued_at)
+        finally:
+            self._leave(key, queue, turn)
+
+
+update_scheduler = UpdateSchedulerMiddleware()
+
+registry.gauge("bot_update_chat_queues", "Чаты, у которых есть необработанные апдейты",
+               lambda: update_scheduler.stats()["chats"])
+registry.gauge("bot_update_queue_waiting", "Апдейты, ждущие своей очереди в чате или общего лимита",
+               lambda: update_scheduler.stats()["waiting"])
+registry.gauge("bot_updates_running", "Апдейты, которые сейчас обрабатываются",
+               lambda: update_scheduler.stats()["running"])
@@ -0,0 +1,17 @@
+from .lifecycle import Lifecycle, lifecycle
+from .metrics import setup_metrics, start_metrics_server
+from .polling import run_polling
+from .webhook import create_webhook_app, run_webhook
+from .workers import WorkerPool, run_workers
+
+__all__ = [
+    'Lifecycle',
+    'lifecycle',
+    'run_polling',
+    'create_webhook_app',
+    'run_webhook',
+    'setup_metrics',
+    'start_metrics_server',
+    'WorkerPool',
+    'run_workers',
+]
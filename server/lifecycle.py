@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import signal
+from contextlib import suppress
+from typing import Any, Awaitable, Iterable, Optional
+
+from config import SHUTDOWN_DRAIN_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+
+class Lifecycle:
+    """Остановка процесса без потери апдейтов.
+
+    По SIGTERM (SIGINT) раннер режима перестает принимать апдейты, ждет
+    уже принятые не дольше drain_timeout секунд (оставшиеся отменяются) и
+    только потом вызывает dp.shutdown - блоклист, аналитика, пользователи,
+    профили и рассылка сбрасывают буферы в БД после последнего обработчика.
+    """
+
+    def __init__(self, drain_timeout: float = SHUTDOWN_DRAIN_TIMEOUT):
+        self.drain_timeout = drain_timeout
+        self._stop = asyncio.Event()
+
+    @property
+    def stopping(self) -> bool:
+        return self._stop.is_set()
+
+    def install_signal_handlers(self) -> None:
+        loop = asyncio.get_running_loop()
+        with suppress(NotImplementedError):  # Windows
+            loop.add_signal_handler(signal.SIGTERM, self.stop, signal.SIGTERM)
+            loop.add_signal_handler(signal.SIGINT, self.stop, signal.SIGINT)
+
+    def stop(self, sig: Optional[signal.Signals] = None) -> None:
+        if not self.stopping:
+            logger.info(f"Получен {sig.name if sig else 'сигнал остановки'}, останавливаемся")
+        self._stop.set()
+
+    async def wait(self) -> None:
+        """Дождаться сигнала остановки."""
+        await self._stop.wait()
+
+    async def run_until_stopped(self, coro: Awaitable[Any]) -> None:
+        """Выполнять coro до сигнала остановки (затем отменить) или до ее завершения."""
+        task = asyncio.ensure_future(coro)
+        waiter = asyncio.ensure_future(self.wait())
+        try:
+            await asyncio.wait([task, waiter], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+            if not task.done():
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+        if not task.cancelled():
+            task.result()
+
+    async def drain(self, tasks: Iterable[asyncio.Task]) -> int:
+        """Дождаться обработчиков апдейтов (не дольше drain_timeout). Возвращает число отмененных."""
+        pending = [task for task in tasks if not task.done()]
+        if not pending:
+            return 0
+        logger.info(f"Дообрабатываем {len(pending)} апдейтов (не дольше {self.drain_timeout:g} с)")
+        _, pending = await asyncio.wait(pending, timeout=self.drain_timeout)
+        if pending:
+            logger.warning(f"Не успели обработать {len(pending)} апдейтов за {self.drain_timeout:g} с, отменяем")
+            for task in pending:
+                task.cancel()
+            await asyncio.wait(pending)
+        return len(pending)
+
+
+lifecycle = Lifecycle()
@@ -0,0 +1,32 @@
+import logging
+
+from aiohttp import web
+
+from config import METRICS_PATH, SERVER_HOST, SERVER_PORT
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Формат text exposition Prometheus
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    """Отдать все метрики в текстовом формате Prometheus."""
+    return web.Response(body=registry.render().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+
+def setup_metrics(app: web.Application) -> None:
+    """Добавить маршрут METRICS_PATH в aiohttp приложение."""
+    app.router.add_get(METRICS_PATH, metrics_handler)
+
+
+async def start_metrics_server(port: int = SERVER_PORT) -> web.AppRunner:
+    """Поднять отдельный HTTP сервер с метриками (для режима polling и процессов-обработчиков)."""
+    app = web.Application()
+    setup_metrics(app)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host=SERVER_HOST, port=port).start()
+    logger.info(f"Метрики доступны на {SERVER_HOST}:{port}{METRICS_PATH}")
+    return runner
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from typing import Any, Dict, Set
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
+
+from utils.metrics import registry
+from utils.update_offset import update_offset
+
+from .lifecycle import lifecycle
+
+logger = logging.getLogger(__name__)
+
+# Сколько секунд Telegram держит запрос getUpdates, если апдейтов нет
+POLLING_TIMEOUT = 30
+# Если Telegram вернул только апдейты, которые еще обрабатываются, - не чаще
+# раза в столько секунд (или как только один из них завершится)
+IN_FLIGHT_RETRY_DELAY = 0.5
+
+
+async def confirm_offset(bot: Bot) -> None:
+    """Подтвердить Telegram обработанные апдейты, чтобы следующий процесс их не получил."""
+    if update_offset.next_offset is None:
+        return
+    try:
+        # Апдейты до offset считаются подтвержденными, сам вернувшийся апдейт - нет
+        await bot.get_updates(offset=update_offset.next_offset, timeout=0, limit=1)
+    except Exception as e:
+        logger.error(f"Не удалось подтвердить offset {update_offset.next_offset}: {e}")
+
+
+async def _process(bot: Bot, dp: Dispatcher, update: Update, workflow_data: Dict[str, Any]) -> None:
+    try:
+        result = await dp.feed_update(bot, update, **workflow_data)
+        if isinstance(result, TelegramMethod):
+            await dp.silent_call_request(bot=bot, result=result)
+    except asyncio.CancelledError:
+        # Отменен при остановке: не считаем обработанным - если Telegram пришлет апдейт снова, обработаем
+        raise
+    except Exception as e:
+        logger.error(f"Ошибка при обработке апдейта {update.update_id}: {e}")
+    update_offset.finish(update.update_id)
+
+
+async def _listen(bot: Bot, dp: Dispatcher, tasks: Set[asyncio.Task], workflow_data: Dict[str, Any]) -> None:
+    """Принимать апдейты, подтверждая Telegram только обработанные.
+
+    offset в getUpdates - первый необработанный апдейт, а не следующий после
+    полученного: getUpdates подтверждает все апдейты до offset, и отмененный
+    при остановке апдейт Telegram иначе уже не прислал бы снова. Поэтому
+    апдейты, которые еще обрабатываются, приходят повторно и пропускаются.
+    """
+    allowed_updates = dp.resolve_used_update_types()
+    while True:
+        try:
+            updates = await bot.get_updates(
+                offset=update_offset.next_offset, timeout=POLLING_TIMEOUT, allowed_updates=allowed_updates
+            )
+        except Exception as e:
+            logger.error(f"Ошибка getUpdates: {e}")
+            await asyncio.sleep(1)
+            continue
+        started = 0
+        for update in updates:
+            if not update_offset.begin(update.update_id):
+                # Еще обрабатывается или обработан до перезапуска, но Telegram не получил подтверждение
+                continue
+            task = asyncio.create_task(_process(bot, dp, update, workflow_data))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            started += 1
+        if updates and not started:
+            # Новых апдейтов нет, а старые держат offset: не опрашиваем Telegram вхолостую
+            if tasks:
+                await asyncio.wait(set(tasks), timeout=IN_FLIGHT_RETRY_DELAY, return_when=asyncio.FIRST_COMPLETED)
+            else:
+                await asyncio.sleep(IN_FLIGHT_RETRY_DELAY)
+
+
+async def run_polling(bot: Bot, dp: Dispatcher) -> None:
+    """Long polling с продолжением с последнего обработанного апдейта.
+
+    Каждый апдейт обрабатывается отдельной задачей, как в dp.start_polling.
+    По сигналу остановки прием прекращается, принятые апдейты дообрабатываются
+    (lifecycle.drain), затем dp.shutdown сбрасывает буферы, а последний
+    обработанный update_id сохраняется и подтверждается Telegram.
+    """
+    # В режиме polling снимаем вебхук, иначе getUpdates вернет ошибку
+    await bot.delete_webhook()
+    workflow_data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+    tasks: Set[asyncio.Task] = set()
+    registry.gauge("bot_polling_in_flight_updates", "Апдейты, которые сейчас обрабатываются", lambda: len(tasks))
+
+    await update_offset.start()
+    await dp.emit_startup(bot=bot, **workflow_data)
+    try:
+        user = await bot.me()
+        logger.info(f"Polling запущен для @{user.username}")
+        await lifecycle.run_until_stopped(_listen(bot, dp, tasks, workflow_data))
+    finally:
+        await lifecycle.drain(tasks)
+        try:
+            await dp.emit_shutdown(bot=bot, **workflow_data)
+        finally:
+            await update_offset.close()
+            await confirm_offset(bot)
+        logger.info("Polling остановлен")
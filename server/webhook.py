@@ -0,0 +1,131 @@
+import asyncio
+import logging
+from typing import Any, Dict, Set
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from utils.metrics import registry
+
+from .lifecycle import lifecycle
+from .metrics import setup_metrics
+
+from config import (
+    METRICS_ENABLED,
+    SERVER_HOST,
+    SERVER_PORT,
+    WEBHOOK_MAX_IN_FLIGHT,
+    WEBHOOK_MAX_PENDING,
+    WEBHOOK_PATH,
+    WEBHOOK_REUSE_PORT,
+    WEBHOOK_SECRET,
+    WEBHOOK_URL,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """Обработчик вебхука с ограничением очереди необработанных апдейтов.
+
+    Telegram получает ответ 200 сразу после проверки секрета, апдейт
+    обрабатывается в фоне. Порядок внутри чата и общий лимит одновременно
+    выполняемых апдейтов обеспечивает UpdateSchedulerMiddleware. Если
+    необработанных апдейтов больше max_pending - отвечаем 503, и Telegram
+    сам пришлет апдейт повторно. Так же отвечаем во время остановки -
+    апдейт достанется новому экземпляру.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        max_pending: int = WEBHOOK_MAX_PENDING,
+        **kwargs: Any
+    ):
+        super().__init__(dispatcher=dispatcher, bot=bot, handle_in_background=True, **kwargs)
+        self.max_pending = max_pending
+
+    @property
+    def pending(self) -> int:
+        """Количество принятых, но еще не обработанных апдейтов."""
+        return len(self._background_feed_update_tasks)
+
+    async def _background_feed_update(self, bot: Bot, update: Dict[str, Any]) -> None:
+        try:
+            result = await self.dispatcher.feed_raw_update(bot=bot, update=update, **self.data)
+        except Exception as e:
+            logger.error(f"Ошибка при обработке апдейта {update.get('update_id')}: {e}")
+            return
+        if isinstance(result, TelegramMethod):
+            await self.dispatcher.silent_call_request(bot=bot, result=result)
+
+    @property
+    def tasks(self) -> Set[asyncio.Task]:
+        """Задачи обработки принятых апдейтов (для дообработки при остановке)."""
+        return self._background_feed_update_tasks
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        if lifecycle.stopping:
+            return web.Response(status=503)
+        if self.pending >= self.max_pending:
+            logger.warning(f"Очередь вебхука переполнена ({self.pending}), просим Telegram повторить")
+            return web.Response(status=503)
+        return await super()._handle_request_background(bot=bot, request=request)
+
+
+WEBHOOK_HANDLER = web.AppKey("webhook_handler", BoundedRequestHandler)
+
+
+def create_webhook_app(bot: Bot, dp: Dispatcher) -> web.Application:
+    """Создать aiohttp приложение, принимающее апдейты от Telegram."""
+    app = web.Application()
+    handler = BoundedRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=WEBHOOK_SECRET,
+    )
+    # dp.shutdown раньше закрытия сессии бота обработчиком: при остановке еще нужен Bot API
+    setup_application(app, dp, bot=bot)
+    handler.register(app, path=WEBHOOK_PATH)
+    app[WEBHOOK_HANDLER] = handler
+    registry.gauge("bot_webhook_pending_updates", "Апдейты вебхука, ожидающие обработки", lambda: handler.pending)
+    if METRICS_ENABLED:
+        setup_metrics(app)
+
+    async def on_startup(bot: Bot) -> None:
+        await bot.set_webhook(
+            url=WEBHOOK_URL,
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=dp.resolve_used_update_types(),
+            max_connections=min(WEBHOOK_MAX_IN_FLIGHT, 100),
+        )
+        logger.info(f"Вебхук установлен: {WEBHOOK_URL}")
+
+    dp.startup.register(on_startup)
+    return app
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher) -> None:
+    """Запустить бота в режиме вебхука на SERVER_HOST:SERVER_PORT.
+
+    С WEBHOOK_REUSE_PORT новый экземпляр бота может занять тот же порт, пока
+    старый еще работает: после остановки старого все соединения получает новый.
+    """
+    app = create_webhook_app(bot, dp)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=SERVER_HOST, port=SERVER_PORT, reuse_port=WEBHOOK_REUSE_PORT or None)
+    await site.start()
+    logger.info(f"Вебхук сервер слушает {SERVER_HOST}:{SERVER_PORT}{WEBHOOK_PATH}")
+
+    try:
+        await lifecycle.wait()
+    finally:
+        # Перестаем принимать соединения, дообрабатываем принятые апдейты,
+        # затем runner.cleanup вызывает dp.shutdown (сброс буферов) и закрывает сессию бота
+        await site.stop()
+        await lifecycle.drain(app[WEBHOOK_HANDLER].tasks)
+        await runner.cleanup()
@@ -0,0 +1,338 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+import signal
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from aiogram import Bot, Dispatcher
+from aiohttp import web
+
+from config import (
+    BOT_MODE,
+    FSM_STORAGE,
+    LOG_FILE,
+    METRICS_ENABLED,
+    SERVER_HOST,
+    SERVER_PORT,
+    SHUTDOWN_DRAIN_TIMEOUT,
+    WEBHOOK_MAX_IN_FLIGHT,
+    WEBHOOK_PATH,
+    WEBHOOK_REUSE_PORT,
+    WEBHOOK_SECRET,
+    WEBHOOK_URL,
+    WORKER_HEARTBEAT_INTERVAL,
+    WORKER_HEARTBEAT_TIMEOUT,
+    WORKER_QUEUE_SIZE,
+    WORKERS,
+)
+from utils.image_manifest import image_manifest
+from utils.metrics import Counter, registry
+from utils.update_offset import update_offset
+
+from .lifecycle import lifecycle
+from .metrics import setup_metrics, start_metrics_server
+from .polling import POLLING_TIMEOUT, confirm_offset
+
+logger = logging.getLogger(__name__)
+
+# Процессы-обработчики запускаются начисто (spawn), без копии event loop и потоков ингресса
+_mp = multiprocessing.get_context("spawn")
+
+WORKER_RESTARTS = registry.register(Counter(
+    "bot_worker_restarts_total", "Перезапуски процессов-обработчиков", ("worker", "reason"),
+))
+INGRESS_REJECTED = registry.register(Counter(
+    "bot_ingress_rejected_total", "Апдейты, не принятые из-за переполненной очереди", ("worker",),
+))
+
+
+def chat_id_of(update: Dict[str, Any]) -> Optional[int]:
+    """chat_id апдейта (для callback - чат сообщения с кнопкой), иначе id пользователя."""
+    for value in update.values():
+        if not isinstance(value, dict):
+            continue
+        chat = value.get("chat") or (value.get("message") or {}).get("chat")
+        if chat:
+            return chat["id"]
+        user = value.get("from")
+        if user:
+            return user["id"]
+    return None
+
+
+def shard_for(update: Dict[str, Any], workers: int) -> int:
+    """Номер процесса для апдейта: все апдейты одного чата попадают в один процесс."""
+    chat_id = chat_id_of(update)
+    return (chat_id if chat_id is not None else update.get("update_id", 0)) % workers
+
+
+class WorkerHandle:
+    """Процесс-обработчик, его очередь и heartbeat (время последнего отклика loop)."""
+
+    def __init__(self, index: int, queue_size: int, workers: int):
+        self.index = index
+        self.queue_size = queue_size
+        self.workers = workers
+        self.queue = _mp.Queue(queue_size)
+        self.heartbeat = _mp.Value("d", 0.0, lock=False)
+        self.process: Optional[multiprocessing.Process] = None
+        self.restarts = 0
+
+    def start(self) -> None:
+        # Пока процесс поднимается, heartbeat "из будущего" не дает счесть его зависшим
+        self.heartbeat.value = time.time() + WORKER_HEARTBEAT_TIMEOUT
+        self.process = _mp.Process(
+            target=worker_main,
+            args=(self.index, self.queue, self.heartbeat, self.workers),
+            name=f"bot-worker-{self.index}",
+            daemon=True,
+        )
+        self.process.start()
+        logger.info(f"Запущен обработчик #{self.index} (pid {self.process.pid})")
+
+    def reset_queue(self) -> None:
+        """Новая очередь вместо той, что мог повредить убитый процесс (апдейты в ней теряются)."""
+        self.queue.close()
+        self.queue = _mp.Queue(self.queue_size)
+
+
+class WorkerPool:
+    """Набор процессов-обработчиков с раздачей апдейтов по chat_id и супервизором.
+
+    Общее состояние: FSM должно храниться в Redis (FSM_STORAGE=redis), блоклист -
+    в PostgreSQL, изменения блоклиста рассылаются процессам через Redis
+    (BLOCKLIST_SYNC). Пока число процессов не меняется, чат всегда
+    обрабатывается одним и тем же процессом, поэтому порядок апдейтов
+    одного пользователя сохраняется.
+    """
+
+    def __init__(self, workers: int = WORKERS, queue_size: int = WORKER_QUEUE_SIZE):
+        self.workers: List[WorkerHandle] = [WorkerHandle(index, queue_size, workers) for index in range(workers)]
+        self._supervisor: Optional[asyncio.Task] = None
+        registry.gauge("bot_worker_queue_total", "Апдейты в очередях процессов-обработчиков", self.queued)
+
+    def queued(self) -> int:
+        return sum(handle.queue.qsize() for handle in self.workers)
+
+    def start(self) -> None:
+        if FSM_STORAGE != "redis":
+            logger.warning("FSM хранится в памяти процессов: состояния пропадут при перезапуске обработчика")
+        for handle in self.workers:
+            handle.start()
+        self._supervisor = asyncio.create_task(self._supervise())
+
+    def dispatch(self, update: Dict[str, Any]) -> bool:
+        """Передать апдейт своему процессу. False - очередь процесса переполнена."""
+        handle = self.workers[shard_for(update, len(self.workers))]
+        try:
+            handle.queue.put_nowait(update)
+        except queue.Full:
+            INGRESS_REJECTED.inc(str(handle.index))
+            return False
+        return True
+
+    def _restart(self, handle: WorkerHandle, reason: str) -> None:
+        handle.restarts += 1
+        WORKER_RESTARTS.inc(str(handle.index), reason)
+        handle.start()
+
+    async def _supervise(self) -> None:
+        while True:
+            await asyncio.sleep(WORKER_HEARTBEAT_INTERVAL)
+            now = time.time()
+            for handle in self.workers:
+                if not handle.process.is_alive():
+                    logger.error(f"Обработчик #{handle.index} завершился с кодом {handle.process.exitcode}, "
+                                 f"перезапускаем")
+                    self._restart(handle, "exited")
+                elif now - handle.heartbeat.value > WORKER_HEARTBEAT_TIMEOUT:
+                    logger.error(f"Обработчик #{handle.index} не отвечает {now - handle.heartbeat.value:.0f} с, "
+                                 f"перезапускаем")
+                    handle.process.kill()
+                    await asyncio.to_thread(handle.process.join)
+                    handle.reset_queue()
+                    self._restart(handle, "hung")
+
+    async def stop(self, timeout: float = SHUTDOWN_DRAIN_TIMEOUT) -> None:
+        """Дать процессам дообработать очереди и завершиться."""
+        if self._supervisor:
+            self._supervisor.cancel()
+            try:
+                await self._supervisor
+            except asyncio.CancelledError:
+                pass
+        for handle in self.workers:
+            try:
+                handle.queue.put(None, timeout=1)
+            except queue.Full:
+                handle.process.terminate()
+        deadline = time.monotonic() + timeout
+        for handle in self.workers:
+            await asyncio.to_thread(handle.process.join, max(0.0, deadline - time.monotonic()))
+            if handle.process.is_alive():
+                logger.warning(f"Обработчик #{handle.index} не завершился за {timeout:g} с, останавливаем")
+                handle.process.terminate()
+
+
+async def _worker_loop(index: int, updates: multiprocessing.Queue, heartbeat, workers: int) -> None:
+    # Импорт здесь: bot.py сам импортирует пакет server
+    from bot import create_bot, create_dispatcher
+    from utils.db import close_pool
+    from utils.redis_pool import close_redis
+    from utils.send_scheduler import send_scheduler
+
+    # Лимит Telegram на отправку общий для бота - каждому процессу его доля
+    send_scheduler.share_global_limit(workers)
+    # Копии картинок уже подготовил ингресс, процессы их только читают
+    image_manifest.prepare = False
+    bot = create_bot()
+    dp = create_dispatcher()
+    await dp.emit_startup(bot=bot, dispatcher=dp)
+    metrics_runner = await start_metrics_server(SERVER_PORT + 1 + index) if METRICS_ENABLED else None
+
+    async def beat() -> None:
+        while True:
+            heartbeat.value = time.time()
+            await asyncio.sleep(WORKER_HEARTBEAT_INTERVAL)
+
+    # Порядок апдейтов внутри чата держит update_scheduler в диспетчере
+    tasks: Set[asyncio.Task] = set()
+
+    async def process(update: Dict[str, Any]) -> None:
+        try:
+            await dp.feed_raw_update(bot, update)
+        except Exception as e:
+            logger.error(f"Ошибка при обработке апдейта {update.get('update_id')}: {e}")
+
+    beat_task = asyncio.create_task(beat())
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            try:
+                update = await loop.run_in_executor(None, updates.get, True, 1.0)
+            except queue.Empty:
+                continue
+            if update is None:
+                break
+            task = asyncio.create_task(process(update))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        if tasks:
+            await asyncio.wait(list(tasks))
+        beat_task.cancel()
+        await dp.emit_shutdown(bot=bot, dispatcher=dp)
+        if metrics_runner:
+            await metrics_runner.cleanup()
+        await dp.storage.close()
+        await bot.session.close()
+        await close_redis()
+        await close_pool()
+
+
+def worker_main(index: int, updates: multiprocessing.Queue, heartbeat, workers: int) -> None:
+    """Точка входа процесса-обработчика."""
+    from utils.logging_setup import setup_logging
+
+    log_file = Path(LOG_FILE)
+    setup_logging(log_file.with_name(f"{log_file.stem}.worker{index}{log_file.suffix}"))
+    # Остановкой управляет ингресс (None в очереди): ни Ctrl+C в терминале, ни SIGTERM,
+    # который systemd шлет всем процессам сервиса, не должны оборвать обработку очереди
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    asyncio.run(_worker_loop(index, updates, heartbeat, workers))
+
+
+async def _poll(bot: Bot, dp: Dispatcher, pool: WorkerPool) -> None:
+    """Long polling в ингрессе: апдейты не обрабатываются, а раздаются процессам.
+
+    Апдейт считается обработанным, как только попал в очередь процесса:
+    при остановке очереди дообрабатываются (WorkerPool.stop).
+    """
+    await bot.delete_webhook()
+    allowed_updates = dp.resolve_used_update_types()
+    offset = update_offset.next_offset
+    while True:
+        try:
+            updates = await bot.get_updates(offset=offset, timeout=POLLING_TIMEOUT, allowed_updates=allowed_updates)
+        except Exception as e:
+            logger.error(f"Ошибка getUpdates: {e}")
+            await asyncio.sleep(1)
+            continue
+        for update in updates:
+            offset = update.update_id + 1
+            if not update_offset.begin(update.update_id):
+                continue
+            raw = update.model_dump(mode="json", by_alias=True, exclude_none=True, exclude_unset=True)
+            # В polling некуда вернуть 503 - ждем, пока в очереди процесса освободится место
+            while not pool.dispatch(raw):
+                await asyncio.sleep(0.05)
+            update_offset.finish(update.update_id)
+
+
+def create_ingress_app(bot: Bot, dp: Dispatcher, pool: WorkerPool) -> web.Application:
+    """aiohttp приложение ингресса: вебхук раздает апдейты процессам-обработчикам."""
+    app = web.Application()
+
+    async def handle(request: web.Request) -> web.Response:
+        if request.headers.get("X-Telegram-Bot-Api-Secret-Token") != WEBHOOK_SECRET:
+            return web.Response(status=401)
+        if lifecycle.stopping:
+            return web.Response(status=503)
+        # 503 - Telegram сам пришлет апдейт повторно
+        return web.Response() if pool.dispatch(await request.json()) else web.Response(status=503)
+
+    async def on_startup(app: web.Application) -> None:
+        await bot.set_webhook(
+            url=WEBHOOK_URL,
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=dp.resolve_used_update_types(),
+            max_connections=min(WEBHOOK_MAX_IN_FLIGHT, 100),
+        )
+        logger.info(f"Вебхук установлен: {WEBHOOK_URL}")
+
+    app.router.add_post(WEBHOOK_PATH, handle)
+    app.on_startup.append(on_startup)
+    if METRICS_ENABLED:
+        setup_metrics(app)
+    return app
+
+
+async def run_workers(bot: Bot, dp: Dispatcher) -> None:
+    """Запустить ингресс (polling или webhook по BOT_MODE) и WORKERS процессов-обработчиков."""
+    # Пережать картинки один раз до запуска процессов, а не в каждом из них
+    await image_manifest.load()
+    pool = WorkerPool()
+    pool.start()
+    runner = None
+    polling = BOT_MODE != "webhook"
+    try:
+        if not polling:
+            runner = web.AppRunner(create_ingress_app(bot, dp, pool))
+        elif METRICS_ENABLED:
+            app = web.Application()
+            setup_metrics(app)
+            runner = web.AppRunner(app)
+        if runner:
+            await runner.setup()
+            await web.TCPSite(
+                runner, host=SERVER_HOST, port=SERVER_PORT, reuse_port=(not polling and WEBHOOK_REUSE_PORT) or None
+            ).start()
+        logger.info(f"Ингресс ({BOT_MODE}) раздает апдейты {len(pool.workers)} обработчикам")
+
+        if polling:
+            await update_offset.start()
+            await lifecycle.run_until_stopped(_poll(bot, dp, pool))
+        else:
+            await lifecycle.wait()
+    finally:
+        # Сначала прекращаем прием, затем обработчики дообрабатывают свои очереди
+        if runner:
+            await runner.cleanup()
+        await pool.stop()
+        if polling:
+            await update_offset.close()
+            await confirm_offset(bot)
@@ -0,0 +1,43 @@
+import html
+import re
+
+import pytest
+
+from utils.pagination import CAPTION_LIMIT, paginate, visible_length
+
+LIMIT = 20
+
+
+def _text(page: str) -> str:
+    """Видимый текст страницы без тегов и пробелов."""
+    return re.sub(r'\s+', '', html.unescape(re.sub(r'<[^>]+>', '', page)))
+
+
+@pytest.mark.parametrize("text", [
+    "<b>" + "x" * 50 + "</b>",                    # слово длиннее страницы сразу после тега
+    "hi <b>" + "x" * 50 + "</b>",                 # то же после короткого слова
+    "<i><b>" + "x" * 50 + " y</b></i>",           # несколько тегов подряд
+    "<b>" + " " * 30 + "x</b>" + "y" * 30,        # пробелы шире страницы
+    "<a href=\"https://example.com\">" + "ссылка " * 10 + "</a>",
+    "a&amp;b " * 10,
+])
+def test_pages_are_short_and_not_empty(text):
+    pages = paginate(text, LIMIT)
+    for page in pages:
+        assert visible_length(page) <= LIMIT
+        # Страницу без видимого текста Telegram не примет: "message text is empty"
+        assert _text(page), page
+    assert ''.join(map(_text, pages)) == _text(text)
+
+
+def test_long_word_after_tag_is_split():
+    assert paginate("<b>" + "x" * 50 + "</b>", LIMIT) == (
+        "<b>" + "x" * 20 + "</b>",
+        "<b>" + "x" * 20 + "</b>",
+        "<b>" + "x" * 10 + "</b>",
+    )
+
+
+def test_short_text_is_one_page():
+    text = "<b>Заголовок</b>\n\nТекст"
+    assert paginate(text, CAPTION_LIMIT) == (text,)
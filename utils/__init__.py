@@ -1,4 +1,4 @@
-from .data_loader import get_direction_by_id, load_directions
+from .data_loader import Catalog, CatalogSnapshot, catalog, get_direction_by_id, load_directions
 from .image_handler import (
     get_course_image,
     get_courses_overview_image,
@@ -6,8 +6,12 @@ from .image_handler import (
     get_start_image,
     get_tariffs_image,
 )
+from .media_cache import forget_photo, get_photo, media_cache, remember_photo
 
 __all__ = [
+    'catalog',
+    'Catalog',
+    'CatalogSnapshot',
     'load_directions',
     'get_direction_by_id',
     'get_start_image',
@@ -15,4 +19,8 @@ __all__ = [
     'get_course_image',
     'get_courses_overview_image',
     'get_tariffs_image',
+    'media_cache',
+    'get_photo',
+    'remember_photo',
+    'forget_photo',
 ]
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from config import ANALYTICS_BATCH_SIZE, ANALYTICS_BUFFER_SIZE, ANALYTICS_FLUSH_INTERVAL
+
+from .db import get_pool
+from .metrics import Counter, registry
+
+logger = logging.getLogger(__name__)
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS analytics_events (
+    ts TIMESTAMPTZ NOT NULL,
+    user_id BIGINT NOT NULL,
+    event TEXT NOT NULL,
+    target TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS analytics_events_ts_idx ON analytics_events (ts);
+"""
+
+# События воронки
+DIRECTION_VIEW = "direction_view"  # target - id направления (dir_*)
+COURSES_VIEW = "courses_view"  # target - id направления (courses_*)
+TARIFFS_VIEW = "tariffs_view"  # target - откуда пришли: id направления (buy_*) или earning_training
+
+# Воронка: сколько пользователей дошли до каждого шага после просмотра направления
+FUNNEL_SQL = """
+WITH firsts AS (
+    SELECT user_id,
+           min(ts) FILTER (WHERE event = 'direction_view') AS viewed_at,
+           min(ts) FILTER (WHERE event = 'courses_view') AS courses_at,
+           min(ts) FILTER (WHERE event = 'tariffs_view') AS tariffs_at
+    FROM analytics_events
+    WHERE ts >= now() - make_interval(days => $1)
+    GROUP BY user_id
+)
+SELECT count(viewed_at) AS viewed,
+       count(*) FILTER (WHERE courses_at >= viewed_at) AS courses,
+       count(*) FILTER (WHERE tariffs_at >= viewed_at) AS tariffs,
+       count(tariffs_at) AS tariffs_total
+FROM firsts
+"""
+
+# Та же воронка по направлениям (уникальные пользователи на каждом шаге)
+FUNNEL_BY_TARGET_SQL = """
+SELECT target,
+       count(DISTINCT user_id) FILTER (WHERE event = 'direction_view') AS viewed,
+       count(DISTINCT user_id) FILTER (WHERE event = 'courses_view') AS courses,
+       count(DISTINCT user_id) FILTER (WHERE event = 'tariffs_view') AS tariffs
+FROM analytics_events
+WHERE ts >= now() - make_interval(days => $1)
+GROUP BY target
+ORDER BY viewed DESC, tariffs DESC
+"""
+
+ANALYTICS_DROPPED = registry.register(Counter(
+    "bot_analytics_dropped_total", "События аналитики, отброшенные из-за переполненного буфера",
+))
+ANALYTICS_WRITTEN = registry.register(Counter(
+    "bot_analytics_written_total", "События аналитики, записанные в БД",
+))
+
+
+class Analytics:
+    """Буфер событий аналитики с пакетной записью в PostgreSQL.
+
+    track() только добавляет кортеж в список в памяти. Фоновая задача раз в
+    flush_interval секунд (или раньше, когда набралось batch_size событий)
+    пишет все накопленное одним COPY. Буфер ограничен capacity: если БД не
+    успевает, новые события отбрасываются и считаются в dropped, а
+    обработчики не ждут БД. Без PostgreSQL события не собираются.
+    """
+
+    def __init__(
+        self,
+        capacity: int = ANALYTICS_BUFFER_SIZE,
+        batch_size: int = ANALYTICS_BATCH_SIZE,
+        flush_interval: float = ANALYTICS_FLUSH_INTERVAL
+    ):
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._buffer: List[Tuple[float, int, str, str]] = []
+        self._enabled = False
+        self._wakeup = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+        registry.gauge("bot_analytics_buffer", "События аналитики в буфере", lambda: len(self._buffer))
+
+    def track(self, user_id: int, event: str, target: str = "") -> bool:
+        """Записать событие. False - событие отброшено (буфер полон или аналитика выключена)."""
+        if not self._enabled:
+            return False
+        if len(self._buffer) >= self.capacity:
+            self.dropped += 1
+            ANALYTICS_DROPPED.inc()
+            return False
+        self._buffer.append((time.time(), user_id, event, target))
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    async def start(self) -> None:
+        """Создать таблицу и запустить фоновую запись (только при PostgreSQL)."""
+        pool = await get_pool()
+        if pool is None:
+            logger.warning("PostgreSQL не настроен - аналитика воронки не собирается")
+            return
+        await pool.execute(CREATE_TABLE_SQL)
+        self._enabled = True
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        """Остановить фоновую запись и записать остаток буфера."""
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Не удалось записать аналитику при остановке: {e}")
+        self._enabled = False
+
+    async def _flush_loop(self) -> None:
+        while True:
+            # asyncio.wait, а не wait_for: wait_for в 3.11 может проглотить отмену задачи
+            waiter = asyncio.ensure_future(self._wakeup.wait())
+            try:
+                await asyncio.wait([waiter], timeout=self.flush_interval)
+            finally:
+                waiter.cancel()
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Ошибка при записи аналитики в БД: {e}")
+
+    async def flush(self) -> None:
+        """Записать накопленные события одним COPY."""
+        if not self._buffer:
+            return
+
+        batch, self._buffer = self._buffer, []
+        records = [
+            (datetime.fromtimestamp(ts, tz=timezone.utc), user_id, event, target)
+            for ts, user_id, event, target in batch
+        ]
+        pool = await get_pool()
+        try:
+            await pool.copy_records_to_table(
+                "analytics_events", records=records, columns=("ts", "user_id", "event", "target")
+            )
+        except Exception:
+            # Возвращаем пакет в начало буфера, лишнее сверх capacity отбрасываем
+            self._buffer = batch + self._buffer
+            overflow = len(self._buffer) - self.capacity
+            if overflow > 0:
+                del self._buffer[:overflow]
+                self.dropped += overflow
+                ANALYTICS_DROPPED.inc(value=overflow)
+            raise
+        ANALYTICS_WRITTEN.inc(value=len(records))
+
+    async def funnel(self, days: int = 7) -> Tuple[Dict[str, int], List[Dict[str, object]]]:
+        """Воронка за days дней: итог и разбивка по направлениям."""
+        await self.flush()
+        pool = await get_pool()
+        total = await pool.fetchrow(FUNNEL_SQL, days)
+        by_target = await pool.fetch(FUNNEL_BY_TARGET_SQL, days)
+        return dict(total), [dict(row) for row in by_target]
+
+
+analytics = Analytics()
@@ -0,0 +1,294 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import BLOCKLIST_CACHE_SIZE, BLOCKLIST_FLUSH_INTERVAL, BLOCKLIST_SYNC, REDIS_KEY_PREFIX
+
+from .db import get_pool
+from .metrics import registry
+from .redis_pool import get_redis
+
+logger = logging.getLogger(__name__)
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS spam_blocklist (
+    user_id BIGINT PRIMARY KEY,
+    reason TEXT,
+    blocked_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    expires_at TIMESTAMPTZ
+)
+"""
+
+# Маркер "пользователь точно не заблокирован" в кэше
+NOT_BLOCKED = -1.0
+
+# Канал Redis, через который процессы бота сообщают друг другу о блокировках
+SYNC_CHANNEL = f"{REDIS_KEY_PREFIX}:blocklist"
+
+
+class BloomFilter:
+    """Фильтр Блума для быстрого ответа "точно не в списке" без обращения к БД."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, int(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: int):
+        digest = hashlib.blake2b(value.to_bytes(8, 'big', signed=True), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:], 'big') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value: int) -> None:
+        for pos in self._positions(value):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, value: int) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+
+class Blocklist:
+    """Список заблокированных пользователей.
+
+    Проверка на горячем пути идет только по памяти: фильтр Блума отвечает
+    "точно не заблокирован" для подавляющего большинства пользователей,
+    LRU-кэш хранит сами блокировки со сроком действия. В БД (PostgreSQL
+    из DATABASE_URL) изменения пишутся пачками в фоне. Без PostgreSQL
+    список работает только в памяти.
+
+    С sync=True (несколько процессов бота) каждая блокировка и разблокировка
+    публикуется в Redis, и остальные процессы сразу обновляют свою память.
+    """
+
+    def __init__(
+        self,
+        cache_size: int = BLOCKLIST_CACHE_SIZE,
+        flush_interval: float = BLOCKLIST_FLUSH_INTERVAL,
+        sync: bool = BLOCKLIST_SYNC
+    ):
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        self.sync = sync
+        # user_id -> время окончания блокировки (0 - навсегда, NOT_BLOCKED - не заблокирован)
+        self._cache: "OrderedDict[int, float]" = OrderedDict()
+        self._bloom = BloomFilter(cache_size)
+        # Отложенные записи: user_id -> (reason, expires_at) или None для разблокировки
+        self._pending: Dict[int, Optional[Tuple[str, float]]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._sync_task: Optional[asyncio.Task] = None
+        self._publish_tasks: Set[asyncio.Task] = set()
+        # Есть ли БД: None - еще не известно (до start), изменения копятся до проверки
+        self._persistent: Optional[bool] = None
+
+    def _remember(self, user_id: int, expires_at: float) -> None:
+        self._cache[user_id] = expires_at
+        self._cache.move_to_end(user_id)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def check_cached(self, user_id: int) -> Optional[bool]:
+        """Проверка без I/O. None - ответа в памяти нет, нужно спросить БД."""
+        if user_id not in self._bloom:
+            return False
+
+        expires_at = self._cache.get(user_id)
+        if expires_at is None:
+            return None if self._persistent else False
+        if expires_at == NOT_BLOCKED:
+            return False
+        if expires_at and expires_at <= time.time():
+            self._remember(user_id, NOT_BLOCKED)
+            return False
+
+        self._cache.move_to_end(user_id)
+        return True
+
+    async def is_blocked(self, user_id: int) -> bool:
+        """Заблокирован ли пользователь."""
+        cached = self.check_cached(user_id)
+        if cached is not None:
+            return cached
+
+        # Сюда попадаем только при ложном срабатывании фильтра Блума
+        # или если блокировка вытеснена из LRU
+        pool = await get_pool()
+        row = await pool.fetchrow(
+            "SELECT expires_at FROM spam_blocklist WHERE user_id = $1 "
+            "AND (expires_at IS NULL OR expires_at > now())",
+            user_id
+        )
+        if row is None:
+            self._remember(user_id, NOT_BLOCKED)
+            return False
+        self._remember(user_id, row['expires_at'].timestamp() if row['expires_at'] else 0)
+        return True
+
+    def block(self, user_id: int, reason: str = "", ttl: Optional[float] = None) -> None:
+        """Заблокировать пользователя (ttl в секундах, None - навсегда)."""
+        expires_at = time.time() + ttl if ttl else 0
+        self._bloom.add(user_id)
+        self._remember(user_id, expires_at)
+        self._queue(user_id, (reason, expires_at))
+        self._publish(user_id, expires_at)
+
+    def unblock(self, user_id: int) -> bool:
+        """Снять блокировку. Возвращает True, если пользователь был заблокирован."""
+        was_blocked = self.check_cached(user_id) is not False
+        if user_id in self._bloom:
+            self._remember(user_id, NOT_BLOCKED)
+        self._queue(user_id, None)
+        self._publish(user_id, None)
+        return was_blocked
+
+    def _queue(self, user_id: int, value: Optional[Tuple[str, float]]) -> None:
+        """Отложить запись в БД. Без БД записывать некуда - очередь не растет."""
+        if self._persistent is not False:
+            self._pending[user_id] = value
+
+    def _publish(self, user_id: int, expires_at: Optional[float]) -> None:
+        """Сообщить другим процессам о (раз)блокировке. В БД пишет только этот процесс."""
+        if not self.sync:
+            return
+        message = json.dumps({"pid": os.getpid(), "user_id": user_id, "expires_at": expires_at})
+        task = asyncio.create_task(get_redis().publish(SYNC_CHANNEL, message))
+        self._publish_tasks.add(task)
+        task.add_done_callback(self._publish_tasks.discard)
+
+    def _apply_remote(self, message: Dict) -> None:
+        if message["pid"] == os.getpid():
+            return
+        user_id, expires_at = message["user_id"], message["expires_at"]
+        if expires_at is None:
+            if user_id in self._bloom:
+                self._remember(user_id, NOT_BLOCKED)
+        else:
+            self._bloom.add(user_id)
+            self._remember(user_id, expires_at)
+
+    async def _sync_loop(self) -> None:
+        while True:
+            pubsub = get_redis().pubsub()
+            try:
+                await pubsub.subscribe(SYNC_CHANNEL)
+                async for item in pubsub.listen():
+                    if item["type"] == "message":
+                        self._apply_remote(json.loads(item["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Синхронизация блоклиста через Redis прервалась: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def blocked_count(self) -> int:
+        """Сколько активных блокировок сейчас в памяти."""
+        now = time.time()
+        return sum(1 for value in self._cache.values() if value == 0 or value > now)
+
+    async def start(self) -> None:
+        """Загрузить активные блокировки из БД и запустить фоновую запись."""
+        if self.sync and self._sync_task is None:
+            self._sync_task = asyncio.create_task(self._sync_loop())
+
+        pool = await get_pool()
+        if pool is None:
+            logger.warning("PostgreSQL не настроен - блоклист хранится только в памяти")
+            self._persistent = False
+            self._pending.clear()
+            return
+
+        await pool.execute(CREATE_TABLE_SQL)
+        rows = await pool.fetch(
+            "SELECT user_id, expires_at FROM spam_blocklist "
+            "WHERE expires_at IS NULL OR expires_at > now() "
+            "ORDER BY blocked_at DESC"
+        )
+        # В фильтр Блума попадают все блокировки, в LRU - только самые свежие
+        self._bloom = BloomFilter(max(self.cache_size, len(rows) * 2))
+        for user_id in self._pending:
+            self._bloom.add(user_id)
+        for row in rows:
+            self._bloom.add(row['user_id'])
+        for row in reversed(rows[:self.cache_size]):
+            self._remember(row['user_id'], row['expires_at'].timestamp() if row['expires_at'] else 0)
+
+        self._persistent = True
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        logger.info(f"Загружено блокировок из БД: {len(rows)}")
+
+    async def close(self) -> None:
+        """Остановить фоновую запись и сбросить несохраненные изменения."""
+        if self._sync_task:
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+            self._sync_task = None
+        if self._publish_tasks:
+            await asyncio.gather(*self._publish_tasks, return_exceptions=True)
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Ошибка при записи блоклиста в БД: {e}")
+
+    async def flush(self) -> None:
+        """Записать накопленные изменения в БД одной транзакцией."""
+        if not self._pending or not self._persistent:
+            return
+
+        pending, self._pending = self._pending, {}
+        upserts: List[tuple] = []
+        deletes: List[tuple] = []
+        for user_id, value in pending.items():
+            if value is None:
+                deletes.append((user_id,))
+            else:
+                reason, expires_at = value
+                expires = datetime.fromtimestamp(expires_at, tz=timezone.utc) if expires_at else None
+                upserts.append((user_id, reason, expires))
+
+        pool = await get_pool()
+        try:
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    if upserts:
+                        await conn.executemany(
+                            "INSERT INTO spam_blocklist (user_id, reason, expires_at) VALUES ($1, $2, $3) "
+                            "ON CONFLICT (user_id) DO UPDATE SET reason = EXCLUDED.reason, "
+                            "blocked_at = now(), expires_at = EXCLUDED.expires_at",
+                            upserts
+                        )
+                    if deletes:
+                        await conn.executemany("DELETE FROM spam_blocklist WHERE user_id = $1", deletes)
+        except Exception:
+            # Возвращаем изменения в очередь, более свежие записи не перетираем
+            for user_id, value in pending.items():
+                self._pending.setdefault(user_id, value)
+            raise
+
+
+blocklist = Blocklist()
+
+registry.gauge("bot_blocked_users", "Активные блокировки в памяти", blocklist.blocked_count)
@@ -0,0 +1,315 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+
+from config import BROADCAST_BATCH_SIZE, BROADCAST_CONCURRENCY
+from keyboards import get_tariffs_keyboard
+
+from .db import get_pool
+from .metrics import Counter, registry
+from .profiles import ProfileStore, profiles
+from .send_scheduler import background_priority
+from .users import UserRegistry, users
+
+logger = logging.getLogger(__name__)
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS broadcasts (
+    id BIGSERIAL PRIMARY KEY,
+    admin_id BIGINT NOT NULL,
+    text TEXT,
+    from_chat_id BIGINT,
+    message_id BIGINT,
+    status TEXT NOT NULL,
+    last_user_id BIGINT NOT NULL DEFAULT 0,
+    sent INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    deactivated INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+
+# Статусы рассылки
+RUNNING = "running"
+PAUSED = "paused"  # остановлена админом или при выключении бота, можно продолжить
+DONE = "done"
+CANCELLED = "cancelled"
+
+BROADCAST_MESSAGES = registry.register(Counter(
+    "bot_broadcast_messages_total", "Сообщения рассылок по результату", ("result",),
+))
+
+
+@dataclass
+class BroadcastState:
+    """Рассылка и ее контрольная точка: все пользователи с id <= last_user_id обработаны."""
+
+    id: int
+    admin_id: int
+    text: Optional[str] = None  # текст рассылки (HTML)
+    from_chat_id: Optional[int] = None  # или сообщение, которое копируется всем
+    message_id: Optional[int] = None
+    status: str = RUNNING
+    last_user_id: int = 0
+    sent: int = 0
+    failed: int = 0
+    deactivated: int = 0
+
+    def summary(self) -> str:
+        return (f"#{self.id} ({self.status}): отправлено {self.sent}, ошибок {self.failed}, "
+                f"отписались {self.deactivated}")
+
+
+class Broadcaster:
+    """Рассылка сообщения всем активным пользователям.
+
+    Получатели читаются из UserRegistry страницами по batch_size (по
+    возрастанию user_id), в памяти держится не больше пары страниц.
+    concurrency задач отправляют сообщения с фоновым приоритетом, общий
+    темп задает SendScheduler (лимиты Telegram), ответы пользователям
+    проходят вперед рассылки. Пользователи, заблокировавшие бота, сразу
+    исключаются из списка, отключившие уведомления в настройках -
+    пропускаются.
+
+    После каждой страницы в БД сохраняется контрольная точка - наибольший
+    user_id, до которого включительно все отправки завершены. Прерванная
+    рассылка продолжается с нее; повторно могут уйти только сообщения,
+    которые были в полете в момент остановки.
+    """
+
+    def __init__(
+        self,
+        user_registry: UserRegistry = users,
+        profile_store: ProfileStore = profiles,
+        batch_size: int = BROADCAST_BATCH_SIZE,
+        concurrency: int = BROADCAST_CONCURRENCY
+    ):
+        self.users = user_registry
+        self.profiles = profile_store
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.current: Optional[BroadcastState] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop_status: Optional[str] = None
+        # Рассылки без PostgreSQL: id -> состояние
+        self._memory: Dict[int, BroadcastState] = {}
+        self._persistent = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Создать таблицу рассылок (только при PostgreSQL)."""
+        pool = await get_pool()
+        if pool is None:
+            return
+        await pool.execute(CREATE_TABLE_SQL)
+        self._persistent = True
+
+    async def close(self) -> None:
+        """Приостановить идущую рассылку, сохранив контрольную точку."""
+        await self.stop(PAUSED)
+
+    async def begin(
+        self,
+        bot: Bot,
+        admin_id: int,
+        text: Optional[str] = None,
+        from_chat_id: Optional[int] = None,
+        message_id: Optional[int] = None
+    ) -> BroadcastState:
+        """Начать новую рассылку текста или копии сообщения from_chat_id/message_id."""
+        if self.running:
+            raise RuntimeError("Рассылка уже идет")
+        state = await self._create(admin_id, text, from_chat_id, message_id)
+        self._launch(bot, state)
+        return state
+
+    async def resume(self, bot: Bot) -> Optional[BroadcastState]:
+        """Продолжить последнюю незавершенную рассылку с ее контрольной точки."""
+        if self.running:
+            raise RuntimeError("Рассылка уже идет")
+        state = await self._last_unfinished()
+        if state is None:
+            return None
+        state.status = RUNNING
+        self._launch(bot, state)
+        return state
+
+    async def stop(self, status: str = PAUSED) -> Optional[BroadcastState]:
+        """Остановить рассылку (PAUSED - можно продолжить, CANCELLED - нет).
+
+        CANCELLED без идущей рассылки отменяет последнюю приостановленную.
+        """
+        if not self.running:
+            if status != CANCELLED:
+                return None
+            state = await self._last_unfinished()
+            if state is not None:
+                state.status = CANCELLED
+                await self._save(state)
+            return state
+        self._stop_status = status
+        await asyncio.shield(self._task)
+        return self.current
+
+    async def wait(self) -> None:
+        """Дождаться окончания идущей рассылки."""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    def _launch(self, bot: Bot, state: BroadcastState) -> None:
+        self.current = state
+        self._stop_status = None
+        self._task = asyncio.create_task(self._run(bot, state))
+        logger.info(f"Рассылка #{state.id} запущена с user_id > {state.last_user_id}")
+
+    async def _send_one(self, bot: Bot, state: BroadcastState, user_id: int, markup) -> None:
+        try:
+            if state.text is not None:
+                await bot.send_message(user_id, state.text, reply_markup=markup)
+            else:
+                await bot.copy_message(user_id, state.from_chat_id, state.message_id, reply_markup=markup)
+        except TelegramForbiddenError:
+            # Бот заблокирован или аккаунт удален - больше не пишем
+            self.users.deactivate(user_id)
+            state.deactivated += 1
+            BROADCAST_MESSAGES.inc("deactivated")
+        except TelegramBadRequest as e:
+            if "chat not found" in e.message.lower():
+                self.users.deactivate(user_id)
+                state.deactivated += 1
+                BROADCAST_MESSAGES.inc("deactivated")
+            else:
+                state.failed += 1
+                BROADCAST_MESSAGES.inc("failed")
+                logger.warning("Рассылка #%s: ошибка отправки %s: %s", state.id, user_id, e)
+        except Exception as e:
+            state.failed += 1
+            BROADCAST_MESSAGES.inc("failed")
+            logger.warning("Рассылка #%s: ошибка отправки %s: %s", state.id, user_id, e)
+        else:
+            state.sent += 1
+            BROADCAST_MESSAGES.inc("sent")
+
+    @staticmethod
+    def _advance(state: BroadcastState, pending: Dict[int, bool]) -> None:
+        """Сдвинуть контрольную точку по непрерывному префиксу завершенных отправок."""
+        completed = []
+        for user_id, done in pending.items():
+            if not done:
+                break
+            completed.append(user_id)
+        for user_id in completed:
+            del pending[user_id]
+        if completed:
+            state.last_user_id = completed[-1]
+
+    async def _run(self, bot: Bot, state: BroadcastState) -> None:
+        markup = get_tariffs_keyboard()
+        queue: asyncio.Queue = asyncio.Queue(self.concurrency * 2)
+        # user_id -> завершена ли отправка, в порядке выдачи
+        pending: Dict[int, bool] = {}
+
+        async def worker() -> None:
+            while True:
+                user_id = await queue.get()
+                try:
+                    await self._send_one(bot, state, user_id, markup)
+                    pending[user_id] = True
+                finally:
+                    queue.task_done()
+
+        # Задачи наследуют контекст, поэтому все их запросы идут с фоновым приоритетом
+        with background_priority():
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            after = state.last_user_id
+            while self._stop_status is None:
+                page = await self.users.fetch_active(after, self.batch_size)
+                if not page:
+                    break
+                # Отключившие уведомления в настройках пропускаются
+                muted = await self.profiles.muted(page)
+                for user_id in page:
+                    if self._stop_status is not None:
+                        break
+                    if user_id in muted:
+                        continue
+                    pending[user_id] = False
+                    await queue.put(user_id)
+                after = page[-1]
+                self._advance(state, pending)
+                await self._save(state)
+            if self._stop_status is None:
+                await queue.join()
+                state.status = DONE
+        except Exception as e:
+            logger.error(f"Рассылка #{state.id} прервана: {e}")
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self._advance(state, pending)
+            if state.status == RUNNING:
+                state.status = self._stop_status or PAUSED
+            try:
+                await self._save(state)
+            except Exception as e:
+                logger.error(f"Не удалось сохранить рассылку #{state.id}: {e}")
+
+        logger.info(f"Рассылка {state.summary()}")
+        try:
+            await bot.send_message(state.admin_id, f"📣 Рассылка {state.summary()}")
+        except Exception as e:
+            logger.error(f"Не удалось отправить итог рассылки админу: {e}")
+
+    async def _create(
+        self,
+        admin_id: int,
+        text: Optional[str],
+        from_chat_id: Optional[int],
+        message_id: Optional[int]
+    ) -> BroadcastState:
+        if not self._persistent:
+            state = BroadcastState(len(self._memory) + 1, admin_id, text, from_chat_id, message_id)
+            self._memory[state.id] = state
+            return state
+        pool = await get_pool()
+        broadcast_id = await pool.fetchval(
+            "INSERT INTO broadcasts (admin_id, text, from_chat_id, message_id, status) "
+            "VALUES ($1, $2, $3, $4, $5) RETURNING id",
+            admin_id, text, from_chat_id, message_id, RUNNING
+        )
+        return BroadcastState(broadcast_id, admin_id, text, from_chat_id, message_id)
+
+    async def _save(self, state: BroadcastState) -> None:
+        if not self._persistent:
+            return
+        pool = await get_pool()
+        await pool.execute(
+            "UPDATE broadcasts SET status = $2, last_user_id = $3, sent = $4, failed = $5, "
+            "deactivated = $6, updated_at = now() WHERE id = $1",
+            state.id, state.status, state.last_user_id, state.sent, state.failed, state.deactivated
+        )
+
+    async def _last_unfinished(self) -> Optional[BroadcastState]:
+        if not self._persistent:
+            unfinished = [state for state in self._memory.values() if state.status in (RUNNING, PAUSED)]
+            return unfinished[-1] if unfinished else None
+        pool = await get_pool()
+        row = await pool.fetchrow(
+            "SELECT id, admin_id, text, from_chat_id, message_id, status, last_user_id, sent, failed, deactivated "
+            "FROM broadcasts WHERE status IN ($1, $2) ORDER BY id DESC LIMIT 1",
+            RUNNING, PAUSED
+        )
+        return BroadcastState(**dict(row)) if row else None
+
+
+broadcaster = Broadcaster()
@@ -0,0 +1,184 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple, Type
+
+from aiogram import Router
+from aiogram.dispatcher.event.bases import UNHANDLED, SkipHandler
+from aiogram.dispatcher.event.handler import CallbackType, HandlerObject
+from aiogram.dispatcher.event.telegram import TelegramEventObserver
+from aiogram.filters.callback_data import CallbackData, CallbackQueryFilter
+from aiogram.types import CallbackQuery
+from magic_filter import MagicFilter
+
+
+class RouteCollisionError(ValueError):
+    """Одни и те же callback data подходят под два маршрута."""
+
+
+class _Node:
+    __slots__ = ("children", "exact", "prefix")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        # (ключ, значение) записи, которая заканчивается в этом узле
+        self.exact: Optional[Tuple[str, Any]] = None
+        self.prefix: Optional[Tuple[str, Any]] = None
+
+
+class CallbackTrie:
+    """Префиксное дерево: callback data -> значение.
+
+    Запись - точная строка или префикс, после которого идет что угодно.
+    Поиск идет по символам data и останавливается на первом префиксе, то
+    есть стоит O(len(data)) при любом числе записей. Записи, под которые
+    подходят одни и те же data, не добавляются (RouteCollisionError), поэтому
+    результат не зависит от порядка добавления.
+    """
+
+    def __init__(self):
+        self._root = _Node()
+        self.size = 0
+
+    @staticmethod
+    def _any_key(node: _Node) -> str:
+        while True:
+            entry = node.exact or node.prefix
+            if entry:
+                return entry[0]
+            node = next(iter(node.children.values()))
+
+    def add(self, key: str, value: Any, prefix: bool = False) -> None:
+        if not key:
+            raise ValueError("Пустой ключ callback data")
+        node = self._root
+        for char in key:
+            if node.prefix:
+                raise RouteCollisionError(f"{key!r} начинается с префикса {node.prefix[0]!r}")
+            node = node.children.setdefault(char, _Node())
+        other = node.prefix or node.exact
+        if other is None and prefix and node.children:
+            # Префикс накрыл бы уже добавленные более длинные ключи
+            other = (self._any_key(node), None)
+        if other is not None:
+            raise RouteCollisionError(f"{key!r} пересекается с {other[0]!r}")
+        if prefix:
+            node.prefix = (key, value)
+        else:
+            node.exact = (key, value)
+        self.size += 1
+
+    def match(self, data: str) -> Optional[Tuple[str, Any]]:
+        """(ключ, значение) записи, под которую подходят data, или None."""
+        node = self._root
+        for char in data:
+            node = node.children.get(char)
+            if node is None:
+                return None
+            if node.prefix is not None:
+                return node.prefix
+        return node.exact
+
+
+@dataclass
+class CallbackRoute:
+    """Обработчик callback data одного класса."""
+
+    callback_data: Type[CallbackData]
+    handler: HandlerObject
+    rule: Optional[MagicFilter] = None
+
+    def parse(self, data: str, legacy_key: Optional[str] = None) -> CallbackData:
+        """Разобрать data в экземпляр callback_data (TypeError/ValueError - не подходят)."""
+        cls = self.callback_data
+        fields = cls.model_fields
+        if legacy_key is None:
+            return cls.unpack(data) if fields else cls()
+        # Старый формат: "<префикс>_<значение первого поля>" или точное значение
+        if not fields:
+            return cls()
+        return cls(**{next(iter(fields)): data[len(legacy_key):]})
+
+
+class CallbackRouteObserver(TelegramEventObserver):
+    """callback_query, в котором обработчик выбирается по таблице, а не перебором фильтров.
+
+    Каждый обработчик регистрируется с одним фильтром <CallbackData>.filter()
+    (и, если нужно, другими фильтрами - они проверяются после выбора
+    маршрута). Ключи - упакованный формат класса и его legacy; пересечение
+    ключей двух обработчиков - ошибка при импорте модуля, то есть при старте.
+    """
+
+    def __init__(self, router: Router, event_name: str):
+        super().__init__(router=router, event_name=event_name)
+        self.routes = CallbackTrie()
+
+    def register(
+        self,
+        callback: CallbackType,
+        *filters: CallbackType,
+        flags: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> CallbackType:
+        route_filters = [item for item in filters if isinstance(item, CallbackQueryFilter)]
+        if len(route_filters) != 1:
+            raise ValueError(f"Обработчику {callback.__name__} нужен ровно один фильтр <CallbackData>.filter()")
+        route_filter = route_filters[0]
+        super().register(callback, *(item for item in filters if item is not route_filter), flags=flags, **kwargs)
+
+        cls = route_filter.callback_data
+        route = CallbackRoute(cls, self.handlers[-1], route_filter.rule)
+        if cls.model_fields:
+            self.routes.add(cls.__prefix__ + cls.__separator__, (route, False), prefix=True)
+        else:
+            self.routes.add(cls.__prefix__, (route, False))
+        for key in getattr(cls, "legacy", ()):
+            if key.endswith("_"):
+                self.routes.add(key, (route, True), prefix=True)
+            elif cls.model_fields:
+                raise ValueError(f"{cls.__name__}: точное legacy {key!r} не задает значения полей")
+            else:
+                self.routes.add(key, (route, True))
+        return callback
+
+    def route(self, data: str) -> Optional[CallbackRoute]:
+        """Маршрут, под который подходят data (без разбора полей), или None."""
+        found = self.routes.match(data)
+        return found[1][0] if found else None
+
+    async def trigger(self, event: CallbackQuery, **kwargs: Any) -> Any:
+        data = event.data or ""
+        found = self.routes.match(data)
+        if found is None:
+            return UNHANDLED
+        key, (route, legacy) = found
+        try:
+            callback_data = route.parse(data, key if legacy else None)
+        except (TypeError, ValueError):
+            return UNHANDLED
+        if route.rule is not None and not route.rule.resolve(callback_data):
+            return UNHANDLED
+
+        kwargs["handler"] = route.handler
+        kwargs["callback_data"] = callback_data
+        result, extra = await route.handler.check(event, **kwargs)
+        if not result:
+            return UNHANDLED
+        kwargs.update(extra)
+        try:
+            wrapped_inner = self.outer_middleware.wrap_middlewares(self._resolve_middlewares(), route.handler.call)
+            return await wrapped_inner(event, kwargs)
+        except SkipHandler:
+            return UNHANDLED
+
+
+class CallbackRouter(Router):
+    """Router, в котором callback_query выбираются по CallbackTrie."""
+
+    def __init__(self, *, name: Optional[str] = None):
+        super().__init__(name=name)
+        self.callback_query = self.observers["callback_query"] = CallbackRouteObserver(
+            router=self, event_name="callback_query"
+        )
+
+
+# Все callback'и бота - одна таблица, порядок подключения роутеров для них не важен
+callback_router = CallbackRouter(name="callbacks")
@@ -1,14 +1,43 @@
+import asyncio
+import inspect
 import json
 import logging
-from typing import List, Dict, Any
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from config import CATALOG_POLL_INTERVAL
 
 logger = logging.getLogger(__name__)
 
+DIRECTIONS_FILE = Path('data/directions.json')
+
+# Обязательные поля направлений и курсов
+DIRECTION_FIELDS = ('id', 'title', 'emoji', 'description')
+COURSE_FIELDS = ('name', 'description', 'income', 'price_basic', 'price_with_chat')
+# Поля, которые экраны (utils/screens.py) берут у отдельных направлений
+DIRECTION_SCREEN_FIELDS = {
+    'task_execution': ('income_per_task', 'daily_tasks', 'monthly_income'),
+    'curator_online_school': ('income', 'commission'),
+}
+# Экран "Что нужно делать" есть у направлений с tasks, ему нужны и эти поля
+TASKS_FIELDS = ('who_pays', 'advantages')
+# Списки, которые экраны перебирают построчно
+LIST_FIELDS = ('specializations', 'courses', 'tasks', 'who_pays')
+# id направления попадает в callback data ("c:<id>"), а они не длиннее 64 байт
+MAX_ID_BYTES = 60
+
+
+class CatalogError(ValueError):
+    """Файл каталога не прошел проверку."""
+
 
 def load_directions() -> List[Dict[str, Any]]:
     """Загружает данные направлений из JSON файла."""
     try:
-        with open('data/directions.json', 'r', encoding='utf-8') as f:
+        with open(DIRECTIONS_FILE, 'r', encoding='utf-8') as f:
             return json.load(f)
     except FileNotFoundError:
         logger.error("Файл directions.json не найден")
@@ -21,3 +50,172 @@ def load_directions() -> List[Dict[str, Any]]:
 def get_direction_by_id(directions: List[Dict[str, Any]], direction_id: str) -> Dict[str, Any]:
     """Возвращает направление по ID."""
     return next((d for d in directions if d['id'] == direction_id), None)
+
+
+def validate_directions(data: Any) -> None:
+    """Проверить структуру directions.json, при ошибке - CatalogError."""
+    if not isinstance(data, list):
+        raise CatalogError("Ожидается список направлений")
+
+    seen = set()
+    for index, direction in enumerate(data):
+        if not isinstance(direction, dict):
+            raise CatalogError(f"Направление #{index} должно быть объектом")
+        missing = [name for name in DIRECTION_FIELDS if not isinstance(direction.get(name), str)]
+        if missing:
+            raise CatalogError(f"Направление #{index}: нет полей {', '.join(missing)}")
+        dir_id = direction['id']
+        if dir_id in seen:
+            raise CatalogError(f"Повторяется id направления: {dir_id}")
+        seen.add(dir_id)
+        if ':' in dir_id or len(dir_id.encode()) > MAX_ID_BYTES:
+            raise CatalogError(f"id направления {dir_id!r}: без \":\" и не длиннее {MAX_ID_BYTES} байт")
+
+        required = DIRECTION_SCREEN_FIELDS.get(dir_id, ()) + (TASKS_FIELDS if 'tasks' in direction else ())
+        missing = [name for name in required if name not in direction]
+        if missing:
+            raise CatalogError(f"Направление {dir_id}: нет полей {', '.join(missing)}")
+        not_lists = [name for name in LIST_FIELDS if name in direction and not isinstance(direction[name], list)]
+        if not_lists:
+            raise CatalogError(f"Направление {dir_id}: поля {', '.join(not_lists)} должны быть списками")
+
+        for course in direction.get('courses', []):
+            if not isinstance(course, dict):
+                raise CatalogError(f"Курс в {dir_id} должен быть объектом")
+            missing = [name for name in COURSE_FIELDS if name not in course]
+            if missing:
+                raise CatalogError(f"Курс в {dir_id}: нет полей {', '.join(missing)}")
+
+
+def _freeze(value: Any) -> Any:
+    """Сделать данные неизменяемыми: dict -> MappingProxyType, list -> tuple."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Неизменяемый снимок каталога с индексами по id направления и названию курса."""
+
+    directions: Tuple[Mapping[str, Any], ...] = ()
+    by_id: Mapping[str, Mapping[str, Any]] = field(default_factory=lambda: MappingProxyType({}))
+    by_course: Mapping[str, Mapping[str, Any]] = field(default_factory=lambda: MappingProxyType({}))
+    mtime: Optional[float] = None
+
+    @classmethod
+    def build(cls, data: List[Dict[str, Any]], mtime: Optional[float] = None) -> "CatalogSnapshot":
+        validate_directions(data)
+        directions = _freeze(data)
+        by_id = {direction['id']: direction for direction in directions}
+        by_course = {
+            course['name']: course
+            for direction in directions
+            for course in direction.get('courses', ())
+        }
+        return cls(directions, MappingProxyType(by_id), MappingProxyType(by_course), mtime)
+
+    def direction(self, direction_id: str) -> Optional[Mapping[str, Any]]:
+        return self.by_id.get(direction_id)
+
+    def course(self, name: str) -> Optional[Mapping[str, Any]]:
+        return self.by_course.get(name)
+
+
+def _read_catalog(path: Path) -> Tuple[List[Dict[str, Any]], float]:
+    mtime = os.stat(path).st_mtime
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f), mtime
+
+
+class Catalog:
+    """Каталог направлений и курсов.
+
+    Хранит текущий снимок и атомарно подменяет его, когда меняется
+    data/directions.json (проверка mtime в фоне, чтение - в отдельном потоке).
+    Если новый файл битый, остается предыдущий снимок.
+    """
+
+    def __init__(self, path: Path = DIRECTIONS_FILE, poll_interval: float = CATALOG_POLL_INTERVAL):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._subscribers: List[Callable[[CatalogSnapshot], Any]] = []
+        self._watch_task: Optional[asyncio.Task] = None
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        """Текущий снимок каталога (при первом обращении читается с диска)."""
+        if self._snapshot is None:
+            self.load()
+        return self._snapshot
+
+    def load(self) -> None:
+        """Синхронно прочитать каталог (при старте бота)."""
+        try:
+            data, mtime = _read_catalog(self.path)
+            self._snapshot = CatalogSnapshot.build(data, mtime)
+        except (OSError, json.JSONDecodeError, CatalogError) as e:
+            logger.error(f"Не удалось загрузить каталог {self.path}: {e}")
+            self._snapshot = CatalogSnapshot()
+        logger.info(f"Каталог загружен: {len(self._snapshot.directions)} направлений")
+
+    def subscribe(self, callback: Callable[[CatalogSnapshot], Any]) -> None:
+        """Вызывать callback(snapshot) после каждой подмены каталога."""
+        self._subscribers.append(callback)
+
+    async def reload_if_changed(self) -> bool:
+        """Перечитать файл, если изменился mtime. Возвращает True, если каталог обновлен."""
+        try:
+            mtime = (await asyncio.to_thread(os.stat, self.path)).st_mtime
+        except OSError:
+            return False
+        if self._snapshot is not None and mtime == self._snapshot.mtime:
+            return False
+
+        try:
+            data, mtime = await asyncio.to_thread(_read_catalog, self.path)
+            snapshot = CatalogSnapshot.build(data, mtime)
+        except (OSError, json.JSONDecodeError, CatalogError) as e:
+            logger.error(f"Каталог {self.path} не обновлен, остается прежний: {e}")
+            if self._snapshot is not None:
+                # Не пытаемся перечитывать тот же битый файл на каждой проверке
+                self._snapshot = CatalogSnapshot(
+                    self._snapshot.directions, self._snapshot.by_id, self._snapshot.by_course, mtime
+                )
+            return False
+
+        self._snapshot = snapshot
+        logger.info(f"Каталог обновлен: {len(snapshot.directions)} направлений")
+        for callback in self._subscribers:
+            try:
+                result = callback(snapshot)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Ошибка при обновлении зависимых от каталога данных: {e}")
+        return True
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            await self.reload_if_changed()
+
+    async def start(self) -> None:
+        """Запустить фоновое отслеживание изменений файла."""
+        if self._watch_task is None and self.poll_interval > 0:
+            self._watch_task = asyncio.create_task(self._watch())
+
+    async def close(self) -> None:
+        if self._watch_task:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+
+catalog = Catalog()
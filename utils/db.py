@@ -0,0 +1,36 @@
+import logging
+from typing import Optional
+
+import asyncpg
+
+from config import DATABASE_URL, DB_POOL_MAX_SIZE, DB_POOL_MIN_SIZE
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[asyncpg.Pool] = None
+
+
+def is_postgres_configured() -> bool:
+    """DATABASE_URL указывает на PostgreSQL (asyncpg не работает с sqlite)."""
+    return DATABASE_URL.startswith(("postgres://", "postgresql://"))
+
+
+async def get_pool() -> Optional[asyncpg.Pool]:
+    """Общий пул соединений asyncpg или None, если PostgreSQL не настроен."""
+    global _pool
+    if _pool is None and is_postgres_configured():
+        _pool = await asyncpg.create_pool(
+            DATABASE_URL,
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+        )
+        logger.info(f"Создан пул соединений PostgreSQL (max_size={DB_POOL_MAX_SIZE})")
+    return _pool
+
+
+async def close_pool() -> None:
+    """Закрыть пул соединений asyncpg."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
@@ -1,52 +1,41 @@
 import logging
 from pathlib import Path
+from typing import Union
 
 from aiogram.types import FSInputFile
 
-logger = logging.getLogger(__name__)
+from .image_manifest import CATEGORIES, image_manifest
+from .media_cache import get_photo
 
-# Пути к изображениям
-IMAGES_PATH = Path("images")
-MAIN_IMAGES = IMAGES_PATH / "main"
-DIRECTIONS_IMAGES = IMAGES_PATH / "directions"
-COURSES_IMAGES = IMAGES_PATH / "courses"
-TARIFFS_IMAGES = IMAGES_PATH / "tariffs"
+logger = logging.getLogger(__name__)
 
 
 def get_image_path(category: str, image_name: str) -> Path:
-    """Получить путь к изображению."""
-    category_map = {
-        "main": MAIN_IMAGES,
-        "directions": DIRECTIONS_IMAGES,
-        "courses": COURSES_IMAGES,
-        "tariffs": TARIFFS_IMAGES,
-    }
-
-    if category not in category_map:
+    """Получить путь к изображению (из манифеста, без обращения к диску)."""
+    if category not in CATEGORIES:
         logger.warning(f"Неизвестная категория изображения: {category}")
         return None
 
     # Убираем дублирование .jpg если оно уже есть
-    if not image_name.endswith('.jpg'):
-        image_name = f"{image_name}.jpg"
-
-    image_path = category_map[category] / image_name
+    if image_name.endswith('.jpg'):
+        image_name = image_name[:-len('.jpg')]
 
-    if not image_path.exists():
-        logger.warning(f"Изображение не найдено: {image_path}")
+    entry = image_manifest.get(category, image_name)
+    if entry is None:
+        logger.warning(f"Изображение не найдено: {category}/{image_name}")
         return None
 
-    return image_path
+    return entry.path
 
 
-def get_start_image() -> FSInputFile:
+def get_start_image() -> Union[FSInputFile, str]:
     """Получить изображение для стартового экрана."""
     path = get_image_path("main", "start_screen")
-    logger.info(f"Попытка загрузить стартовое изображение: {path}")
-    return FSInputFile(path) if path else None
+    logger.debug("Стартовое изображение: %s", path)
+    return get_photo(path) if path else None
 
 
-def get_direction_image(direction_id: str) -> FSInputFile:
+def get_direction_image(direction_id: str) -> Union[FSInputFile, str]:
     """Получить изображение для направления."""
     image_map = {
         "online_specialist": "online_specialist",
@@ -56,18 +45,18 @@ def get_direction_image(direction_id: str) -> FSInputFile:
     }
 
     image_name = image_map.get(direction_id)
-    logger.info(f"Ищем изображение для направления {direction_id} -> {image_name}")
+    logger.debug("Изображение для направления %s -> %s", direction_id, image_name)
 
     if not image_name:
         logger.warning(f"Не найдено соответствие для направления: {direction_id}")
         return None
 
     path = get_image_path("directions", image_name)
-    logger.info(f"Путь к изображению направления: {path}")
-    return FSInputFile(path) if path else None
+    logger.debug("Путь к изображению направления: %s", path)
+    return get_photo(path) if path else None
 
 
-def get_course_image(course_name: str) -> FSInputFile:
+def get_course_image(course_name: str) -> Union[FSInputFile, str]:
     """Получить изображение для курса."""
     image_map = {
         "Специалист по чат-ботам": "chatbot_specialist",
@@ -81,17 +70,17 @@ def get_course_image(course_name: str) -> FSInputFile:
         return None
 
     path = get_image_path("courses", image_name)
-    return FSInputFile(path) if path else None
+    return get_photo(path) if path else None
 
 
-def get_courses_overview_image() -> FSInputFile:
+def get_courses_overview_image() -> Union[FSInputFile, str]:
     """Получить изображение для обзора курсов."""
     path = get_image_path("courses", "courses_overview")
-    return FSInputFile(path) if path else None
+    return get_photo(path) if path else None
 
 
-def get_tariffs_image() -> FSInputFile:
+def get_tariffs_image() -> Union[FSInputFile, str]:
     """Получить изображение для тарифов."""
     path = get_image_path("tariffs", "tariffs_payment")
-    logger.info(f"Путь к изображению тарифов: {path}")
-    return FSInputFile(path) if path else None
+    logger.debug("Путь к изображению тарифов: %s", path)
+    return get_photo(path) if path else None
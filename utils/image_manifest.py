@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+
+from config import IMAGE_JPEG_QUALITY, IMAGE_MAX_BYTES, IMAGE_MAX_SIDE, IMAGE_VARIANTS_DIR
+
+from .media_cache import media_cache
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow не обязателен: без него картинки отправляются как есть
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+IMAGES_PATH = Path("images")
+CATEGORIES = ("main", "directions", "courses", "tariffs")
+IMAGE_SUFFIXES = (".jpg", ".jpeg")
+
+
+@dataclass(frozen=True)
+class ImageEntry:
+    """Картинка из манифеста: что отправлять в Telegram и ее хэш."""
+
+    name: str  # "directions/curator_school"
+    source: Path  # исходный файл в images/
+    path: Path  # файл для отправки (оптимизированная копия или исходник)
+    digest: str  # SHA-256 отправляемого файла
+    size: int  # размер отправляемого файла в байтах
+
+
+def _sha256(path: Path) -> str:
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _needs_variant(path: Path, size: int) -> bool:
+    if size > IMAGE_MAX_BYTES:
+        return True
+    with Image.open(path) as image:
+        return max(image.size) > IMAGE_MAX_SIDE
+
+
+def _make_variant(source: Path, target: Path) -> None:
+    """Уменьшить картинку до IMAGE_MAX_SIDE по большей стороне и пережать в JPEG."""
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        image.thumbnail((IMAGE_MAX_SIDE, IMAGE_MAX_SIDE), Image.LANCZOS)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Свое имя у каждого процесса: копии не перезаписывают чужой недописанный файл
+        tmp_path = target.with_suffix(f".{os.getpid()}.tmp")
+        image.save(tmp_path, "JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True, progressive=True)
+        os.replace(tmp_path, target)
+
+
+class ImageManifest:
+    """Манифест картинок: логическое имя -> файл для отправки, хэш и размер.
+
+    Собирается один раз при старте (сканирование images/ в отдельном потоке).
+    Слишком большие картинки пережимаются в IMAGE_VARIANTS_DIR, копии
+    называются по хэшу исходника и настройкам, поэтому пересоздаются только
+    при изменении файла. После сборки поиск картинки не обращается к диску.
+
+    С prepare=False копии не создаются и не удаляются, а только читаются:
+    так манифест собирают процессы-обработчики, копии для них заранее
+    готовит ингресс. Если копии нет, отправляется исходник.
+    """
+
+    def __init__(
+        self,
+        root: Path = IMAGES_PATH,
+        variants_dir: Path = Path(IMAGE_VARIANTS_DIR),
+        categories: Sequence[str] = CATEGORIES
+    ):
+        self.root = Path(root)
+        self.variants_dir = Path(variants_dir)
+        self.categories = tuple(categories)
+        self.prepare = True
+        self._entries: Optional[Mapping[str, ImageEntry]] = None
+
+    def _entry(self, category: str, source: Path) -> Tuple[ImageEntry, Optional[Path]]:
+        name = f"{category}/{source.stem}"
+        source_digest = _sha256(source)
+        size = source.stat().st_size
+        if Image is None or not _needs_variant(source, size):
+            return ImageEntry(name, source, source, source_digest, size), None
+
+        variant = self.variants_dir / category / (
+            f"{source.stem}.{source_digest[:16]}.{IMAGE_MAX_SIDE}q{IMAGE_JPEG_QUALITY}.jpg"
+        )
+        if not variant.exists():
+            if not self.prepare:
+                logger.warning(f"Нет пережатой копии {variant}, отправляется исходник {source}")
+                return ImageEntry(name, source, source, source_digest, size), None
+            _make_variant(source, variant)
+            logger.info(f"Картинка {source} пережата: {size // 1024} -> {variant.stat().st_size // 1024} KiB")
+
+        variant_size = variant.stat().st_size
+        if variant_size >= size:
+            return ImageEntry(name, source, source, source_digest, size), variant
+        return ImageEntry(name, source, variant, _sha256(variant), variant_size), variant
+
+    def _remove_stale_variants(self, used: set) -> None:
+        if not self.variants_dir.exists():
+            return
+        for path in self.variants_dir.rglob("*.jpg"):
+            if path not in used:
+                path.unlink(missing_ok=True)
+
+    def build(self) -> None:
+        """Просканировать images/ и собрать манифест (синхронно)."""
+        if Image is None:
+            logger.warning("Pillow не установлен - картинки отправляются без оптимизации")
+
+        entries: Dict[str, ImageEntry] = {}
+        used_variants = set()
+        for category in self.categories:
+            directory = self.root / category
+            if not directory.is_dir():
+                continue
+            for source in sorted(directory.iterdir()):
+                if source.suffix.lower() not in IMAGE_SUFFIXES:
+                    continue
+                try:
+                    entry, variant = self._entry(category, source)
+                except OSError as e:
+                    logger.error(f"Не удалось обработать картинку {source}: {e}")
+                    continue
+                entries[entry.name] = entry
+                if variant:
+                    used_variants.add(variant)
+
+        if self.prepare:
+            self._remove_stale_variants(used_variants)
+        self._entries = MappingProxyType(entries)
+        # Кэш file_id берет хэши из манифеста, не перечитывая файлы
+        media_cache.set_digests({entry.path: entry.digest for entry in entries.values()})
+        total = sum(entry.size for entry in entries.values())
+        logger.info(f"Манифест картинок: {len(entries)} файлов, {total // 1024} KiB к отправке")
+
+    async def load(self) -> None:
+        """Собрать манифест при старте, не блокируя event loop."""
+        await asyncio.to_thread(self.build)
+
+    def get(self, category: str, name: str) -> Optional[ImageEntry]:
+        """Картинка по категории и имени (без расширения) или None."""
+        if self._entries is None:
+            self.build()
+        return self._entries.get(f"{category}/{name}")
+
+
+image_manifest = ImageManifest()
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple, Union
+from urllib.parse import unquote, urlparse
+
+from aiogram.types import FSInputFile, Message
+
+from config import BOT_API_LOCAL
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировки файла нет, кэш пишет один процесс
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Файл, где хранятся file_id загруженных в Telegram картинок
+MEDIA_CACHE_FILE = Path("data/media_cache.json")
+
+
+class MediaCache:
+    """Реестр file_id, которые Telegram вернул после первой загрузки картинки.
+
+    Ключ - SHA-256 содержимого файла, поэтому замена картинки на диске
+    автоматически делает старую запись неактуальной.
+
+    Файл общий для процессов-обработчиков (WORKERS): изменения вносятся
+    под блокировкой файла поверх того, что уже на диске, а при промахе
+    кэш перечитывается, если файл изменил другой процесс. Так file_id,
+    полученный одним обработчиком, используют и остальные.
+    """
+
+    def __init__(self, storage_path: Path = MEDIA_CACHE_FILE):
+        self.storage_path = Path(storage_path)
+        self._file_ids: Dict[str, str] = {}
+        # mtime файла при последнем чтении - чтобы заметить запись другого процесса
+        self._loaded_mtime: Optional[int] = None
+        # Хэши файлов: путь -> (mtime, size, digest), чтобы не читать файл на каждый запрос
+        self._digests: Dict[str, Tuple[float, int, str]] = {}
+        # Хэши из манифеста картинок - им доверяем без проверки файла на диске
+        self._known_digests: Dict[str, str] = {}
+        self._load()
+
+    def _mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.storage_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _read(self) -> Dict[str, str]:
+        try:
+            with open(self.storage_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (json.JSONDecodeError, OSError) as e:
+            logger.error(f"Не удалось прочитать кэш медиа {self.storage_path}: {e}")
+            return {}
+
+    def _load(self) -> None:
+        self._loaded_mtime = self._mtime()
+        self._file_ids = self._read()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Монопольный доступ к файлу кэша среди процессов."""
+        self.storage_path.parent.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(self.storage_path.with_suffix('.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _save(self, change: Callable[[Dict[str, str]], None]) -> None:
+        """Применить change к реестру, прочитанному с диска под блокировкой, и записать его."""
+        try:
+            with self._locked():
+                file_ids = self._read()
+                change(file_ids)
+                # Свой временный файл у каждого процесса: чужой недописанный файл не подменит кэш
+                tmp_path = self.storage_path.with_suffix(f'.{os.getpid()}.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(file_ids, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.storage_path)
+                self._file_ids = file_ids
+                self._loaded_mtime = self._mtime()
+        except OSError as e:
+            logger.error(f"Не удалось сохранить кэш медиа {self.storage_path}: {e}")
+            # В памяти изменение остается, даже если файл записать не удалось
+            change(self._file_ids)
+
+    def set_digests(self, digests: Dict[Union[str, Path], str]) -> None:
+        """Заменить известные хэши файлов (из манифеста картинок)."""
+        self._known_digests = {str(path): digest for path, digest in digests.items()}
+
+    def digest(self, path: Union[str, Path]) -> Optional[str]:
+        """Хэш содержимого файла (пересчитывается только при изменении файла)."""
+        key = str(path)
+        known = self._known_digests.get(key)
+        if known:
+            return known
+        try:
+            stat = os.stat(key)
+        except OSError:
+            return None
+
+        cached = self._digests.get(key)
+        if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+            return cached[2]
+
+        sha = hashlib.sha256()
+        with open(key, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        self._digests[key] = (stat.st_mtime, stat.st_size, digest)
+        return digest
+
+    def get(self, path: Union[str, Path]) -> Optional[str]:
+        """Вернуть сохраненный file_id для файла, если он уже загружался."""
+        digest = self.digest(path)
+        if not digest:
+            return None
+        file_id = self._file_ids.get(digest)
+        if file_id is None and self._mtime() != self._loaded_mtime:
+            # Файл обновил другой процесс - возможно, картинка уже загружена им
+            self._load()
+            file_id = self._file_ids.get(digest)
+        return file_id
+
+    def remember(self, path: Union[str, Path], file_id: str) -> None:
+        """Запомнить file_id для файла."""
+        digest = self.digest(path)
+        if not digest or self._file_ids.get(digest) == file_id:
+            return
+
+        def add(file_ids: Dict[str, str]) -> None:
+            file_ids[digest] = file_id
+
+        self._save(add)
+        logger.info(f"Закэширован file_id для {path}")
+
+    def forget(self, file_id: str) -> None:
+        """Удалить file_id, который Telegram больше не принимает."""
+        if file_id not in self._file_ids.values():
+            return
+
+        def drop(file_ids: Dict[str, str]) -> None:
+            # Другой процесс мог уже записать для картинки новый file_id - его не трогаем
+            for digest in [digest for digest, value in file_ids.items() if value == file_id]:
+                del file_ids[digest]
+
+        self._save(drop)
+        logger.warning(f"Удален недействительный file_id: {file_id}")
+
+
+media_cache = MediaCache()
+
+
+def _local_path(photo: Union[str, FSInputFile, None]) -> Optional[Path]:
+    """Путь к файлу, если фото передано локальному серверу Bot API как file://."""
+    if isinstance(photo, FSInputFile):
+        return Path(photo.path)
+    if isinstance(photo, str) and photo.startswith("file://"):
+        return Path(unquote(urlparse(photo).path))
+    return None
+
+
+def get_photo(path: Path) -> Union[str, FSInputFile]:
+    """Вернуть file_id из кэша или файл для первой загрузки.
+
+    С локальным сервером Bot API (BOT_API_LOCAL) файл не загружается в теле
+    запроса: сервер сам читает его с диска по file:// URI, поэтому файловая
+    система должна быть общей с сервером (тот же путь к data/).
+    """
+    file_id = media_cache.get(path)
+    if file_id:
+        return file_id
+    if BOT_API_LOCAL:
+        return Path(path).resolve().as_uri()
+    return FSInputFile(path)
+
+
+def remember_photo(photo: Union[str, FSInputFile, None], message: Optional[Message]) -> None:
+    """Сохранить file_id после успешной отправки загруженного файла."""
+    path = _local_path(photo)
+    if path is not None and message and message.photo:
+        media_cache.remember(path, message.photo[-1].file_id)
+
+
+def forget_photo(photo: Union[str, FSInputFile, None]) -> None:
+    """Сбросить file_id из кэша, если отправка по нему не удалась."""
+    if isinstance(photo, str) and _local_path(photo) is None:
+        media_cache.forget(photo)
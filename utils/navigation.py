@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from typing import Optional, Union
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery, FSInputFile, InputMediaPhoto, Message
+
+from .media_cache import remember_photo
+from .metrics import Counter, registry
+from .pagination import CAPTION_LIMIT, visible_length
+from .screens import Screen
+
+logger = logging.getLogger(__name__)
+
+NAVIGATION_TRANSITIONS = registry.register(Counter(
+    "bot_navigation_transitions_total", "Переходы между экранами по способу", ("kind",),
+))
+
+
+def _not_modified(error: TelegramBadRequest) -> bool:
+    return "message is not modified" in error.message
+
+
+def _cannot_edit(error: TelegramBadRequest) -> bool:
+    """Сообщение уже нельзя редактировать (удалено, слишком старое и т.п.)."""
+    message = error.message.lower()
+    return any(reason in message for reason in (
+        "message to edit not found",
+        "message can't be edited",
+        "there is no media in the message to edit",
+        "there is no text in the message to edit",
+        "there is no caption in the message to edit",
+    ))
+
+
+async def _resend(
+    callback: CallbackQuery,
+    screen: Screen,
+    photo: Union[str, FSInputFile, None],
+    delete_old: bool = True
+) -> Message:
+    """Отправить экран новым сообщением, затем удалить старое (без пустого экрана между ними)."""
+    bot = callback.bot
+    chat_id = callback.message.chat.id
+    if photo:
+        sent = await bot.send_photo(chat_id, photo, caption=screen.text,
+                                    reply_markup=screen.reply_markup)
+        remember_photo(photo, sent)
+    else:
+        sent = await bot.send_message(chat_id, screen.text, reply_markup=screen.reply_markup)
+    NAVIGATION_TRANSITIONS.inc("resend")
+
+    if delete_old and isinstance(callback.message, Message):
+        try:
+            # Новое сообщение уже отправлено - старое удаляем, даже если обработчик отменят
+            await asyncio.shield(callback.message.delete())
+        except TelegramBadRequest as e:
+            logger.debug("Не удалось удалить сообщение: %s", e)
+    return sent
+
+
+async def navigate(
+    callback: CallbackQuery,
+    screen: Screen,
+    photo: Union[str, FSInputFile, None] = None,
+    keep_photo: bool = False
+) -> Optional[Message]:
+    """Показать экран вместо сообщения с кнопкой самым дешевым способом.
+
+    - экран с фото, на экране фото: edit_message_media (фото и подпись одним запросом);
+    - экран без фото, на экране текст: edit_text;
+    - экран без фото, на экране фото, keep_photo=True: edit_caption (фото остается);
+    - иначе (текст -> фото, фото -> текст) сообщение нельзя превратить в другое -
+      отправляется новое, старое удаляется.
+
+    У длинного экрана показывается первая страница: подписи, если экран
+    будет подписью к фото, иначе текста. Если сообщение отредактировать
+    нельзя, экран отправляется заново.
+    Ошибки отправки фото (например, устаревший file_id) пробрасываются -
+    обработчик сам откатывается на экран без картинки.
+    """
+    current = callback.message
+    on_screen_photo = isinstance(current, Message) and bool(current.photo)
+    screen = screen.page(caption=bool(photo) or (on_screen_photo and keep_photo))
+
+    try:
+        if not isinstance(current, Message):
+            # Сообщение старше 48 часов - редактировать нельзя
+            return await _resend(callback, screen, photo, delete_old=False)
+
+        if photo and on_screen_photo:
+            result = await current.edit_media(
+                InputMediaPhoto(media=photo, caption=screen.text), reply_markup=screen.reply_markup
+            )
+            NAVIGATION_TRANSITIONS.inc("edit_media")
+            if isinstance(result, Message):
+                remember_photo(photo, result)
+            return result if isinstance(result, Message) else None
+
+        if not photo and not on_screen_photo:
+            result = await current.edit_text(screen.text, reply_markup=screen.reply_markup)
+            NAVIGATION_TRANSITIONS.inc("edit_text")
+            return result if isinstance(result, Message) else None
+
+        if not photo and keep_photo and visible_length(screen.text) <= CAPTION_LIMIT:
+            result = await current.edit_caption(caption=screen.text, reply_markup=screen.reply_markup)
+            NAVIGATION_TRANSITIONS.inc("edit_caption")
+            return result if isinstance(result, Message) else None
+
+        return await _resend(callback, screen, photo)
+    except TelegramBadRequest as e:
+        if _not_modified(e):
+            # Пользователь нажал ту же кнопку - экран уже нужный
+            NAVIGATION_TRANSITIONS.inc("not_modified")
+            return None
+        if _cannot_edit(e):
+            return await _resend(callback, screen, photo, delete_old=False)
+        raise
@@ -0,0 +1,148 @@
+import re
+from typing import List, NamedTuple, Optional, Tuple
+
+# Лимиты Telegram на текст после разбора HTML-разметки (в UTF-16 символах)
+CAPTION_LIMIT = 1024
+MESSAGE_LIMIT = 4096
+
+# Места разрыва страницы, от лучшего к худшему
+PARAGRAPH, LINE, SENTENCE, WORD = 3, 2, 1, 0
+
+_TOKEN = re.compile(
+    r'<(?P<closing>/?)(?P<tag>[a-zA-Z][\w-]*)[^>]*>'
+    r'|&(?:#\d+|#x[0-9a-fA-F]+|[a-zA-Z]+);'
+    r'|(?P<space>\s+)'
+    r'|[^\s<&]+'
+    r'|[<&]'
+)
+_SENTENCE_END = ('.', '!', '?', '…', ':')
+
+
+class Token(NamedTuple):
+    """Кусок HTML: тег, сущность (&amp;), слово или пробелы."""
+
+    text: str
+    # Видимая длина: у тегов 0, у сущности 1
+    width: int
+    tag: str = ""
+    closing: bool = False
+    # Для пробелов - насколько хорошо здесь разорвать страницу
+    brk: Optional[int] = None
+
+
+def _width(text: str) -> int:
+    return len(text.encode('utf-16-le')) // 2
+
+
+def tokenize(html: str) -> List[Token]:
+    """Разбить HTML на теги, сущности, слова и пробелы (один проход регуляркой)."""
+    tokens: List[Token] = []
+    for match in _TOKEN.finditer(html):
+        text = match.group()
+        if match.group('tag'):
+            tokens.append(Token(text, 0, match.group('tag').lower(), bool(match.group('closing'))))
+        elif text[0] == '&' and len(text) > 1:
+            tokens.append(Token(text, 1))
+        elif match.group('space'):
+            if '\n\n' in text:
+                brk = PARAGRAPH
+            elif '\n' in text:
+                brk = LINE
+            else:
+                last = next((t.text for t in reversed(tokens) if not t.tag), "")
+                brk = SENTENCE if last.endswith(_SENTENCE_END) else WORD
+            tokens.append(Token(text, _width(text), brk=brk))
+        else:
+            tokens.append(Token(text, _width(text)))
+    return tokens
+
+
+def visible_length(html: str) -> int:
+    """Длина текста, которую считает Telegram: без тегов, сущность - один символ."""
+    return sum(token.width for token in tokenize(html))
+
+
+def _split_word(token: Token, width: int) -> Tuple[Token, Token]:
+    """Разрезать слово длиннее страницы: первая часть не шире width."""
+    cut = 0
+    used = 0
+    for char in token.text:
+        char_width = _width(char)
+        if used + char_width > width:
+            break
+        used += char_width
+        cut += 1
+    cut = max(cut, 1)
+    head, tail = token.text[:cut], token.text[cut:]
+    return Token(head, _width(head)), Token(tail, _width(tail))
+
+
+def paginate(html: str, limit: int) -> Tuple[str, ...]:
+    """Разбить HTML на страницы, в каждой не больше limit видимых символов.
+
+    Страница заканчивается на самом крупном разрыве (абзац, строка,
+    предложение, пробел) во второй ее половине; слово режется, только если
+    оно само длиннее страницы. Теги и сущности не разрываются: незакрытые
+    на границе теги закрываются в конце страницы и открываются заново в
+    начале следующей, поэтому каждая страница - валидный HTML.
+    """
+    tokens = tokenize(html)
+    if sum(token.width for token in tokens) <= limit:
+        return (html,)
+
+    pages: List[str] = []
+    # Теги, открытые к началу текущей страницы
+    stack: List[Token] = []
+    start, total = 0, len(tokens)
+    while start < total:
+        # Пробелы между страницами не переносятся
+        while start < total and tokens[start].brk is not None:
+            start += 1
+        if start == total:
+            break
+
+        width, end = 0, start
+        # Лучший разрыв каждого вида: (индекс пробела, ширина страницы до него)
+        breaks = {}
+        while end < total:
+            token = tokens[end]
+            if width + token.width > limit:
+                break
+            if token.brk is not None:
+                breaks[token.brk] = (end, width)
+            width += token.width
+            end += 1
+
+        if end < total:
+            cut = next((breaks[kind][0] for kind in (PARAGRAPH, LINE, SENTENCE, WORD)
+                        if kind in breaks and breaks[kind][1] >= limit // 2), None)
+            if cut is None and breaks:
+                cut = max(index for index, _ in breaks.values())
+            if cut is None and width == 0:
+                # Ни один видимый символ не поместился (перед словом могут быть только теги):
+                # слово длиннее страницы
+                tokens[end:end + 1] = _split_word(tokens[end], limit - width)
+                total += 1
+                cut = end + 1
+            end = cut if cut is not None else end
+
+        # Страница без видимых символов (только теги и пробелы) Telegram не примет:
+        # ее не отправляем, открытые теги переходят на следующую
+        visible = any(token.width and not token.text.isspace() for token in tokens[start:end])
+        parts = [token.text for token in stack]
+        for token in tokens[start:end]:
+            parts.append(token.text)
+            if not token.tag:
+                continue
+            if not token.closing:
+                stack.append(token)
+            else:
+                for position in range(len(stack) - 1, -1, -1):
+                    if stack[position].tag == token.tag:
+                        del stack[position]
+                        break
+        if visible:
+            parts.extend(f"</{token.tag}>" for token in reversed(stack))
+            pages.append(''.join(parts).rstrip())
+        start = end
+    return tuple(pages)
@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Максимальная длительность одного запуска, чтобы забытый профайлер не работал вечно
+MAX_PROFILE_SECONDS = 300
+
+# Части стека, по которым в отчете считается доля времени (включая вложенные вызовы)
+SECTIONS = (
+    ("Диспетчер aiogram", ("aiogram/dispatcher/",)),
+    ("Middleware", ("middlewares/", "bot.py:__call__")),
+    ("Обработчики", ("handlers/",)),
+    ("Картинки (image_handler, media_cache)", ("utils/image_handler.py", "utils/media_cache.py")),
+    ("Запросы к Bot API", ("aiogram/client/",)),
+)
+
+# Кадр, в котором event loop ждет сокеты - значит, бот простаивает
+IDLE_FRAMES = ("selectors.py:select",)
+
+
+def _short_path(filename: str) -> str:
+    """Путь файла относительно проекта или site-packages."""
+    path = Path(filename)
+    try:
+        return path.resolve().relative_to(PROJECT_ROOT).as_posix()
+    except ValueError:
+        pass
+    marker = f"site-packages{os.sep}"
+    if marker in filename:
+        return filename.split(marker, 1)[1].replace(os.sep, "/")
+    return path.name
+
+
+@dataclass
+class ProfileResult:
+    """Итог одного запуска профайлера."""
+
+    stacks: Counter = field(default_factory=Counter)
+    samples: int = 0
+    duration: float = 0.0
+    updates: int = 0
+    interval: float = 0.0
+
+    def collapsed(self) -> str:
+        """Стеки в формате "кадр;кадр;кадр число" (flamegraph.pl, speedscope)."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self, limit: int = 10) -> List[Tuple[str, float]]:
+        """Доли времени по разделам и самые частые функции (self time)."""
+        if not self.samples:
+            return []
+        idle = 0
+        sections: Counter = Counter()
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            if frames[-1].startswith(IDLE_FRAMES):
+                idle += count
+                continue
+            leaves[frames[-1]] += count
+            for title, patterns in SECTIONS:
+                if any(pattern in frame for frame in frames for pattern in patterns):
+                    sections[title] += count
+
+        rows = [("Простой (ожидание сети)", idle / self.samples)]
+        rows.extend((title, sections[title] / self.samples) for title, _ in SECTIONS)
+        rows.extend((f"• {leaf}", count / self.samples) for leaf, count in leaves.most_common(limit))
+        return rows
+
+
+class SamplingProfiler:
+    """Сэмплирующий профайлер потока event loop.
+
+    Отдельный поток раз в interval секунд снимает стек потока бота через
+    sys._current_frames() и считает одинаковые стеки. Пока профайлер
+    выключен, потока нет, а middleware проверяет только один атрибут.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._result: Optional[ProfileResult] = None
+        self._done: Optional[asyncio.Future] = None
+        self._update_limit = 0
+        self._labels: Dict[Any, str] = {}
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{_short_path(code.co_filename)}:{code.co_name}"
+            self._labels[code] = label
+        return label
+
+    def _sample(self, thread_id: int) -> Optional[str]:
+        frame = sys._current_frames().get(thread_id)
+        frames = []
+        while frame is not None:
+            frames.append(self._label(frame.f_code))
+            frame = frame.f_back
+        return ";".join(reversed(frames)) if frames else None
+
+    def _run(self, thread_id: int, deadline: float, loop: asyncio.AbstractEventLoop) -> None:
+        result = self._result
+        started = time.monotonic()
+        while not self._stop.wait(self.interval):
+            stack = self._sample(thread_id)
+            if stack:
+                result.stacks[stack] += 1
+                result.samples += 1
+            if time.monotonic() >= deadline:
+                break
+        result.duration = time.monotonic() - started
+        loop.call_soon_threadsafe(self._finish)
+
+    def _finish(self) -> None:
+        if self._thread is None:
+            return
+        self._thread.join()
+        self._thread = None
+        self._update_limit = 0
+        if self._done and not self._done.done():
+            self._done.set_result(self._result)
+
+    def start(self, seconds: Optional[float] = None, updates: Optional[int] = None) -> None:
+        """Начать сбор на seconds секунд или до обработки updates апдейтов.
+
+        Вызывается из потока event loop - именно его стек и снимается.
+        """
+        if self.active:
+            raise RuntimeError("Профайлер уже запущен")
+        loop = asyncio.get_running_loop()
+        seconds = min(seconds or MAX_PROFILE_SECONDS, MAX_PROFILE_SECONDS)
+        self._result = ProfileResult(interval=self.interval)
+        self._update_limit = updates or 0
+        self._done = loop.create_future()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(threading.get_ident(), time.monotonic() + seconds, loop),
+            name="sampling-profiler",
+            daemon=True,
+        )
+        self._thread.start()
+        logger.info(f"Профайлер запущен: {seconds:g} с, апдейтов: {updates or '-'}")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def count_update(self) -> None:
+        """Отметить обработанный апдейт (для режима "N апдейтов")."""
+        result = self._result
+        result.updates += 1
+        if self._update_limit and result.updates >= self._update_limit:
+            self.stop()
+
+    async def wait(self) -> ProfileResult:
+        """Дождаться окончания текущего запуска."""
+        return await asyncio.shield(self._done)
+
+
+class ProfilerMiddleware(BaseMiddleware):
+    """Считает апдейты для профайлера. Пока он выключен - одна проверка атрибута."""
+
+    def __init__(self, profiler: SamplingProfiler):
+        super().__init__()
+        self.profiler = profiler
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        if not self.profiler.active:
+            return await handler(event, data)
+        try:
+            return await handler(event, data)
+        finally:
+            if self.profiler.active:
+                self.profiler.count_update()
+
+
+def _snapshot_diff(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, limit: int) -> List[str]:
+    filters = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    )
+    stats = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+    total = sum(stat.size_diff for stat in stats)
+    lines = [f"Итого: {total / 1024:+.1f} KiB"]
+    for stat in stats[:limit]:
+        frame = stat.traceback[0]
+        lines.append(
+            f"{_short_path(frame.filename)}:{frame.lineno} "
+            f"{stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d} блоков), всего {stat.size / 1024:.1f} KiB"
+        )
+    return lines
+
+
+async def memory_diff(seconds: float, limit: int = 100) -> List[str]:
+    """Разница снимков tracemalloc за seconds секунд: строки кода, где выросла память.
+
+    Если tracemalloc не был включен, он включается только на время замера.
+    """
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        await asyncio.sleep(min(seconds, MAX_PROFILE_SECONDS))
+        after = tracemalloc.take_snapshot()
+    finally:
+        if started_here:
+            tracemalloc.stop()
+    # Сравнение снимков - долгая операция, не держим на ней event loop
+    return await asyncio.to_thread(_snapshot_diff, before, after, limit)
+
+
+profiler = SamplingProfiler()
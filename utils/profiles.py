@@ -0,0 +1,261 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from config import PROFILE_CACHE_SIZE, PROFILE_FLUSH_INTERVAL
+
+from .db import get_pool
+from .metrics import Counter, registry
+
+logger = logging.getLogger(__name__)
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS user_profiles (
+    user_id BIGINT PRIMARY KEY,
+    username TEXT,
+    first_name TEXT NOT NULL DEFAULT '',
+    interests TEXT[] NOT NULL DEFAULT '{}',
+    experience TEXT NOT NULL DEFAULT '',
+    notifications BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+
+# Уровни опыта: значение -> подпись на экране настроек (по порядку переключения)
+EXPERIENCE_LEVELS = {
+    "": "не указан",
+    "newbie": "новичок",
+    "some": "есть первые заказы",
+    "pro": "опытный фрилансер",
+}
+
+PROFILE_CACHE = registry.register(Counter(
+    "bot_profile_cache_total", "Обращения к кэшу профилей", ("result",),
+))
+
+
+@dataclass(frozen=True)
+class Profile:
+    """Профиль пользователя для экрана настроек."""
+
+    user_id: int
+    username: Optional[str] = None
+    first_name: str = ""
+    interests: Tuple[str, ...] = field(default_factory=tuple)  # id направлений
+    experience: str = ""  # ключ EXPERIENCE_LEVELS
+    notifications: bool = True  # получать рассылки
+
+
+class ProfileStore:
+    """Профили пользователей: PostgreSQL + LRU-кэш в памяти процесса.
+
+    get() читает из кэша, при промахе - одним запросом из БД (параллельные
+    промахи по одному пользователю ждут один и тот же запрос). update()
+    меняет профиль в памяти и помечает его "грязным", фоновая задача раз в
+    flush_interval секунд пишет все грязные профили одной транзакцией -
+    несколько быстрых переключений настроек дают одну запись. touch() на
+    /start вообще не обращается к БД. Без PostgreSQL профили хранятся
+    только в памяти.
+    """
+
+    def __init__(self, cache_size: int = PROFILE_CACHE_SIZE, flush_interval: float = PROFILE_FLUSH_INTERVAL):
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        self._cache: "OrderedDict[int, Profile]" = OrderedDict()
+        # Измененные профили ждут записи (держим ссылки, даже если их вытеснило из кэша)
+        self._dirty: Dict[int, Profile] = {}
+        # Имена из /start для профилей, которых нет в кэше: user_id -> (username, first_name)
+        self._seen: Dict[int, Tuple[Optional[str], str]] = {}
+        # Профили, которые сейчас пишутся в БД (чтение из БД вернуло бы старую версию)
+        self._flushing: Dict[int, Profile] = {}
+        self._loading: Dict[int, asyncio.Future] = {}
+        self._persistent = False
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _remember(self, profile: Profile) -> None:
+        self._cache[profile.user_id] = profile
+        self._cache.move_to_end(profile.user_id)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _cached(self, user_id: int) -> Optional[Profile]:
+        profile = self._cache.get(user_id) or self._dirty.get(user_id) or self._flushing.get(user_id)
+        if profile is not None:
+            self._remember(profile)
+        return profile
+
+    def touch(self, user_id: int, username: Optional[str], first_name: str) -> None:
+        """Обновить имя пользователя (на /start). Только память, запись в БД - в фоне."""
+        profile = self._cached(user_id)
+        if profile is None:
+            if self._persistent:
+                self._seen[user_id] = (username, first_name)
+            else:
+                self._remember(Profile(user_id, username, first_name))
+            return
+        if (profile.username, profile.first_name) != (username, first_name):
+            self._store(replace(profile, username=username, first_name=first_name))
+
+    async def get(self, user_id: int) -> Profile:
+        """Профиль пользователя (новый пустой, если его еще нет)."""
+        profile = self._cached(user_id)
+        if profile is not None:
+            PROFILE_CACHE.inc("hit")
+            return profile
+        PROFILE_CACHE.inc("miss")
+        if not self._persistent:
+            profile = Profile(user_id)
+            self._remember(profile)
+            return profile
+
+        loading = self._loading.get(user_id)
+        if loading is None:
+            loading = asyncio.ensure_future(self._load(user_id))
+            self._loading[user_id] = loading
+            loading.add_done_callback(lambda _: self._loading.pop(user_id, None))
+        return await asyncio.shield(loading)
+
+    async def _load(self, user_id: int) -> Profile:
+        pool = await get_pool()
+        row = await pool.fetchrow(
+            "SELECT username, first_name, interests, experience, notifications "
+            "FROM user_profiles WHERE user_id = $1",
+            user_id
+        )
+        # Пока шел запрос, профиль могли изменить - тогда верна версия в памяти
+        profile = self._cached(user_id)
+        if profile is not None:
+            return profile
+        if row is None:
+            profile = Profile(user_id)
+        else:
+            profile = Profile(
+                user_id, row['username'], row['first_name'], tuple(row['interests']),
+                row['experience'], row['notifications']
+            )
+        self._remember(profile)
+        seen = self._seen.pop(user_id, None)
+        if seen is not None:
+            profile = replace(profile, username=seen[0], first_name=seen[1])
+            self._store(profile)
+        return profile
+
+    def _store(self, profile: Profile) -> None:
+        self._remember(profile)
+        if self._persistent:
+            self._dirty[profile.user_id] = profile
+            self._seen.pop(profile.user_id, None)
+
+    async def update(self, user_id: int, **changes) -> Profile:
+        """Изменить поля профиля. Запись в БД - в фоне, вместе с другими изменениями."""
+        profile = replace(await self.get(user_id), **changes)
+        self._store(profile)
+        return profile
+
+    async def toggle_interest(self, user_id: int, direction_id: str) -> Profile:
+        profile = await self.get(user_id)
+        interests = set(profile.interests) ^ {direction_id}
+        return await self.update(user_id, interests=tuple(sorted(interests)))
+
+    async def muted(self, user_ids: Iterable[int]) -> Set[int]:
+        """Кто из user_ids отключил уведомления (один запрос на пачку, для рассылок)."""
+        user_ids = list(user_ids)
+        muted = set()
+        unknown: List[int] = []
+        for user_id in user_ids:
+            profile = self._cache.get(user_id) or self._dirty.get(user_id) or self._flushing.get(user_id)
+            if profile is None:
+                unknown.append(user_id)
+            elif not profile.notifications:
+                muted.add(user_id)
+        if unknown and self._persistent:
+            pool = await get_pool()
+            rows = await pool.fetch(
+                "SELECT user_id FROM user_profiles WHERE user_id = ANY($1::bigint[]) AND NOT notifications",
+                unknown
+            )
+            muted.update(row['user_id'] for row in rows)
+        return muted
+
+    async def start(self) -> None:
+        """Создать таблицу и запустить фоновую запись (только при PostgreSQL)."""
+        pool = await get_pool()
+        if pool is None:
+            logger.warning("PostgreSQL не настроен - профили хранятся только в памяти")
+            return
+        await pool.execute(CREATE_TABLE_SQL)
+        self._persistent = True
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        """Остановить фоновую запись и сбросить несохраненные изменения."""
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Ошибка при записи профилей в БД: {e}")
+
+    async def flush(self) -> None:
+        """Записать измененные профили и имена из /start одной транзакцией."""
+        if not (self._dirty or self._seen) or not self._persistent:
+            return
+
+        dirty, self._dirty = self._dirty, {}
+        seen, self._seen = self._seen, {}
+        self._flushing = dirty
+        pool = await get_pool()
+        try:
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    if seen:
+                        await conn.executemany(
+                            "INSERT INTO user_profiles (user_id, username, first_name) VALUES ($1, $2, $3) "
+                            "ON CONFLICT (user_id) DO UPDATE SET username = EXCLUDED.username, "
+                            "first_name = EXCLUDED.first_name, updated_at = now()",
+                            [(user_id, username, first_name) for user_id, (username, first_name) in seen.items()]
+                        )
+                    if dirty:
+                        await conn.executemany(
+                            "INSERT INTO user_profiles "
+                            "(user_id, username, first_name, interests, experience, notifications) "
+                            "VALUES ($1, $2, $3, $4, $5, $6) "
+                            "ON CONFLICT (user_id) DO UPDATE SET username = EXCLUDED.username, "
+                            "first_name = EXCLUDED.first_name, interests = EXCLUDED.interests, "
+                            "experience = EXCLUDED.experience, notifications = EXCLUDED.notifications, "
+                            "updated_at = now()",
+                            [
+                                (p.user_id, p.username, p.first_name, list(p.interests), p.experience,
+                                 p.notifications)
+                                for p in dirty.values()
+                            ]
+                        )
+        except Exception:
+            # Возвращаем изменения в очередь, более свежие записи не перетираем
+            for user_id, profile in dirty.items():
+                self._dirty.setdefault(user_id, profile)
+            for user_id, names in seen.items():
+                if user_id not in self._dirty:
+                    self._seen.setdefault(user_id, names)
+            raise
+        finally:
+            self._flushing = {}
+
+
+profiles = ProfileStore()
+
+registry.gauge("bot_profiles_dirty", "Измененные профили, ожидающие записи в БД",
+               lambda: len(profiles._dirty) + len(profiles._seen))
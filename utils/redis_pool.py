@@ -0,0 +1,36 @@
+import logging
+from typing import Optional
+
+from redis.asyncio import ConnectionPool, Redis
+
+from config import REDIS_MAX_CONNECTIONS, REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ConnectionPool] = None
+_redis: Optional[Redis] = None
+
+
+def get_redis() -> Redis:
+    """Общий клиент Redis поверх одного пула соединений на процесс."""
+    global _pool, _redis
+    if _redis is None:
+        _pool = ConnectionPool.from_url(
+            REDIS_URL,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            health_check_interval=30,
+        )
+        _redis = Redis(connection_pool=_pool)
+        logger.info(f"Создан пул соединений Redis (max_connections={REDIS_MAX_CONNECTIONS})")
+    return _redis
+
+
+async def close_redis() -> None:
+    """Закрыть клиент и пул соединений Redis."""
+    global _pool, _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+    if _pool is not None:
+        await _pool.disconnect()
+        _pool = None
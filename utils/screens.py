@@ -0,0 +1,231 @@
+import logging
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+from aiogram.types import InlineKeyboardMarkup
+
+from constants import TARIFFS_DESCRIPTION
+from keyboards import (
+    get_back_to_courses_keyboard,
+    get_back_to_direction_keyboard,
+    get_direction_detail_keyboard,
+    get_directions_keyboard,
+    get_earning_ways_keyboard,
+    get_tariffs_keyboard,
+    with_page_buttons,
+)
+
+from .data_loader import CatalogSnapshot, catalog
+from .pagination import CAPTION_LIMIT, MESSAGE_LIMIT, paginate
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Screen:
+    """Готовый экран: текст (он же подпись к фото) и клавиатура.
+
+    Клавиатура общая для всех пользователей - ее нельзя изменять.
+    Длинный экран разбит на страницы (с кнопками листания) отдельно для
+    текстового сообщения и для подписи к фото.
+    """
+
+    text: str
+    reply_markup: Optional[InlineKeyboardMarkup] = None
+    text_pages: Tuple["Screen", ...] = ()
+    caption_pages: Tuple["Screen", ...] = ()
+
+    def page(self, index: int = 0, caption: bool = False) -> "Screen":
+        """Страница экрана для сообщения или подписи (сам экран, если он помещается целиком)."""
+        pages = self.caption_pages if caption else self.text_pages
+        if not pages:
+            return self
+        return pages[min(max(index, 0), len(pages) - 1)]
+
+
+def render_directions_list(directions: Sequence[Mapping[str, Any]]) -> Screen:
+    return Screen(
+        text=("💼 <b>Направления для заработка</b>\n\n"
+              "Выбери интересующее направление, чтобы узнать подробности:"),
+        reply_markup=get_directions_keyboard(directions),
+    )
+
+
+def render_direction(direction: Mapping[str, Any]) -> Screen:
+    dir_id = direction['id']
+    parts = [f"{direction['emoji']} <b>{direction['title']}</b>\n\n", direction['description']]
+
+    # Добавляем специализации если есть
+    if 'specializations' in direction:
+        parts.append("\n\n<b>Специализации:</b>\n")
+        parts.extend(f"• {spec}\n" for spec in direction['specializations'])
+
+    # Добавляем дополнительную информацию в зависимости от направления
+    if dir_id == "task_execution":
+        parts.append("\n\n<b>💰 Доходы:</b>\n")
+        parts.append(f"• Одно задание: {direction['income_per_task']}\n")
+        parts.append(f"• В день: {direction['daily_tasks']}\n")
+        parts.append(f"• В месяц: {direction['monthly_income']}")
+    elif dir_id == "curator_online_school":
+        parts.append(f"\n\n<b>💰 Доход:</b> {direction['income']}\n")
+        parts.append(f"<b>💸 Комиссия:</b> {direction['commission']}")
+
+    return Screen(text=''.join(parts), reply_markup=get_direction_detail_keyboard(dir_id))
+
+
+def render_courses(direction: Mapping[str, Any]) -> Screen:
+    dir_id = direction['id']
+    parts = [f"📚 <b>Курсы: {direction['title']}</b>\n\n"]
+    course_parts = []
+
+    for course in direction['courses']:
+        course_parts.append(
+            f"🎓 <b>{course['name']}</b>\n"
+            f"{course['description']}\n\n"
+            f"💰 <b>Доход:</b> {course['income']}\n"
+            f"💳 <b>Цена:</b> {course['price_basic']} / {course['price_with_chat']}\n\n"
+        )
+    # Не добавляем разделитель после последнего курса
+    parts.append("---\n\n".join(course_parts))
+
+    return Screen(text=''.join(parts), reply_markup=get_back_to_courses_keyboard(dir_id))
+
+
+def render_tasks_details(direction: Mapping[str, Any]) -> Screen:
+    parts = ["✅ <b>Что нужно делать</b>\n\n"]
+    parts.extend(f"— {task}\n" for task in direction['tasks'])
+
+    parts.append("\n<b>Кто вам платит за это?</b>\n\n")
+    parts.extend(f"— {payer}\n" for payer in direction['who_pays'])
+
+    parts.append(f"\n{direction['advantages']}")
+    return Screen(text=''.join(parts), reply_markup=get_back_to_direction_keyboard(direction['id']))
+
+
+def render_designer() -> Screen:
+    text = (
+        "🎨 <b>Дизайнер инфографики</b>\n\n"
+        "Это человек, который оформляет карточки товаров для маркетплейсов — Wildberries, Ozon и др.\n\n"
+        "Ты делаешь слайды: фото + короткие описания и преимущества — именно то, что видит покупатель, "
+        "когда выбирает товар.\n\n"
+        "Работать можно даже с телефона, уделяя в день от 2 часов.\n"
+        "Компьютер не обязателен, опыт не нужен — всему научишься с нуля благодаря курсам!\n\n"
+        "💰 <b>Доходы:</b>\n"
+        "👉🏼 Новички берут от 300–500 ₽ за 1 слайд\n"
+        "👉🏼 На один товар обычно заказывают 5–10 слайдов\n"
+        "👉🏼 То есть с одного клиента выходит от 2 000 ₽ и выше\n"
+        "👉🏼 Уже с 1–2 заказов в неделю можно выйти на доход 30 000 ₽ в месяц"
+    )
+    return Screen(text=text, reply_markup=get_back_to_direction_keyboard("marketplace_work"))
+
+
+def render_manager() -> Screen:
+    text = (
+        "👨‍💼 <b>Менеджер маркетплейсов</b>\n\n"
+        "— работа в личном кабинете продавца\n"
+        "— создание карточек, создание описания товаров\n"
+        "— ответы на отзывы, управление ценами, запуск рекламы\n\n"
+        "Здесь нужен компьютер — с телефона не получится\n\n"
+        "💰 <b>Доходы:</b>\n"
+        "👉🏼 Новички берут от 10 000 до 20 000 ₽ за одного клиента в месяц\n"
+        "👉🏼 Обычно менеджер ведёт 2–4 магазина одновременно\n"
+        "👉🏼 То есть на практике доход выходит от 40 000 до 80 000 ₽ в месяц и выше\n"
+        "(в зависимости от количества клиентов и формата работы)"
+    )
+    return Screen(text=text, reply_markup=get_back_to_direction_keyboard("marketplace_work"))
+
+
+def render_curator_details() -> Screen:
+    text = (
+        "🎓 <b>Работа куратора онлайн школы</b>\n\n"
+        "Работа куратора — это:\n"
+        "— вести соцсети (Instagram, VK, Telegram, Pinterest, Treads)\n"
+        "— рассказывать в своих соц.сетях о школе и вариантах заработка\n"
+        "— выстраивать входящий поток — чтобы тебе писали сами, с помощью чат ботов и обратной связи\n"
+        "— консультировать тех, кому интересно, и подключать к обучению\n\n"
+        "Можно отвечать вручную, а можно — как я — подключить чат-бота, чтобы часть работы шла автоматически.\n\n"
+        "Главное — готовность разбираться, не ждать волшебства и реально делать шаги."
+    )
+    return Screen(text=text, reply_markup=get_back_to_direction_keyboard("curator_online_school"))
+
+
+def render_tariffs() -> Screen:
+    return Screen(
+        text=f"💳 <b>Тарифы обучения</b>\n\n{TARIFFS_DESCRIPTION}",
+        reply_markup=get_tariffs_keyboard(),
+    )
+
+
+def render_main_menu() -> Screen:
+    # Кнопки главного меню - reply-клавиатура, она остается на экране с /start
+    return Screen(text="🏠 <b>Главное меню</b>\n\nВыбери интересующий раздел:")
+
+
+def render_earning_ways() -> Screen:
+    return Screen(
+        text="💰 <b>Способы заработка</b>\n\nВыбери, что тебя интересует:",
+        reply_markup=get_earning_ways_keyboard(),
+    )
+
+
+def _pages(screen_id: str, screen: Screen, text: str, limit: int, caption: bool) -> Tuple[Screen, ...]:
+    pages = paginate(text, limit)
+    if len(pages) == 1:
+        return ()
+    return tuple(
+        Screen(text=page, reply_markup=with_page_buttons(screen.reply_markup, screen_id, index, len(pages), caption))
+        for index, page in enumerate(pages)
+    )
+
+
+def paginate_screen(screen_id: str, screen: Screen) -> Screen:
+    """Разбить длинный экран на страницы: до 4096 символов для сообщения, до 1024 для подписи."""
+    text_pages = _pages(screen_id, screen, screen.text, MESSAGE_LIMIT, caption=False)
+    caption_pages = _pages(screen_id, screen, screen.text, CAPTION_LIMIT, caption=True)
+    if not text_pages and not caption_pages:
+        return screen
+    return replace(screen, text_pages=text_pages, caption_pages=caption_pages)
+
+
+def build_screens(directions: Sequence[Mapping[str, Any]]) -> Dict[str, Screen]:
+    """Собрать все экраны один раз. Ключи: "directions", "direction:<id>", "courses:<id>" и т.д."""
+    screens = {
+        "directions": render_directions_list(directions),
+        "designer": render_designer(),
+        "manager": render_manager(),
+        "curator_details": render_curator_details(),
+        "tariffs": render_tariffs(),
+        "earning_ways": render_earning_ways(),
+        "main_menu": render_main_menu(),
+    }
+    for direction in directions:
+        screens[f"direction:{direction['id']}"] = render_direction(direction)
+        if 'courses' in direction:
+            screens[f"courses:{direction['id']}"] = render_courses(direction)
+        if 'tasks' in direction:
+            screens[f"tasks_details:{direction['id']}"] = render_tasks_details(direction)
+    # Страницы размечаются один раз здесь, листание берет их из кэша готовыми
+    return {screen_id: paginate_screen(screen_id, screen) for screen_id, screen in screens.items()}
+
+
+class ScreenCache:
+    """Кэш готовых экранов. Собирается один раз и пересобирается при смене каталога."""
+
+    def __init__(self):
+        self._screens: Optional[Dict[str, Screen]] = None
+        # Каталог обновился - пересобираем экраны из нового снимка
+        catalog.subscribe(self.rebuild)
+
+    def rebuild(self, snapshot: Optional[CatalogSnapshot] = None) -> None:
+        """Пересобрать все экраны (по умолчанию - из текущего снимка каталога)."""
+        self._screens = build_screens((snapshot or catalog.snapshot).directions)
+        logger.info(f"Собрано экранов: {len(self._screens)}")
+
+    def get(self, screen_id: str) -> Optional[Screen]:
+        """Готовый экран по ID или None."""
+        if self._screens is None:
+            self.rebuild()
+        return self._screens.get(screen_id)
+
+
+screen_cache = ScreenCache()
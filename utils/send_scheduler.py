@@ -0,0 +1,240 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from config import (
+    SEND_CHAT_BURST,
+    SEND_CHAT_RATE,
+    SEND_GLOBAL_BURST,
+    SEND_GLOBAL_RATE,
+    SEND_MAX_RETRIES,
+)
+
+from .metrics import registry
+from .session import TelegramConnectionError
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+logger = logging.getLogger(__name__)
+
+# Методы, которые Telegram учитывает в лимитах на отправку сообщений
+RATE_LIMITED_PREFIXES = ("send", "edit", "copy", "forward")
+# Методы, повтор которых после обрыва или таймаута может продублировать сообщение
+NOT_IDEMPOTENT_PREFIXES = ("send", "copy", "forward")
+
+
+class Priority(IntEnum):
+    """Приоритет исходящего запроса: ответы пользователю важнее рассылок."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+send_priority: ContextVar[Priority] = ContextVar("send_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def background_priority():
+    """Все запросы внутри блока идут с фоновым приоритетом (рассылки и т.п.)."""
+    token = send_priority.set(Priority.BACKGROUND)
+    try:
+        yield
+    finally:
+        send_priority.reset(token)
+
+
+class PriorityRateLimiter:
+    """Token bucket, в котором ожидающие обслуживаются по приоритету, затем по очереди.
+
+    rate <= 0 - без ограничения (кроме пауз после retry_after).
+    """
+
+    def __init__(self, rate: float, burst: int):
+        if rate > 0 and burst < 1:
+            raise ValueError(f"burst должен быть не меньше 1, получено {burst}")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._drain_task: Optional[asyncio.Task] = None
+
+    @property
+    def depth(self) -> int:
+        """Сколько запросов ждут своей очереди."""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    @property
+    def idle(self) -> bool:
+        return not self._waiters and self._tokens >= self.burst and time.monotonic() >= self._paused_until
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if now < self._paused_until:
+            self._updated = now
+            return
+        if self.rate <= 0:
+            self._tokens = math.inf
+            self._updated = now
+            return
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def pause(self, seconds: float) -> None:
+        """Не выдавать токены seconds секунд (после retry_after от Telegram)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self, priority: int = Priority.INTERACTIVE) -> None:
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        if self._drain_task is None or self._drain_task.done():
+            self._drain_task = asyncio.create_task(self._drain())
+        await future
+
+    async def _drain(self) -> None:
+        while self._waiters:
+            self._refill()
+            while self._waiters and self._tokens >= 1:
+                _, _, future = heapq.heappop(self._waiters)
+                if future.done():  # запрос отменили, пока он ждал
+                    continue
+                self._tokens -= 1
+                future.set_result(None)
+            if self._waiters:
+                refill = (1 - self._tokens) / self.rate if self.rate > 0 else 0.0
+                delay = max(self._paused_until - time.monotonic(), refill)
+                await asyncio.sleep(max(delay, 0.001))
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """Слой сессии бота, сглаживающий исходящие запросы.
+
+    Отправка сообщений проходит через общий лимит (около 30 в секунду) и
+    лимит на чат. Ответы пользователям обслуживаются раньше фоновых
+    отправок (см. background_priority). На TelegramRetryAfter лимит
+    ставится на паузу на retry_after секунд и запрос повторяется.
+    После ошибки сети send*/copy*/forward* повторяются, только если
+    соединение не было установлено, иначе сообщение может прийти дважды.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = SEND_GLOBAL_RATE,
+        global_burst: int = SEND_GLOBAL_BURST,
+        chat_rate: float = SEND_CHAT_RATE,
+        chat_burst: int = SEND_CHAT_BURST,
+        max_retries: int = SEND_MAX_RETRIES,
+        max_chats: int = 10000
+    ):
+        self.global_limiter = PriorityRateLimiter(global_rate, global_burst)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.max_chats = max_chats
+        self._chat_limiters: "OrderedDict[Any, PriorityRateLimiter]" = OrderedDict()
+        self.retry_after_count = 0
+        self.retries_count = 0
+
+    def share_global_limit(self, parts: int) -> None:
+        """Оставить процессу 1/parts общего лимита: parts процессов отправляют от имени одного бота."""
+        limiter = self.global_limiter
+        self.global_limiter = PriorityRateLimiter(limiter.rate / parts, max(1, limiter.burst // parts))
+
+    def _chat_limiter(self, chat_id: Any) -> PriorityRateLimiter:
+        limiter = self._chat_limiters.get(chat_id)
+        if limiter is None:
+            limiter = PriorityRateLimiter(self.chat_rate, self.chat_burst)
+            self._chat_limiters[chat_id] = limiter
+            # Выбрасываем самые старые простаивающие лимитеры
+            while len(self._chat_limiters) > self.max_chats:
+                oldest_id, oldest = next(iter(self._chat_limiters.items()))
+                if not oldest.idle:
+                    break
+                del self._chat_limiters[oldest_id]
+        else:
+            self._chat_limiters.move_to_end(chat_id)
+        return limiter
+
+    def stats(self) -> Dict[str, int]:
+        """Глубина очередей и счетчики повторов."""
+        chat_depths = [limiter.depth for limiter in self._chat_limiters.values()]
+        return {
+            "global_queue": self.global_limiter.depth,
+            "chat_queues": sum(1 for depth in chat_depths if depth),
+            "chat_queue_total": sum(chat_depths),
+            "chat_queue_max": max(chat_depths, default=0),
+            "retry_after": self.retry_after_count,
+            "retries": self.retries_count,
+        }
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if not method.__api_method__.startswith(RATE_LIMITED_PREFIXES):
+            return await make_request(bot, method)
+
+        chat_id = getattr(method, "chat_id", None)
+        priority = send_priority.get()
+        attempt = 0
+        while True:
+            if chat_id is not None:
+                await self._chat_limiter(chat_id).acquire(priority)
+            await self.global_limiter.acquire(priority)
+
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self.retry_after_count += 1
+                if chat_id is not None:
+                    self._chat_limiter(chat_id).pause(e.retry_after)
+                else:
+                    self.global_limiter.pause(e.retry_after)
+                if attempt >= self.max_retries:
+                    raise
+                logger.warning(f"Flood control на {method.__api_method__} (чат {chat_id}), ждем {e.retry_after} с")
+            except (TelegramNetworkError, TelegramServerError) as e:
+                # Таймаут или обрыв после отправки: Telegram мог уже доставить сообщение
+                unsafe = isinstance(e, TelegramNetworkError) and not isinstance(e, TelegramConnectionError)
+                if attempt >= self.max_retries or (unsafe and method.__api_method__.startswith(NOT_IDEMPOTENT_PREFIXES)):
+                    raise
+                delay = 0.5 * 2 ** attempt
+                logger.warning(f"Ошибка {method.__api_method__}: {e}, повтор через {delay:g} с")
+                await asyncio.sleep(delay)
+
+            attempt += 1
+            self.retries_count += 1
+
+
+send_scheduler = SendScheduler()
+
+registry.gauge("bot_send_global_queue", "Запросы в общей очереди отправки",
+               lambda: send_scheduler.global_limiter.depth)
+registry.gauge("bot_send_chat_queue_total", "Запросы в очередях отдельных чатов",
+               lambda: send_scheduler.stats()["chat_queue_total"])
+registry.gauge("bot_send_retry_after_total", "Ответы flood control (retry_after) от Telegram",
+               lambda: send_scheduler.retry_after_count)
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+from typing import Optional, cast
+
+from aiogram import Bot, __version__
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import PRODUCTION, TelegramAPIServer
+from aiogram.exceptions import TelegramNetworkError
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiohttp import ClientConnectorError, ClientError, ClientSession, ClientTimeout, ServerTimeoutError, TraceConfig
+from aiohttp.hdrs import USER_AGENT
+from aiohttp.http import SERVER_SOFTWARE
+
+from config import (
+    BOT_API_LOCAL,
+    BOT_API_URL,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_DNS_TTL,
+    HTTP_KEEPALIVE,
+    HTTP_POOL_SIZE,
+    HTTP_TIMEOUT,
+)
+
+from .metrics import Counter, registry
+
+logger = logging.getLogger(__name__)
+
+HTTP_CONNECTIONS = registry.register(Counter(
+    "bot_http_connections_total", "Соединения к Bot API: новые (created) и повторно использованные (reused)",
+    ("result",),
+))
+
+
+class TelegramConnectionError(TelegramNetworkError):
+    """Соединение с Bot API не установлено: запрос точно не дошел до Telegram."""
+
+
+def _not_sent(error: ClientError) -> bool:
+    # Таймаут установки соединения aiohttp поднимает с исходным TimeoutError в __cause__,
+    # таймаут чтения ответа - без него
+    return isinstance(error, ClientConnectorError) or (
+        isinstance(error, ServerTimeoutError) and error.__cause__ is not None
+    )
+
+
+def _trace_config() -> TraceConfig:
+    """Счетчики новых и переиспользованных соединений пула."""
+    trace = TraceConfig()
+
+    async def on_create(session, context, params) -> None:
+        HTTP_CONNECTIONS.inc("created")
+
+    async def on_reuse(session, context, params) -> None:
+        HTTP_CONNECTIONS.inc("reused")
+
+    trace.on_connection_create_end.append(on_create)
+    trace.on_connection_reuseconn.append(on_reuse)
+    return trace
+
+
+class TunedAiohttpSession(AiohttpSession):
+    """Сессия aiogram с настроенным пулом соединений к Bot API.
+
+    Все запросы бота идут через один ClientSession: размер пула, время жизни
+    простаивающих keep-alive соединений, кэш DNS и отдельный таймаут на
+    установку соединения задаются в config.py. Новые и повторно
+    использованные соединения считаются в метрике bot_http_connections_total.
+    Если соединение не удалось установить, поднимается TelegramConnectionError:
+    такой запрос можно безопасно повторить.
+    """
+
+    def __init__(
+        self,
+        api: TelegramAPIServer = PRODUCTION,
+        pool_size: int = HTTP_POOL_SIZE,
+        keepalive: float = HTTP_KEEPALIVE,
+        dns_ttl: int = HTTP_DNS_TTL,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        timeout: float = HTTP_TIMEOUT
+    ):
+        super().__init__(api=api, timeout=timeout)
+        self.connect_timeout = connect_timeout
+        self._connector_init.update(
+            limit=pool_size,
+            limit_per_host=pool_size,
+            keepalive_timeout=keepalive,
+            ttl_dns_cache=dns_ttl,
+        )
+
+    async def create_session(self) -> ClientSession:
+        if self._should_reset_connector:
+            await self.close()
+
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(
+                connector=self._connector_type(**self._connector_init),
+                headers={USER_AGENT: f"{SERVER_SOFTWARE} aiogram/{__version__}"},
+                trace_configs=[_trace_config()],
+            )
+            self._should_reset_connector = False
+
+        return self._session
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod[TelegramType], timeout: Optional[int] = None
+    ) -> TelegramType:
+        session = await self.create_session()
+
+        url = self.api.api_url(token=bot.token, method=method.__api_method__)
+        form = self.build_form_data(bot=bot, method=method)
+        # Число вместо ClientTimeout в aiohttp - только общий таймаут, без таймаута на соединение
+        client_timeout = ClientTimeout(
+            total=self.timeout if timeout is None else timeout,
+            sock_connect=self.connect_timeout,
+        )
+
+        try:
+            async with session.post(url, data=form, timeout=client_timeout) as resp:
+                raw_result = await resp.text()
+        except ClientError as e:
+            if _not_sent(e):
+                raise TelegramConnectionError(method=method, message=f"{type(e).__name__}: {e}")
+            raise TelegramNetworkError(method=method, message=f"{type(e).__name__}: {e}")
+        except asyncio.TimeoutError:
+            raise TelegramNetworkError(method=method, message="Request timeout error")
+        response = self.check_response(bot=bot, method=method, status_code=resp.status, content=raw_result)
+        return cast(TelegramType, response.result)
+
+
+def create_session(api_url: str = BOT_API_URL, is_local: bool = BOT_API_LOCAL) -> TunedAiohttpSession:
+    """Сессия для бота: api.telegram.org или свой сервер Bot API (api_url)."""
+    if not api_url:
+        return TunedAiohttpSession()
+    api = TelegramAPIServer.from_base(api_url.rstrip("/"), is_local=is_local)
+    logger.info(f"Bot API: {api_url}" + (" (локальный режим)" if is_local else ""))
+    return TunedAiohttpSession(api=api)
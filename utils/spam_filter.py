@@ -0,0 +1,148 @@
+import logging
+import os
+import re
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Pattern
+
+logger = logging.getLogger(__name__)
+
+# Файл со стоп-словами антиспама
+SPAM_KEYWORDS_FILE = Path("data/spam_keywords.txt")
+
+# Как часто проверять, не изменился ли файл со стоп-словами (секунды)
+RELOAD_CHECK_INTERVAL = 5.0
+
+# Кириллица и другие символы, которыми спамеры подменяют латиницу
+HOMOGLYPHS = str.maketrans({
+    'а': 'a', 'в': 'b', 'е': 'e', 'ё': 'e', 'к': 'k', 'м': 'm', 'н': 'h',
+    'о': 'o', 'р': 'p', 'с': 'c', 'т': 't', 'у': 'y', 'х': 'x', 'і': 'i',
+    'ј': 'j', 'ѕ': 's', 'ԁ': 'd', 'ɡ': 'g', 'ո': 'n', 'ν': 'v', 'ο': 'o',
+    'α': 'a', 'ε': 'e', 'ι': 'i', 'κ': 'k', 'ρ': 'p', 'τ': 't', 'υ': 'u',
+})
+
+# Невидимые символы, которыми разрывают слова
+INVISIBLE = str.maketrans({
+    '\u200b': None, '\u200c': None, '\u200d': None, '\u2060': None,
+    '\ufeff': None, '\u00ad': None,
+})
+
+_WORD = re.compile(r'\w+')
+_LATIN = re.compile(r'[a-z]')
+
+
+def _fold_mixed(match: 're.Match[str]') -> str:
+    word = match.group(0)
+    # Гомоглифы заменяются только в словах, где есть и латиница: "вет" - русское
+    # слово, а не замаскированное "bet"
+    return word.translate(HOMOGLYPHS) if _LATIN.search(word) else word
+
+
+def normalize_text(text: str) -> str:
+    """Привести текст к каноническому виду: NFKC, casefold, гомоглифы в словах со смешанным алфавитом."""
+    text = unicodedata.normalize('NFKC', text).casefold().translate(INVISIBLE)
+    if text.isascii() or not _LATIN.search(text):
+        # Смешанных слов быть не может - по словам не идем
+        return text
+    return _WORD.sub(_fold_mixed, text)
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """Собрать регулярное выражение из префиксного дерева слов.
+
+    Общие префиксы выносятся за скобки, поэтому движок regex не перебирает
+    тысячи альтернатив в каждой позиции, а идет по дереву символ за символом.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        is_end = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not is_end:
+            return branches[0]
+        body = '(?:' + '|'.join(branches) + ')'
+        return body + '?' if is_end else body
+
+    return build(trie)
+
+
+class SpamMatcher:
+    """Поиск стоп-слов одним предкомпилированным выражением.
+
+    Текст нормализуется один раз на сообщение, совпадения ищутся только
+    по границам слов ("bet" не срабатывает на "alphabet").
+    """
+
+    def __init__(self, keywords: Iterable[str] = ()):
+        self.keywords: List[str] = []
+        self._pattern: Optional[Pattern[str]] = None
+        self.set_keywords(keywords)
+
+    def set_keywords(self, keywords: Iterable[str]) -> None:
+        """Перекомпилировать выражение для нового списка стоп-слов."""
+        normalized = sorted({normalize_text(k.strip()) for k in keywords if k.strip()})
+        self.keywords = normalized
+        if not normalized:
+            self._pattern = None
+            return
+        self._pattern = re.compile(r'(?<!\w)' + _trie_regex(normalized) + r'(?!\w)')
+
+    def search(self, text: str) -> Optional[str]:
+        """Вернуть первое найденное стоп-слово или None."""
+        if not self._pattern or not text:
+            return None
+        match = self._pattern.search(normalize_text(text))
+        return match.group(0) if match else None
+
+
+class KeywordFileMatcher(SpamMatcher):
+    """SpamMatcher, который перечитывает список стоп-слов при изменении файла."""
+
+    def __init__(
+        self,
+        path: Path = SPAM_KEYWORDS_FILE,
+        check_interval: float = RELOAD_CHECK_INTERVAL,
+        fallback: Iterable[str] = ()
+    ):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._fallback = list(fallback)
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        super().__init__(self._fallback)
+        self.reload_if_changed()
+
+    def reload_if_changed(self) -> bool:
+        """Перечитать файл, если он изменился. Возвращает True, если список обновлен."""
+        self._next_check = time.monotonic() + self.check_interval
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                keywords = [line for line in f.read().splitlines() if line.strip() and not line.startswith('#')]
+        except OSError as e:
+            logger.error(f"Не удалось прочитать {self.path}: {e}")
+            return False
+
+        self._mtime = mtime
+        self.set_keywords(keywords)
+        logger.info(f"Загружено {len(self.keywords)} стоп-слов из {self.path}")
+        return True
+
+    def search(self, text: str) -> Optional[str]:
+        if time.monotonic() >= self._next_check:
+            self.reload_if_changed()
+        return super().search(text)
@@ -0,0 +1,41 @@
+import logging
+from typing import Optional
+
+from aiogram.fsm.storage.base import BaseEventIsolation, BaseStorage
+from aiogram.fsm.storage.memory import DisabledEventIsolation, MemoryStorage
+from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
+from redis.asyncio import Redis
+
+from config import FSM_DATA_TTL, FSM_STATE_TTL, FSM_STORAGE, REDIS_KEY_PREFIX
+
+from .redis_pool import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+def create_storage(redis: Optional[Redis] = None) -> BaseStorage:
+    """Создать хранилище FSM по настройке FSM_STORAGE.
+
+    Для redis ключи имеют вид ``<prefix>:fsm:<bot_id>:<chat_id>:<user_id>:<state|data>``,
+    поэтому несколько процессов бота работают с общим состоянием.
+    Можно передать свой клиент (например, fakeredis) вместо общего пула.
+    """
+    if FSM_STORAGE != "redis":
+        return MemoryStorage()
+
+    storage = RedisStorage(
+        redis=redis or get_redis(),
+        key_builder=DefaultKeyBuilder(prefix=f"{REDIS_KEY_PREFIX}:fsm", with_bot_id=True),
+        # Устаревшие состояния и current_direction сами удаляются из Redis
+        state_ttl=FSM_STATE_TTL or None,
+        data_ttl=FSM_DATA_TTL or None,
+    )
+    logger.info(f"FSM хранится в Redis (state_ttl={FSM_STATE_TTL}s, data_ttl={FSM_DATA_TTL}s)")
+    return storage
+
+
+def create_events_isolation(storage: BaseStorage) -> BaseEventIsolation:
+    """Блокировки событий одного чата, общие для всех процессов при Redis."""
+    if isinstance(storage, RedisStorage):
+        return storage.create_isolation()
+    return DisabledEventIsolation()
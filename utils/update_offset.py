@@ -0,0 +1,106 @@
+import asyncio
+import heapq
+import json
+import logging
+import os
+from pathlib import Path
+from typing import List, Optional, Set
+
+from config import UPDATE_OFFSET_FILE, UPDATE_OFFSET_FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateOffset:
+    """Последний обработанный update_id для long polling.
+
+    Апдейты обрабатываются параллельно и завершаются не по порядку, поэтому
+    запоминается update_id, до которого включительно обработано все.
+    Telegram считает апдейты подтвержденными только со следующим getUpdates,
+    и после перезапуска (в том числе после падения) присылает последнюю пачку
+    снова - уже обработанные апдейты из нее пропускаются, необработанные
+    обрабатываются. Хранится в JSON-файле, запись - в фоне раз в
+    flush_interval секунд и при остановке.
+    """
+
+    def __init__(self, path: Path = Path(UPDATE_OFFSET_FILE), flush_interval: float = UPDATE_OFFSET_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.processed: Optional[int] = None
+        self._saved: Optional[int] = None
+        self._in_flight: Set[int] = set()
+        # Обработанные апдейты, перед которыми еще есть необработанные (min-heap)
+        self._finished: List[int] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    @property
+    def next_offset(self) -> Optional[int]:
+        """offset для getUpdates: первый апдейт, который еще не обработан."""
+        return self.processed + 1 if self.processed is not None else None
+
+    def begin(self, update_id: int) -> bool:
+        """Отметить апдейт принятым. False - он уже принят или обработан (повтор от Telegram)."""
+        if self.processed is not None and update_id <= self.processed:
+            return False
+        # Telegram присылает снова все апдейты после первого необработанного
+        if update_id in self._in_flight or update_id in self._finished:
+            return False
+        self._in_flight.add(update_id)
+        return True
+
+    def finish(self, update_id: int) -> None:
+        """Отметить апдейт обработанным (успешно или с ошибкой)."""
+        self._in_flight.discard(update_id)
+        heapq.heappush(self._finished, update_id)
+        oldest = min(self._in_flight) if self._in_flight else None
+        while self._finished and (oldest is None or self._finished[0] < oldest):
+            done = heapq.heappop(self._finished)
+            self.processed = done if self.processed is None else max(self.processed, done)
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.processed = self._saved = int(json.load(f)["update_id"])
+            logger.info(f"Продолжаем polling после update_id {self.processed}")
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError, OSError) as e:
+            logger.error(f"Не удалось прочитать {self.path}: {e}")
+
+    def flush(self) -> None:
+        """Записать update_id в файл, если он изменился."""
+        if self.processed is None or self.processed == self._saved:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"update_id": self.processed}, f)
+            os.replace(tmp_path, self.path)
+            self._saved = self.processed
+        except OSError as e:
+            logger.error(f"Не удалось сохранить update_id в {self.path}: {e}")
+
+    async def start(self) -> None:
+        """Прочитать сохраненный update_id и запустить фоновую запись."""
+        self._load()
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        """Остановить фоновую запись и сохранить последний update_id."""
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        self.flush()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.flush()
+
+
+update_offset = UpdateOffset()
@@ -0,0 +1,140 @@
+import asyncio
+import heapq
+import logging
+from typing import Dict, List, Optional
+
+from config import USERS_FLUSH_INTERVAL
+
+from .db import get_pool
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS bot_users (
+    user_id BIGINT PRIMARY KEY,
+    first_seen TIMESTAMPTZ NOT NULL DEFAULT now(),
+    last_seen TIMESTAMPTZ NOT NULL DEFAULT now(),
+    active BOOLEAN NOT NULL DEFAULT TRUE
+);
+CREATE INDEX IF NOT EXISTS bot_users_active_idx ON bot_users (user_id) WHERE active;
+"""
+
+
+class UserRegistry:
+    """Пользователи, нажимавшие /start, - получатели рассылок.
+
+    touch() и deactivate() только запоминают изменение в памяти, в БД
+    (PostgreSQL из DATABASE_URL) они пишутся пачками в фоне. Без PostgreSQL
+    список хранится только в памяти и пропадает при перезапуске.
+    """
+
+    def __init__(self, flush_interval: float = USERS_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        # Отложенные записи: user_id -> активен ли пользователь
+        self._pending: Dict[int, bool] = {}
+        # Список без PostgreSQL: user_id -> активен ли пользователь
+        self._memory: Dict[int, bool] = {}
+        self._persistent = False
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def touch(self, user_id: int) -> None:
+        """Отметить пользователя (снова) активным - например, после /start."""
+        if self._persistent:
+            self._pending[user_id] = True
+        else:
+            self._memory[user_id] = True
+
+    def deactivate(self, user_id: int) -> None:
+        """Исключить пользователя из рассылок (заблокировал бота, удалил аккаунт)."""
+        if self._persistent:
+            self._pending[user_id] = False
+        elif user_id in self._memory:
+            self._memory[user_id] = False
+
+    async def fetch_active(self, after: int, limit: int) -> List[int]:
+        """Следующие limit активных пользователей с user_id > after (по возрастанию id).
+
+        Постраничный обход по ключу: каждая страница - один запрос по индексу,
+        сколько бы пользователей ни было.
+        """
+        if not self._persistent:
+            return heapq.nsmallest(
+                limit, (user_id for user_id, active in self._memory.items() if active and user_id > after)
+            )
+        pool = await get_pool()
+        rows = await pool.fetch(
+            "SELECT user_id FROM bot_users WHERE active AND user_id > $1 ORDER BY user_id LIMIT $2",
+            after, limit
+        )
+        return [row['user_id'] for row in rows]
+
+    async def count_active(self) -> int:
+        if not self._persistent:
+            return sum(self._memory.values())
+        pool = await get_pool()
+        return await pool.fetchval("SELECT count(*) FROM bot_users WHERE active")
+
+    async def start(self) -> None:
+        """Создать таблицу и запустить фоновую запись (только при PostgreSQL)."""
+        pool = await get_pool()
+        if pool is None:
+            logger.warning("PostgreSQL не настроен - получатели рассылок хранятся только в памяти")
+            return
+        await pool.execute(CREATE_TABLE_SQL)
+        self._persistent = True
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        """Остановить фоновую запись и сбросить несохраненные изменения."""
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Ошибка при записи пользователей в БД: {e}")
+
+    async def flush(self) -> None:
+        """Записать накопленные изменения в БД одной транзакцией."""
+        if not self._pending or not self._persistent:
+            return
+
+        pending, self._pending = self._pending, {}
+        seen = [(user_id,) for user_id, active in pending.items() if active]
+        gone = [user_id for user_id, active in pending.items() if not active]
+
+        pool = await get_pool()
+        try:
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    if seen:
+                        await conn.executemany(
+                            "INSERT INTO bot_users (user_id) VALUES ($1) "
+                            "ON CONFLICT (user_id) DO UPDATE SET last_seen = now(), active = TRUE",
+                            seen
+                        )
+                    if gone:
+                        await conn.execute(
+                            "UPDATE bot_users SET active = FALSE WHERE user_id = ANY($1::bigint[])", gone
+                        )
+        except Exception:
+            # Возвращаем изменения в очередь, более свежие записи не перетираем
+            for user_id, active in pending.items():
+                self._pending.setdefault(user_id, active)
+            raise
+
+
+users = UserRegistry()
+
+registry.gauge("bot_users_pending", "Изменения списка пользователей, ожидающие записи в БД",
+               lambda: len(users._pending))